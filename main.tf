@@ -129,6 +129,7 @@ module "aft_customizations" {
   aft_sns_topic_arn                                 = module.aft_account_request_framework.sns_topic_arn
   aft_failure_sns_topic_arn                         = module.aft_account_request_framework.failure_sns_topic_arn
   request_metadata_table_name                       = module.aft_account_request_framework.request_metadata_table_name
+  cache_table_name                                  = module.aft_account_request_framework.cache_table_name
   aft_vpc_id                                        = module.aft_account_request_framework.aft_vpc_id
   aft_vpc_private_subnets                           = module.aft_account_request_framework.aft_vpc_private_subnets
   aft_vpc_default_sg                                = module.aft_account_request_framework.aft_vpc_default_sg
@@ -236,6 +237,7 @@ module "aft_ssm_parameters" {
   aft_request_audit_table_name                                = module.aft_account_request_framework.request_audit_table_name
   aft_request_metadata_table_name                             = module.aft_account_request_framework.request_metadata_table_name
   aft_controltower_events_table_name                          = module.aft_account_request_framework.controltower_events_table_name
+  aft_cache_table_name                                        = module.aft_account_request_framework.cache_table_name
   account_factory_product_name                                = module.aft_account_request_framework.account_factory_product_name
   aft_invoke_aft_account_provisioning_framework_function_name = module.aft_account_request_framework.invoke_aft_account_provisioning_framework_lambda_function_name
   aft_cleanup_resources_function_name                         = module.aft_account_request_framework.aft_cleanup_resources_function_name
@@ -294,6 +296,7 @@ module "aft_ssm_parameters" {
   account_provisioning_customizations_repo_name               = var.account_provisioning_customizations_repo_name
   account_provisioning_customizations_repo_branch             = var.account_provisioning_customizations_repo_branch
   maximum_concurrent_customizations                           = var.maximum_concurrent_customizations
+  customization_scheduling_policy                             = var.customization_scheduling_policy
   github_enterprise_url                                       = var.github_enterprise_url
   gitlab_selfmanaged_url                                      = var.gitlab_selfmanaged_url
   aft_codepipeline_customizations_bucket_id                   = module.aft_customizations.aft_codepipeline_customizations_bucket_name
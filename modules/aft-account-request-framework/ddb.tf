@@ -125,3 +125,35 @@ resource "aws_dynamodb_table" "aft_controltower_events" {
     kms_key_arn = aws_kms_key.aft.arn
   }
 }
+
+# Table that caches derived data shared across Lambda invocations, e.g. the organization snapshot
+resource "aws_dynamodb_table" "aft_cache" {
+  name         = "aft-cache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "pk"
+  range_key    = "sk"
+
+  attribute {
+    name = "pk"
+    type = "S"
+  }
+
+  attribute {
+    name = "sk"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  point_in_time_recovery {
+    enabled = true
+  }
+
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.aft.arn
+  }
+}
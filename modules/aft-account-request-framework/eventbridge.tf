@@ -35,6 +35,41 @@ resource "aws_cloudwatch_event_target" "aft_management_event_bus" {
   role_arn = aws_iam_role.aft_control_tower_events.arn
 }
 
+######### Organizations Events - CT Management #########
+# Organizations publishes CloudTrail events to EventBridge in us-east-1 only. In other
+# home regions this rule never fires and the organization snapshot relies on its TTL.
+resource "aws_cloudwatch_event_rule" "aft_organizations_events" {
+  provider      = aws.ct_management
+  name          = "aft-capture-organizations-events"
+  description   = "Capture Organizations events"
+  event_pattern = <<EOF
+{
+  "source": ["aws.organizations"],
+  "detail-type": ["AWS API Call via CloudTrail", "AWS Service Event via CloudTrail"],
+  "detail": {
+    "eventName": [
+      "MoveAccount",
+      "CreateAccountResult",
+      "CloseAccount",
+      "RemoveAccountFromOrganization",
+      "CreateOrganizationalUnit",
+      "UpdateOrganizationalUnit",
+      "DeleteOrganizationalUnit",
+      "TagResource",
+      "UntagResource"
+    ]
+  }
+}
+EOF
+}
+
+resource "aws_cloudwatch_event_target" "aft_management_event_bus_organizations" {
+  provider = aws.ct_management
+  arn      = aws_cloudwatch_event_bus.aft_from_ct_management.arn
+  rule     = aws_cloudwatch_event_rule.aft_organizations_events.id
+  role_arn = aws_iam_role.aft_control_tower_events.arn
+}
+
 ######### Control Tower Event Logger #########
 resource "aws_cloudwatch_event_rule" "aft_controltower_event_trigger" {
   name           = "aft-controltower-event-logger"
@@ -42,7 +77,8 @@ resource "aws_cloudwatch_event_rule" "aft_controltower_event_trigger" {
   event_bus_name = aws_cloudwatch_event_bus.aft_from_ct_management.name
   event_pattern  = <<EOF
 {
-  "account": ["${data.aws_caller_identity.ct-management.account_id}"]
+  "account": ["${data.aws_caller_identity.ct-management.account_id}"],
+  "source": ["aws.controltower"]
 }
 EOF
 }
@@ -61,6 +97,25 @@ resource "aws_cloudwatch_event_target" "aft_invoke_aft_account_provisioning_fram
   event_bus_name = aws_cloudwatch_event_bus.aft_from_ct_management.name
 }
 
+######### AFT Organizations Event Handler #########
+resource "aws_cloudwatch_event_rule" "aft_organizations_event_trigger" {
+  name           = "aft-organizations-event-handler"
+  description    = "Send Organizations Events to Lambda"
+  event_bus_name = aws_cloudwatch_event_bus.aft_from_ct_management.name
+  event_pattern  = <<EOF
+{
+  "account": ["${data.aws_caller_identity.ct-management.account_id}"],
+  "source": ["aws.organizations"]
+}
+EOF
+}
+
+resource "aws_cloudwatch_event_target" "aft_organizations_event_handler" {
+  rule           = aws_cloudwatch_event_rule.aft_organizations_event_trigger.name
+  arn            = aws_lambda_function.aft_organizations_event_handler.arn
+  event_bus_name = aws_cloudwatch_event_bus.aft_from_ct_management.name
+}
+
 ######### Account Processor Lambda #########
 resource "aws_cloudwatch_event_rule" "aft_account_request_processor" {
   name                = "aft-lambda-account-request-processor"
@@ -43,6 +43,7 @@ resource "aws_iam_role_policy" "aft_account_request_audit_trigger" {
     aws_sns_topic_aft_failure_notifications_arn        = aws_sns_topic.aft_failure_notifications.arn
     aws_dynamodb_table_aft-request_name                = aws_dynamodb_table.aft_request.name
     aws_dynamodb_table_aft-request-audit_name          = aws_dynamodb_table.aft_request_audit.name
+    aws_dynamodb_table_aft-cache_name                  = aws_dynamodb_table.aft_cache.name
     aws_sqs_queue_aft_account_request_arn              = aws_sqs_queue.aft_account_request.arn
     aws_kms_key_aft_arn                                = aws_kms_key.aft.arn
   })
@@ -77,6 +78,7 @@ resource "aws_iam_role_policy" "aft_account_request_action_trigger" {
     aws_kms_key_aft_arn                                               = aws_kms_key.aft.arn
     aws_dynamodb_table_aft-request_name                               = aws_dynamodb_table.aft_request.name
     aws_dynamodb_table_aft-request-audit_name                         = aws_dynamodb_table.aft_request_audit.name
+    aws_dynamodb_table_aft-cache_name                                 = aws_dynamodb_table.aft_cache.name
   })
 }
 
@@ -131,6 +133,7 @@ resource "aws_iam_role_policy" "aft_account_request_processor" {
     aws_sns_topic_aft_notifications_arn                = aws_sns_topic.aft_notifications.arn
     aws_sns_topic_aft_failure_notifications_arn        = aws_sns_topic.aft_failure_notifications.arn
     aws_sqs_queue_aft_account_request_arn              = aws_sqs_queue.aft_account_request.arn
+    aws_dynamodb_table_aft-cache_name                  = aws_dynamodb_table.aft_cache.name
   })
 }
 
@@ -161,6 +164,7 @@ resource "aws_iam_role_policy" "aft_invoke_aft_account_provisioning_framework" {
     aws_dynamodb_table_aft-request_name                = aws_dynamodb_table.aft_request.name
     var_aft_account_provisioning_framework_sfn_name    = var.aft_account_provisioning_framework_sfn_name
     aws_kms_key_aft_arn                                = aws_kms_key.aft.arn
+    aws_dynamodb_table_aft-cache_name                  = aws_dynamodb_table.aft_cache.name
   })
 }
 
@@ -187,6 +191,34 @@ resource "aws_iam_role_policy" "aft_cleanup_resources" {
     aws_sns_topic_aft_notifications_arn                = aws_sns_topic.aft_notifications.arn
     aws_sns_topic_aft_failure_notifications_arn        = aws_sns_topic.aft_failure_notifications.arn
     aws_dynamodb_table_aft-request-metadata_name       = aws_dynamodb_table.aft_request_metadata.name
+    aws_dynamodb_table_aft-cache_name                  = aws_dynamodb_table.aft_cache.name
+    aws_kms_key_aft_arn                                = aws_kms_key.aft.arn
+  })
+}
+
+######### aft_organizations_event_handler #########
+resource "aws_iam_role" "aft_organizations_event_handler" {
+  name               = "aft-lambda-organizations-event-handler"
+  assume_role_policy = templatefile("${path.module}/iam/trust-policies/lambda.tpl", { none = "none" })
+}
+
+resource "aws_iam_role_policy_attachment" "aft_organizations_event_handler" {
+  count      = length(local.lambda_managed_policies)
+  role       = aws_iam_role.aft_organizations_event_handler.name
+  policy_arn = local.lambda_managed_policies[count.index]
+}
+
+resource "aws_iam_role_policy" "aft_organizations_event_handler" {
+  name = "aft-organizations-event-handler"
+  role = aws_iam_role.aft_organizations_event_handler.id
+
+  policy = templatefile("${path.module}/iam/role-policies/lambda-organizations-event-handler.tpl", {
+    data_aws_partition_current_partition               = data.aws_partition.current.partition
+    data_aws_region_aft-management_name                = data.aws_region.aft-management.region
+    data_aws_caller_identity_aft-management_account_id = data.aws_caller_identity.aft-management.account_id
+    aws_sns_topic_aft_notifications_arn                = aws_sns_topic.aft_notifications.arn
+    aws_sns_topic_aft_failure_notifications_arn        = aws_sns_topic.aft_failure_notifications.arn
+    aws_dynamodb_table_aft-cache_name                  = aws_dynamodb_table.aft_cache.name
     aws_kms_key_aft_arn                                = aws_kms_key.aft.arn
   })
 }
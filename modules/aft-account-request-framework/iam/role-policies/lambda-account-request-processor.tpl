@@ -16,6 +16,20 @@
           "${aws_sqs_queue_aft_account_request_arn}"
         ]
       },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:Query",
+          "dynamodb:BatchWriteItem"
+        ],
+        "Resource" : [
+          "arn:${data_aws_partition_current_partition}:dynamodb:${data_aws_region_aft-management_name}:${data_aws_caller_identity_aft-management_account_id}:table/${aws_dynamodb_table_aft-cache_name}"
+        ]
+      },
       {
         "Effect" : "Allow",
         "Action" : "sts:GetCallerIdentity",
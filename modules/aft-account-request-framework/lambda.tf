@@ -35,12 +35,14 @@ resource "time_sleep" "wait_60_seconds" {
 }
 
 resource "aws_lambda_event_source_mapping" "aft_account_request_audit_trigger" {
-  depends_on             = [time_sleep.wait_60_seconds]
-  event_source_arn       = aws_dynamodb_table.aft_request.stream_arn
-  function_name          = aws_lambda_function.aft_account_request_audit_trigger.arn
-  starting_position      = "LATEST"
-  batch_size             = 1
-  maximum_retry_attempts = 1
+  depends_on                         = [time_sleep.wait_60_seconds]
+  event_source_arn                   = aws_dynamodb_table.aft_request.stream_arn
+  function_name                      = aws_lambda_function.aft_account_request_audit_trigger.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 1
+  function_response_types            = ["ReportBatchItemFailures"]
 }
 
 resource "aws_cloudwatch_log_group" "aft_account_request_audit_trigger" {
@@ -78,11 +80,13 @@ resource "aws_lambda_function" "aft_account_request_action_trigger" {
 }
 
 resource "aws_lambda_event_source_mapping" "aft_account_request_action_trigger" {
-  event_source_arn       = aws_dynamodb_table.aft_request.stream_arn
-  function_name          = aws_lambda_function.aft_account_request_action_trigger.arn
-  starting_position      = "LATEST"
-  batch_size             = 1
-  maximum_retry_attempts = 1
+  event_source_arn                   = aws_dynamodb_table.aft_request.stream_arn
+  function_name                      = aws_lambda_function.aft_account_request_action_trigger.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 10
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 1
+  function_response_types            = ["ReportBatchItemFailures"]
 }
 
 resource "aws_cloudwatch_log_group" "aft_account_request_action_trigger" {
@@ -255,3 +259,45 @@ resource "aws_cloudwatch_log_group" "aft_cleanup_resources" {
   retention_in_days = var.cloudwatch_log_group_retention
   kms_key_id        = var.cloudwatch_log_group_enable_cmk_encryption ? aws_kms_key.aft.arn : null
 }
+
+######## aft_organizations_event_handler ########
+
+#tfsec:ignore:aws-lambda-enable-tracing
+resource "aws_lambda_function" "aft_organizations_event_handler" {
+
+  filename      = var.request_framework_archive_path
+  function_name = "aft-organizations-event-handler"
+  description   = "Receives AWS Organizations events through dedicated event bus and updates the cached organization snapshot"
+  role          = aws_iam_role.aft_organizations_event_handler.arn
+  handler       = "aft_organizations_event_handler.lambda_handler"
+
+  source_code_hash = var.request_framework_archive_hash
+  memory_size      = 1024
+  runtime          = var.lambda_runtime_python_version
+  timeout          = "300"
+  layers           = [var.aft_common_layer_arn]
+
+  dynamic "vpc_config" {
+    for_each = local.vpc_deployment ? [1] : []
+
+    content {
+      subnet_ids         = local.vpc_private_subnet_ids
+      security_group_ids = tolist([aws_security_group.aft_vpc_default_sg[0].id])
+    }
+  }
+
+}
+
+resource "aws_lambda_permission" "aft_organizations_event_handler" {
+  statement_id  = "AllowExecutionFromCloudWatch"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.aft_organizations_event_handler.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.aft_organizations_event_trigger.arn
+}
+
+resource "aws_cloudwatch_log_group" "aft_organizations_event_handler" {
+  name              = "/aws/lambda/${aws_lambda_function.aft_organizations_event_handler.function_name}"
+  retention_in_days = var.cloudwatch_log_group_retention
+  kms_key_id        = var.cloudwatch_log_group_enable_cmk_encryption ? aws_kms_key.aft.arn : null
+}
@@ -0,0 +1,32 @@
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+resource "aws_cloudwatch_event_rule" "aft_pipeline_execution_events" {
+  name          = "aft-customizations-pipeline-execution-events"
+  description   = "AFT customization pipeline execution state changes"
+  event_pattern = <<EOF
+{
+  "source": ["aws.codepipeline"],
+  "detail-type": ["CodePipeline Pipeline Execution State Change"],
+  "detail": {
+    "pipeline": [{"suffix": "-customizations-pipeline"}]
+  }
+}
+EOF
+}
+
+resource "aws_cloudwatch_event_target" "aft_pipeline_execution_events" {
+  arn  = aws_lambda_function.aft_customizations_pipeline_event_handler.arn
+  rule = aws_cloudwatch_event_rule.aft_pipeline_execution_events.id
+}
+
+resource "aws_cloudwatch_event_rule" "aft_pipeline_execution_reconciliation" {
+  name                = "aft-customizations-pipeline-execution-reconciliation"
+  description         = "Reconcile the AFT running pipeline count"
+  schedule_expression = "rate(15 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "aft_pipeline_execution_reconciliation" {
+  arn  = aws_lambda_function.aft_customizations_pipeline_event_handler.arn
+  rule = aws_cloudwatch_event_rule.aft_pipeline_execution_reconciliation.id
+}
@@ -92,6 +92,7 @@ resource "aws_iam_role_policy" "aft_identify_targets_lambda" {
     data_aws_partition_current_partition                     = data.aws_partition.current.partition
     data_aws_region_current_name                             = data.aws_region.current.region
     request_metadata_table_name                              = var.request_metadata_table_name
+    cache_table_name                                         = var.cache_table_name
     account_request_table_name                               = var.account_request_table_name
     aws_kms_key_aft_arn                                      = var.aft_kms_key_arn
     aft_sns_topic_arn                                        = var.aft_sns_topic_arn
@@ -122,12 +123,14 @@ resource "aws_iam_role_policy" "aft_execute_pipeline_lambda" {
   role = aws_iam_role.aft_customizations_execute_pipeline_lambda.id
 
   policy = templatefile("${path.module}/iam/role-policies/aft_execute_pipeline_lambda.tpl", {
-    data_aws_partition_current_partition        = data.aws_partition.current.partition
-    data_aws_region_current_name                = data.aws_region.current.region
-    data_aws_caller_identity_current_account_id = data.aws_caller_identity.current.account_id
-    aws_kms_key_aft_arn                         = var.aft_kms_key_arn
-    aft_sns_topic_arn                           = var.aft_sns_topic_arn
-    aft_failure_sns_topic_arn                   = var.aft_failure_sns_topic_arn
+    data_aws_partition_current_partition                     = data.aws_partition.current.partition
+    data_aws_region_current_name                             = data.aws_region.current.region
+    data_aws_caller_identity_current_account_id              = data.aws_caller_identity.current.account_id
+    aws_kms_key_aft_arn                                      = var.aft_kms_key_arn
+    aft_sns_topic_arn                                        = var.aft_sns_topic_arn
+    aft_failure_sns_topic_arn                                = var.aft_failure_sns_topic_arn
+    cache_table_name                                         = var.cache_table_name
+    aws_s3_bucket_aft_codepipeline_customizations_bucket_arn = aws_s3_bucket.aft_codepipeline_customizations_bucket.arn
   })
 
 }
@@ -158,6 +161,7 @@ resource "aws_iam_role_policy" "aft_get_pipeline_executions_lambda" {
     aws_kms_key_aft_arn                         = var.aft_kms_key_arn
     aft_sns_topic_arn                           = var.aft_sns_topic_arn
     aft_failure_sns_topic_arn                   = var.aft_failure_sns_topic_arn
+    cache_table_name                            = var.cache_table_name
   })
 
 }
@@ -168,6 +172,39 @@ resource "aws_iam_role_policy_attachment" "aft_get_pipeline_executions_lambda" {
   policy_arn = local.lambda_managed_policies[count.index]
 }
 
+###################################################################
+# Lambda - Pipeline Event Handler
+###################################################################
+
+resource "aws_iam_role" "aft_customizations_pipeline_event_handler_lambda" {
+  name               = "aft-pipeline-event-handler-execution-role"
+  assume_role_policy = templatefile("${path.module}/iam/trust-policies/lambda.tpl", { none = "none" })
+}
+
+resource "aws_iam_role_policy" "aft_pipeline_event_handler_lambda" {
+  name = "aft-pipeline-event-handler-policy"
+  role = aws_iam_role.aft_customizations_pipeline_event_handler_lambda.id
+
+  policy = templatefile("${path.module}/iam/role-policies/aft_pipeline_event_handler_lambda.tpl", {
+    data_aws_partition_current_partition        = data.aws_partition.current.partition
+    data_aws_region_current_name                = data.aws_region.current.region
+    data_aws_caller_identity_current_account_id = data.aws_caller_identity.current.account_id
+    aws_kms_key_aft_arn                         = var.aft_kms_key_arn
+    aft_sns_topic_arn                           = var.aft_sns_topic_arn
+    aft_failure_sns_topic_arn                   = var.aft_failure_sns_topic_arn
+    cache_table_name                            = var.cache_table_name
+    request_metadata_table_name                 = var.request_metadata_table_name
+    account_request_table_name                  = var.account_request_table_name
+  })
+
+}
+
+resource "aws_iam_role_policy_attachment" "aft_pipeline_event_handler_lambda" {
+  count      = length(local.lambda_managed_policies)
+  role       = aws_iam_role.aft_customizations_pipeline_event_handler_lambda.name
+  policy_arn = local.lambda_managed_policies[count.index]
+}
+
 resource "aws_iam_role_policy" "terraform_oss_backend_codebuild_customizations_policy" {
   count = var.terraform_distribution == "oss" ? 1 : 0
   name  = "ct-aft-codebuild-customizations-terraform-oss-backend-policy"
@@ -15,6 +15,38 @@
                 "arn:${data_aws_partition_current_partition}:ssm:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:parameter/aft/*"
             ]
         },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "dynamodb:GetItem",
+            "dynamodb:PutItem",
+            "dynamodb:UpdateItem",
+            "dynamodb:DeleteItem",
+            "dynamodb:Query",
+            "dynamodb:BatchWriteItem"
+        ],
+        "Resource" : [
+            "arn:${data_aws_partition_current_partition}:dynamodb:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:table/${cache_table_name}"
+        ]
+      },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "states:DescribeExecution"
+        ],
+        "Resource" : [
+            "arn:${data_aws_partition_current_partition}:states:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:execution:aft-invoke-customizations:*"
+        ]
+      },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "s3:GetObject"
+        ],
+        "Resource" : [
+            "${aws_s3_bucket_aft_codepipeline_customizations_bucket_arn}/sfn/*"
+        ]
+      },
       {
         "Effect" : "Allow",
         "Action" : [
@@ -11,6 +11,16 @@
             "Action": "codepipeline:ListPipelines",
             "Resource": "*"
         },
+        {
+            "Effect": "Allow",
+            "Action": [
+                "dynamodb:GetItem",
+                "dynamodb:PutItem",
+                "dynamodb:UpdateItem",
+                "dynamodb:Query"
+            ],
+            "Resource": "arn:${data_aws_partition_current_partition}:dynamodb:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:table/${cache_table_name}"
+        },
       {
         "Effect" : "Allow",
         "Action" : [
@@ -37,6 +37,7 @@
       "Effect": "Allow",
       "Action": [
         "dynamodb:GetItem",
+        "dynamodb:BatchGetItem",
         "dynamodb:Scan"
       ],
       "Resource": [
@@ -44,6 +45,30 @@
         "arn:${data_aws_partition_current_partition}:dynamodb:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:table/${account_request_table_name}"
       ]
     },
+    {
+      "Effect": "Allow",
+      "Action": [
+        "dynamodb:GetItem",
+        "dynamodb:PutItem",
+        "dynamodb:UpdateItem",
+        "dynamodb:DeleteItem",
+        "dynamodb:Query",
+        "dynamodb:BatchWriteItem"
+      ],
+      "Resource": [
+        "arn:${data_aws_partition_current_partition}:dynamodb:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:table/${cache_table_name}"
+      ]
+    },
+    {
+      "Effect": "Allow",
+      "Action": [
+        "codecommit:GetBranch",
+        "codecommit:GetFolder"
+      ],
+      "Resource": [
+        "arn:${data_aws_partition_current_partition}:codecommit:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:*"
+      ]
+    },
     {
       "Effect": "Allow",
       "Action": [
@@ -57,7 +82,8 @@
     {
       "Effect": "Allow",
       "Action": [
-        "s3:Put*"
+        "s3:Put*",
+        "s3:AbortMultipartUpload"
       ],
       "Resource": [
         "${aws_s3_bucket_aft_codepipeline_customizations_bucket_arn}/*"
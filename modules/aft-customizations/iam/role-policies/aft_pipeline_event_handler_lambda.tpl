@@ -0,0 +1,93 @@
+{
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Effect": "Allow",
+            "Action": [
+                "codepipeline:StartPipelineExecution",
+                "codepipeline:GetPipelineExecution",
+                "codepipeline:ListPipelineExecutions",
+                "codepipeline:ListPipelines",
+                "ssm:GetParameter",
+                "codepipeline:ListTagsForResource"
+            ],
+            "Resource": [
+                "arn:${data_aws_partition_current_partition}:codepipeline:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:*",
+                "arn:${data_aws_partition_current_partition}:ssm:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:parameter/aft/*"
+            ]
+        },
+        {
+            "Effect": "Allow",
+            "Action": "codecommit:GetFolder",
+            "Resource": "arn:${data_aws_partition_current_partition}:codecommit:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:*"
+        },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "dynamodb:GetItem",
+            "dynamodb:PutItem",
+            "dynamodb:UpdateItem",
+            "dynamodb:DeleteItem",
+            "dynamodb:Query",
+            "dynamodb:BatchWriteItem"
+        ],
+        "Resource" : [
+            "arn:${data_aws_partition_current_partition}:dynamodb:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:table/${cache_table_name}"
+        ]
+      },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "states:DescribeExecution"
+        ],
+        "Resource" : [
+            "arn:${data_aws_partition_current_partition}:states:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:execution:aft-invoke-customizations:*"
+        ]
+      },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "dynamodb:GetItem",
+            "dynamodb:UpdateItem"
+        ],
+        "Resource" : [
+            "arn:${data_aws_partition_current_partition}:dynamodb:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:table/${request_metadata_table_name}"
+        ]
+      },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "dynamodb:GetItem"
+        ],
+        "Resource" : [
+            "arn:${data_aws_partition_current_partition}:dynamodb:${data_aws_region_current_name}:${data_aws_caller_identity_current_account_id}:table/${account_request_table_name}"
+        ]
+      },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "kms:GenerateDataKey",
+            "kms:Encrypt",
+            "kms:Decrypt"
+        ],
+        "Resource" : [
+            "${aws_kms_key_aft_arn}"
+        ]
+      },
+      {
+          "Effect": "Allow",
+          "Action": "sts:GetCallerIdentity",
+          "Resource": "*"
+      },
+      {
+        "Effect" : "Allow",
+        "Action" : [
+            "sns:Publish"
+        ],
+        "Resource" : [
+            "${aft_sns_topic_arn}",
+            "${aft_failure_sns_topic_arn}"
+        ]
+      }
+    ]
+}
@@ -97,6 +97,53 @@ resource "aws_cloudwatch_log_group" "aft_get_pipeline_executions" {
   kms_key_id        = var.cloudwatch_log_group_enable_cmk_encryption ? var.aft_kms_key_arn : null
 }
 
+######## customizations_pipeline_event_handler ########
+#tfsec:ignore:aws-lambda-enable-tracing
+resource "aws_lambda_function" "aft_customizations_pipeline_event_handler" {
+  filename      = var.customizations_archive_path
+  function_name = "aft-customizations-pipeline-event-handler"
+  description   = "Keeps the running customization pipeline count current from pipeline execution events"
+  role          = aws_iam_role.aft_customizations_pipeline_event_handler_lambda.arn
+  handler       = "aft_customizations_pipeline_event_handler.lambda_handler"
+
+  source_code_hash = var.customizations_archive_hash
+  memory_size      = 1024
+  runtime          = var.lambda_runtime_python_version
+  timeout          = "300"
+  layers           = [var.aft_common_layer_arn]
+
+  dynamic "vpc_config" {
+    for_each = var.aft_enable_vpc ? [1] : []
+
+    content {
+      subnet_ids         = var.aft_vpc_private_subnets
+      security_group_ids = var.aft_vpc_default_sg
+    }
+  }
+}
+
+resource "aws_lambda_permission" "aft_pipeline_execution_events" {
+  statement_id  = "AllowExecutionFromPipelineExecutionEvents"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.aft_customizations_pipeline_event_handler.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.aft_pipeline_execution_events.arn
+}
+
+resource "aws_lambda_permission" "aft_pipeline_execution_reconciliation" {
+  statement_id  = "AllowExecutionFromPipelineExecutionReconciliation"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.aft_customizations_pipeline_event_handler.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.aft_pipeline_execution_reconciliation.arn
+}
+
+resource "aws_cloudwatch_log_group" "aft_customizations_pipeline_event_handler" {
+  name              = "/aws/lambda/${aws_lambda_function.aft_customizations_pipeline_event_handler.function_name}"
+  retention_in_days = var.cloudwatch_log_group_retention
+  kms_key_id        = var.cloudwatch_log_group_enable_cmk_encryption ? var.aft_kms_key_arn : null
+}
+
 resource "aws_cloudwatch_log_group" "aft_customizations_invoke_account_provisioning" {
   name              = "/aws/lambda/aft-customizations-invoke-account-provisioning"
   retention_in_days = var.cloudwatch_log_group_retention
@@ -69,6 +69,10 @@ variable "request_metadata_table_name" {
   type = string
 }
 
+variable "cache_table_name" {
+  type = string
+}
+
 variable "terraform_distribution" {
   type = string
 }
@@ -31,6 +31,12 @@ resource "aws_ssm_parameter" "aft_controltower_events_table_name" {
   value = var.aft_controltower_events_table_name
 }
 
+resource "aws_ssm_parameter" "aft_cache_table_name" {
+  name  = "/aft/resources/ddb/aft-cache-table-name"
+  type  = "String"
+  value = var.aft_cache_table_name
+}
+
 resource "aws_ssm_parameter" "aft_account_factory_product_name" {
   name  = "/aft/resources/sc/account-factory-product-name"
   type  = "String"
@@ -386,6 +392,12 @@ resource "aws_ssm_parameter" "aft_maximum_concurrent_customizations" {
   type  = "String"
 }
 
+resource "aws_ssm_parameter" "aft_customization_scheduling_policy" {
+  name  = "/aft/config/customizations/customization_scheduling_policy"
+  value = var.customization_scheduling_policy
+  type  = "String"
+}
+
 resource "aws_ssm_parameter" "aft_codepipeline_customizations_bucket_id" {
   name  = "/aft/config/customizations/aft_codepipeline_customizations_bucket_id"
   value = var.aft_codepipeline_customizations_bucket_id
@@ -21,6 +21,10 @@ variable "aft_controltower_events_table_name" {
   type = string
 }
 
+variable "aft_cache_table_name" {
+  type = string
+}
+
 variable "account_factory_product_name" {
   type = string
 }
@@ -256,6 +260,10 @@ variable "maximum_concurrent_customizations" {
   type = number
 }
 
+variable "customization_scheduling_policy" {
+  type = string
+}
+
 variable "aft_version" {
   type = string
 }
@@ -41,6 +41,10 @@ output "maximum_concurrent_customizations" {
   value = var.maximum_concurrent_customizations
 }
 
+output "customization_scheduling_policy" {
+  value = var.customization_scheduling_policy
+}
+
 #########################################
 # AFT Feature Flags
 #########################################
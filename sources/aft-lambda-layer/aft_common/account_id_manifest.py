@@ -0,0 +1,142 @@
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, cast
+
+from aft_common.constants import SSM_PARAM_AFT_DDB_CACHE_TABLE
+from aft_common.ssm import get_ssm_parameter_value
+from boto3.dynamodb.conditions import Key
+from boto3.session import Session
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb.service_resource import Table
+else:
+    Table = object
+
+logger = logging.getLogger("aft")
+
+
+class AftAccountIdManifest:
+    """
+    Compact copy of the IDs in the AFT request metadata table, kept in the AFT
+    cache table so every AFT account ID can be read with a single Query instead of
+    a table scan. IDs are spread over a fixed number of string-set items to stay
+    well below the DynamoDB item size limit.
+
+    The manifest is updated whenever a metadata record is written or deleted, and
+    rebuilt from a scan when missing or expired; the expiry bounds any drift
+    caused by writes racing a rebuild.
+    """
+
+    PARTITION_KEY = "aft-account-ids"
+    META_SORT_KEY = "meta"
+    SHARD_SORT_KEY_PREFIX = "shard#"
+    SHARD_COUNT = 8
+    DEFAULT_TTL_SECONDS = 86400
+
+    def __init__(
+        self,
+        aft_management_session: Session,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+        self.ttl_seconds = ttl_seconds
+
+    def _shard_sort_key(self, account_id: str) -> str:
+        return f"{self.SHARD_SORT_KEY_PREFIX}{int(account_id) % self.SHARD_COUNT}"
+
+    def get_account_ids(self) -> Optional[List[str]]:
+        """Returns every AFT account ID, or None if the manifest must be rebuilt"""
+        items: List[Dict[str, Any]] = []
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.PARTITION_KEY),
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            items.extend(response["Items"])
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+        meta = next((i for i in items if i["sk"] == self.META_SORT_KEY), None)
+        if meta is None or int(meta["expires_at"]) <= int(time.time()):
+            logger.info("AFT account ID manifest is missing or expired")
+            return None
+
+        account_ids: List[str] = []
+        for item in items:
+            if item["sk"] != self.META_SORT_KEY:
+                account_ids.extend(sorted(item.get("account_ids", set())))
+        return account_ids
+
+    def rebuild(self, account_ids: List[str]) -> None:
+        """
+        Reconciles the manifest with a full list of account IDs. Shards are updated
+        with ADD/DELETE rather than overwritten so IDs added concurrently are kept
+        """
+        logger.info(f"Rebuilding AFT account ID manifest with {len(account_ids)} IDs")
+        current = self._get_shards()
+        target: Dict[str, Set[str]] = {}
+        for account_id in account_ids:
+            target.setdefault(self._shard_sort_key(account_id), set()).add(account_id)
+
+        for shard in range(self.SHARD_COUNT):
+            sort_key = f"{self.SHARD_SORT_KEY_PREFIX}{shard}"
+            added = target.get(sort_key, set()) - current.get(sort_key, set())
+            removed = current.get(sort_key, set()) - target.get(sort_key, set())
+            # DynamoDB rejects empty sets
+            expressions = []
+            values: Dict[str, Any] = {}
+            if added:
+                expressions.append("ADD account_ids :added")
+                values[":added"] = added
+            if removed:
+                expressions.append("DELETE account_ids :removed")
+                values[":removed"] = removed
+            if expressions:
+                self.table.update_item(
+                    Key={"pk": self.PARTITION_KEY, "sk": sort_key},
+                    UpdateExpression=" ".join(expressions),
+                    ExpressionAttributeValues=values,
+                )
+
+        self.table.put_item(
+            Item={
+                "pk": self.PARTITION_KEY,
+                "sk": self.META_SORT_KEY,
+                "expires_at": int(time.time()) + self.ttl_seconds,
+            }
+        )
+
+    def add(self, account_id: str) -> None:
+        self.table.update_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self._shard_sort_key(account_id)},
+            UpdateExpression="ADD account_ids :account_id",
+            ExpressionAttributeValues={":account_id": {account_id}},
+        )
+
+    def remove(self, account_id: str) -> None:
+        self.table.update_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self._shard_sort_key(account_id)},
+            UpdateExpression="DELETE account_ids :account_id",
+            ExpressionAttributeValues={":account_id": {account_id}},
+        )
+
+    def _get_shards(self) -> Dict[str, Set[str]]:
+        response = self.table.query(
+            KeyConditionExpression=Key("pk").eq(self.PARTITION_KEY)
+            & Key("sk").begins_with(self.SHARD_SORT_KEY_PREFIX),
+            ConsistentRead=True,
+        )
+        return {
+            str(item["sk"]): set(cast(Set[str], item.get("account_ids", set())))
+            for item in response["Items"]
+        }
@@ -11,6 +11,7 @@ import aft_common.aft_utils as utils
 import aft_common.constants
 import aft_common.ssm
 from aft_common import ddb
+from aft_common.account_id_manifest import AftAccountIdManifest
 from aft_common.aft_utils import sanitize_input_for_logging
 from aft_common.auth import AuthClient
 from aft_common.organizations import OrganizationsAgent
@@ -262,6 +263,7 @@ def persist_metadata(
     response = ddb.put_ddb_item(session, metadata_table_name, item)
     sanitized_response = sanitize_input_for_logging(response)
     logger.info(sanitized_response)
+    AftAccountIdManifest(session).add(account_id=account_info["id"])
     return response
 
 
@@ -6,7 +6,17 @@ import logging
 import uuid
 from datetime import datetime
 from functools import cached_property, partial
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    cast,
+)
 
 import aft_common.constants
 import aft_common.service_catalog
@@ -14,7 +24,11 @@ import aft_common.ssm
 from aft_common import aft_utils as utils
 from aft_common import ddb, sqs
 from aft_common.account_provisioning_framework import ProvisionRoles
-from aft_common.aft_types import AftInvokeAccountCustomizationPayload
+from aft_common.aft_types import (
+    AftAccountInfo,
+    AftInvokeAccountCustomizationPayload,
+    ProvisionedProductRecord,
+)
 from aft_common.auth import AuthClient
 from aft_common.control_tower import ControlTowerFacade
 from aft_common.exceptions import (
@@ -22,9 +36,15 @@ from aft_common.exceptions import (
     ServiceRoleNotAssociated,
 )
 from aft_common.organizations import OrganizationsAgent
+from aft_common.organizations_cache import OrganizationSnapshotStore
+from aft_common.service_catalog import (
+    AccountFactoryProductResolver,
+    ProvisionedProductMirror,
+)
 from boto3.session import Session
 
 if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
     from mypy_boto3_dynamodb.type_defs import PutItemOutputTypeDef
     from mypy_boto3_servicecatalog import ServiceCatalogClient
     from mypy_boto3_servicecatalog.type_defs import (
@@ -35,6 +55,7 @@ if TYPE_CHECKING:
         UpdateProvisioningParameterTypeDef,
     )
 else:
+    DynamoDBClient = object
     SearchProvisionedProductsOutputTypeDef = object
     PutItemOutputTypeDef = object
     ProvisioningParameterTypeDef = object
@@ -103,9 +124,14 @@ def build_aft_account_provisioning_framework_event(
 
 
 def put_audit_record(
-    session: Session, table: str, image: Dict[str, Any], event_name: str
+    session: Session,
+    table: str,
+    image: Dict[str, Any],
+    event_name: str,
+    dynamodb: Optional[DynamoDBClient] = None,
 ) -> PutItemOutputTypeDef:
-    dynamodb = session.client("dynamodb")
+    if dynamodb is None:
+        dynamodb = session.client("dynamodb")
     item = image
     datetime_format = "%Y-%m-%dT%H:%M:%S.%f"
     current_time = datetime.now().strftime(datetime_format)
@@ -118,35 +144,161 @@ def put_audit_record(
     return response
 
 
+class AccountNameEmailIndex:
+    """
+    Hash index of the account names and emails in use, so that new account requests
+    are validated without listing every account of the organization per request.
+    Built once from the organization snapshot, whose crawl is shared across
+    invocations when a snapshot store is provided, and from the Control Tower
+    account products still being provisioned, whose accounts may not have joined
+    the organization yet. Accounts requested through the index are added to it so
+    that later requests validated against it collide with them.
+
+    The snapshot may predate accounts created since it was taken, so a name or
+    email reported as free is confirmed against a live listing of the
+    organization's accounts, fetched at most once per index.
+    """
+
+    IN_FLIGHT_PRODUCT_STATUSES = ["UNDER_CHANGE", "PLAN_IN_PROGRESS"]
+    CT_ACCOUNT_PRODUCT_TYPE = "CONTROL_TOWER_ACCOUNT"
+
+    def __init__(
+        self,
+        ct_management_session: Session,
+        snapshot_store: Optional[OrganizationSnapshotStore] = None,
+    ) -> None:
+        self.ct_management_session = ct_management_session
+        self.orgs_agent = OrganizationsAgent(
+            ct_management_session=ct_management_session,
+            use_snapshot=True,
+            snapshot_store=snapshot_store,
+        )
+        self._names: Optional[Set[str]] = None
+        self._emails: Set[str] = set()
+        self._provisioned_product_names: Set[str] = set()
+        self._confirmed_live = False
+
+    @staticmethod
+    def normalize_email(email: str) -> str:
+        # Matches utils.emails_are_equal
+        return email.lower()
+
+    def name_in_use(self, account_name: str) -> bool:
+        if self._name_indexed(account_name):
+            return True
+        return self._confirm_live() and self._name_indexed(account_name)
+
+    def email_in_use(self, account_email: str) -> bool:
+        if self._email_indexed(account_email):
+            return True
+        return self._confirm_live() and self._email_indexed(account_email)
+
+    def _name_indexed(self, account_name: str) -> bool:
+        names = self._load()
+        return (
+            account_name in names
+            or create_provisioned_product_name(account_name)
+            in self._provisioned_product_names
+        )
+
+    def _email_indexed(self, account_email: str) -> bool:
+        self._load()
+        return self.normalize_email(account_email) in self._emails
+
+    def _confirm_live(self) -> bool:
+        # Returns whether the index gained accounts the snapshot did not know about
+        if self._confirmed_live:
+            return False
+        self._confirmed_live = True
+        names = self._load()
+        known = len(names) + len(self._emails)
+        for account in self.orgs_agent.get_all_org_accounts():
+            names.add(account["Name"])
+            self._emails.add(self.normalize_email(account["Email"]))
+        added = len(names) + len(self._emails) - known
+        if added:
+            logger.info(f"Live account listing added {added} names/emails to the index")
+        return added > 0
+
+    def add(self, account_name: str, account_email: str) -> None:
+        self._load().add(account_name)
+        self._emails.add(self.normalize_email(account_email))
+        self._provisioned_product_names.add(
+            create_provisioned_product_name(account_name)
+        )
+
+    def _load(self) -> Set[str]:
+        if self._names is not None:
+            return self._names
+
+        snapshot = self.orgs_agent.snapshot
+        if snapshot is None:
+            raise Exception("Organization snapshot unavailable")
+        names = set(snapshot.accounts_by_name)
+        self._emails.update(snapshot.accounts_by_email)
+        self._provisioned_product_names.update(
+            product["Name"] for product in self._get_in_flight_products()
+        )
+        logger.info(
+            f"Indexed {len(names)} accounts and {len(self._provisioned_product_names)} account products being provisioned"
+        )
+        self._names = names
+        return names
+
+    def _get_in_flight_products(self) -> Iterator[ProvisionedProductAttributeTypeDef]:
+        sc_client: ServiceCatalogClient = self.ct_management_session.client(
+            "servicecatalog", config=utils.get_high_retry_botoconfig()
+        )
+        for status in AccountNameEmailIndex.IN_FLIGHT_PRODUCT_STATUSES:
+            kwargs: Dict[str, Any] = {
+                "Filters": {"SearchQuery": [f"status:{status}"]},
+                "PageSize": 100,
+            }
+            while True:
+                response = sc_client.search_provisioned_products(**kwargs)
+                for product in response["ProvisionedProducts"]:
+                    if (
+                        product.get("Type")
+                        == AccountNameEmailIndex.CT_ACCOUNT_PRODUCT_TYPE
+                        and product.get("Status") == status
+                    ):
+                        yield product
+                if "NextPageToken" not in response:
+                    break
+                kwargs["PageToken"] = response["NextPageToken"]
+
+
 def account_name_or_email_in_use(
-    ct_management_session: Session, account_name: str, account_email: str
+    ct_management_session: Session,
+    account_name: str,
+    account_email: str,
+    account_index: Optional[AccountNameEmailIndex] = None,
 ) -> bool:
-    orgs = ct_management_session.client(
-        "organizations", config=utils.get_high_retry_botoconfig()
-    )
-    paginator = orgs.get_paginator("list_accounts")
-    for page in paginator.paginate():
-        for account in page["Accounts"]:
-            if account_name == account["Name"]:
-                logger.error(
-                    f"Account Name: {account_name} already used in Organizations"
-                )
-                return True
-            if utils.emails_are_equal(account_email, account["Email"]):
-                logger.error(
-                    f"Account Email: {account_email} already used in Organizations"
-                )
-                return True
+    if account_index is None:
+        account_index = AccountNameEmailIndex(
+            ct_management_session=ct_management_session
+        )
+    if account_index.name_in_use(account_name):
+        logger.error(f"Account Name: {account_name} already used in Organizations")
+        return True
+    if account_index.email_in_use(account_email):
+        logger.error(f"Account Email: {account_email} already used in Organizations")
+        return True
 
     return False
 
 
-def new_ct_request_is_valid(session: Session, request: Dict[str, Any]) -> bool:
+def new_ct_request_is_valid(
+    session: Session,
+    request: Dict[str, Any],
+    account_index: Optional[AccountNameEmailIndex] = None,
+) -> bool:
     ct_parameters = request["control_tower_parameters"]
     return not account_name_or_email_in_use(
         ct_management_session=session,
         account_name=ct_parameters["AccountName"],
         account_email=ct_parameters["AccountEmail"],
+        account_index=account_index,
     )
 
 
@@ -178,17 +330,42 @@ def create_provisioned_product_name(account_name: str) -> str:
     return account_name.strip().replace(" ", "-")
 
 
-def create_new_account(
-    session: Session, ct_management_session: Session, request: Dict[str, Any]
-) -> ProvisionProductOutputTypeDef:
-    client = ct_management_session.client("servicecatalog")
-    event_system = client.meta.events
-
+def get_account_factory_client(
+    session: Session, ct_management_session: Session
+) -> ServiceCatalogClient:
+    """
+    Returns a Service Catalog client which identifies the AFT version in the
+    User-Agent of its requests
+    """
+    client: ServiceCatalogClient = ct_management_session.client("servicecatalog")
     aft_version = aft_common.ssm.get_ssm_parameter_value(
         session, aft_common.constants.SSM_PARAM_ACCOUNT_AFT_VERSION
     )
     header_with_aft_version = partial(add_header, version=aft_version)
-    event_system.register_first("before-sign.*.*", header_with_aft_version)
+    client.meta.events.register_first("before-sign.*.*", header_with_aft_version)
+    return client
+
+
+def create_new_account(
+    session: Session,
+    ct_management_session: Session,
+    request: Dict[str, Any],
+    client: Optional[ServiceCatalogClient] = None,
+    product_resolver: Optional[AccountFactoryProductResolver] = None,
+) -> ProvisionProductOutputTypeDef:
+    """
+    Provisions the account of a new account request. The client and resolved product
+    may be created once by the caller and shared by concurrent calls, clients being
+    thread safe unlike sessions
+    """
+    if client is None:
+        client = get_account_factory_client(session, ct_management_session)
+    if product_resolver is None:
+        product_resolver = AccountFactoryProductResolver(
+            aft_management_session=session,
+            ct_management_session=ct_management_session,
+        )
+    product = product_resolver.get_product()
 
     provisioning_parameters = []
 
@@ -203,12 +380,8 @@ def create_new_account(
         account_name=request["control_tower_parameters"]["AccountName"]
     )
     response = client.provision_product(
-        ProductId=aft_common.service_catalog.get_ct_product_id(
-            session, ct_management_session
-        ),
-        ProvisioningArtifactId=aft_common.service_catalog.get_ct_provisioning_artifact_id(
-            session, ct_management_session
-        ),
+        ProductId=product["product_id"],
+        ProvisioningArtifactId=product["provisioning_artifact_id"],
         ProvisionedProductName=provisioned_product_name,
         ProvisioningParameters=cast(
             Sequence[ProvisioningParameterTypeDef], provisioning_parameters
@@ -221,43 +394,39 @@ def create_new_account(
 
 
 def update_existing_account(
-    session: Session, ct_management_session: Session, request: Dict[str, Any]
+    session: Session,
+    ct_management_session: Session,
+    request: Dict[str, Any],
+    product_resolver: Optional[AccountFactoryProductResolver] = None,
+    product_mirror: Optional[ProvisionedProductMirror] = None,
 ) -> None:
-    client = ct_management_session.client("servicecatalog")
-    event_system = client.meta.events
-
-    aft_version = aft_common.ssm.get_ssm_parameter_value(
-        session, aft_common.constants.SSM_PARAM_ACCOUNT_AFT_VERSION
-    )
-    header_with_aft_version = partial(add_header, version=aft_version)
-    event_system.register_first("before-sign.*.*", header_with_aft_version)
+    client = get_account_factory_client(session, ct_management_session)
+    if product_mirror is None:
+        product_mirror = ProvisionedProductMirror(
+            aft_management_session=session,
+            ct_management_session=ct_management_session,
+        )
+    if product_resolver is None:
+        product_resolver = AccountFactoryProductResolver(
+            aft_management_session=session,
+            ct_management_session=ct_management_session,
+        )
 
     provisioning_parameters: List[UpdateProvisioningParameterTypeDef] = []
     for k, v in request["control_tower_parameters"].items():
         provisioning_parameters.append({"Key": k, "Value": v})
 
     control_tower_email_parameter = request["control_tower_parameters"]["AccountEmail"]
-    target_product: Optional[ProvisionedProductAttributeTypeDef] = None
+    target_product: Optional[ProvisionedProductRecord] = None
 
-    orgs_agent = OrganizationsAgent(ct_management_session=ct_management_session)
+    orgs_agent = OrganizationsAgent(
+        ct_management_session=ct_management_session,
+        snapshot_store=OrganizationSnapshotStore(session),
+    )
     account = orgs_agent.get_account_by_email(control_tower_email_parameter)
     if account is not None:
-        sc_client: ServiceCatalogClient = ct_management_session.client(
-            "servicecatalog", config=utils.get_high_retry_botoconfig()
-        )
-        kwargs: Dict[str, Any] = {
-            "Filters": {"SearchQuery": [f"physicalId:{account['Id']}"]},
-            "PageSize": 100,
-        }
-        while True:
-            response = sc_client.search_provisioned_products(**kwargs)
-            for product in response["ProvisionedProducts"]:
-                if aft_common.service_catalog.ct_account_product_is_healthy(product):
-                    target_product = product
-                    break
-            if target_product is not None or "NextPageToken" not in response:
-                break
-            kwargs["PageToken"] = response["NextPageToken"]
+        # Re-read before the update, as the mirror may predate a provisioning change
+        target_product = product_mirror.get_current_healthy_product(account["Id"])
 
     if target_product is None:
         raise Exception(
@@ -265,30 +434,20 @@ def update_existing_account(
         )
 
     # check to see if the product still exists and is still active
-    if aft_common.service_catalog.ct_provisioning_artifact_is_active(
-        session=session,
-        ct_management_session=ct_management_session,
-        artifact_id=target_product["ProvisioningArtifactId"],
-    ):
-        target_provisioning_artifact_id = target_product["ProvisioningArtifactId"]
+    if product_resolver.is_artifact_active(target_product["provisioning_artifact_id"]):
+        target_provisioning_artifact_id = target_product["provisioning_artifact_id"]
     else:
-        target_provisioning_artifact_id = (
-            aft_common.service_catalog.get_ct_provisioning_artifact_id(
-                session, ct_management_session
-            )
-        )
+        target_provisioning_artifact_id = product_resolver.provisioning_artifact_id
 
     logger.info(
         "Modifying existing account leveraging parameters: "
         + utils.sanitize_input_for_logging(str(provisioning_parameters))
         + " with provisioned product ID "
-        + target_product["Id"]
+        + target_product["id"]
     )
     update_response = client.update_provisioned_product(
-        ProvisionedProductId=target_product["Id"],
-        ProductId=aft_common.service_catalog.get_ct_product_id(
-            session, ct_management_session
-        ),
+        ProvisionedProductId=target_product["id"],
+        ProductId=product_resolver.product_id,
         ProvisioningArtifactId=target_provisioning_artifact_id,
         ProvisioningParameters=provisioning_parameters,
         UpdateToken=str(uuid.uuid1()),
@@ -318,17 +477,44 @@ def get_account_request_record(
         raise Exception(f"Account {request_table_id}  not found in {table_name}")
 
 
+def get_account_request_records(
+    aft_management_session: Session, request_table_ids: Sequence[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Batch counterpart to get_account_request_record, keyed by request table ID.
+    IDs without a record are absent from the result rather than raising
+    """
+    table_name = aft_common.ssm.get_ssm_parameter_value(
+        aft_management_session, aft_common.constants.SSM_PARAM_AFT_DDB_REQ_TABLE
+    )
+    logger.info(
+        f"Getting records for {len(request_table_ids)} ids in DDB table {table_name}"
+    )
+    items = ddb.batch_get_ddb_items(
+        session=aft_management_session,
+        table_name=table_name,
+        primary_keys=[
+            {"id": request_table_id}
+            for request_table_id in dict.fromkeys(request_table_ids)
+        ],
+    )
+    return {item["id"]: item for item in items}
+
+
 def build_account_customization_payload(
     ct_management_session: Session,
     account_id: str,
     account_request: Dict[str, Any],
     control_tower_event: Optional[Dict[str, Any]],
+    orgs_agent: Optional[OrganizationsAgent] = None,
+    account_info: Optional[AftAccountInfo] = None,
 ) -> AftInvokeAccountCustomizationPayload:
-    orgs_agent = OrganizationsAgent(ct_management_session)
-
     # convert ddb strings into proper data type
     account_request["account_tags"] = json.loads(account_request["account_tags"])
-    account_info = orgs_agent.get_aft_account_info(account_id=account_id)
+    if account_info is None:
+        if orgs_agent is None:
+            orgs_agent = OrganizationsAgent(ct_management_session)
+        account_info = orgs_agent.get_aft_account_info(account_id=account_id)
 
     if control_tower_event is None:
         control_tower_event = {}
@@ -345,6 +531,40 @@ def build_account_customization_payload(
     return account_customization_payload
 
 
+def build_account_customization_payloads(
+    aft_management_session: Session,
+    ct_management_session: Session,
+    account_infos: Dict[str, AftAccountInfo],
+    account_requests: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Iterator[AftInvokeAccountCustomizationPayload]:
+    """
+    Yields the customization payload of every account in account_infos, reading
+    all account request records with batched gets instead of one GetItem per account
+    unless already read into account_requests, keyed by email.
+    Payloads are built lazily so they can be streamed to S3 as they are generated
+    """
+    if account_requests is None:
+        account_requests = get_account_request_records(
+            aft_management_session=aft_management_session,
+            request_table_ids=[info["email"] for info in account_infos.values()],
+        )
+
+    for account_id, account_info in account_infos.items():
+        account_request = account_requests.pop(account_info["email"], None)
+        if account_request is None:
+            raise Exception(f"Account {account_info['email']}  not found in DDB table")
+        account_payload = build_account_customization_payload(
+            ct_management_session=ct_management_session,
+            account_id=account_id,
+            account_request=account_request,
+            control_tower_event={},
+            account_info=account_info,
+        )
+        sanitized_payload = utils.sanitize_input_for_logging(account_payload)
+        logger.info(f"Successfully generated payload: {sanitized_payload}")
+        yield account_payload
+
+
 class AccountRequest:
     ACCOUNT_FACTORY_PORTFOLIO_NAME = "AWS Control Tower Account Factory Portfolio"
 
@@ -356,10 +576,11 @@ class AccountRequest:
             session=self.ct_management_session
         )
         self.aft_management_session = auth.get_aft_management_session()
-        self.account_factory_product_id = aft_common.service_catalog.get_ct_product_id(
-            session=self.aft_management_session,
+        self.product_resolver = AccountFactoryProductResolver(
+            aft_management_session=self.aft_management_session,
             ct_management_session=self.ct_management_session,
         )
+        self.account_factory_product_id = self.product_resolver.product_id
 
         self.partition = utils.get_aws_partition(self.ct_management_session)
 
@@ -422,6 +643,13 @@ class AccountRequest:
         return False
 
     def provisioning_threshold_reached(self, threshold: int) -> bool:
+        return self.get_provisioning_capacity(threshold=threshold) == 0
+
+    def get_provisioning_capacity(self, threshold: int) -> int:
+        """
+        Returns how many more account factory actions can start before the
+        concurrent account provisioning threshold is reached
+        """
         logger.info(
             "Checking for account provisioning in progress via ListEnabledBaselines"
         )
@@ -430,4 +658,4 @@ class AccountRequest:
         logger.info(
             f"CT baselines UNDER_CHANGE: {in_progress_count}, threshold: {threshold}"
         )
-        return in_progress_count >= threshold
+        return max(threshold - in_progress_count, 0)
@@ -16,18 +16,41 @@ from aft_common.account_request_framework import (
 )
 from aft_common.auth import AuthClient
 from aft_common.organizations import OrganizationsAgent
-from aft_common.service_catalog import get_account_id_if_enrolled
+from aft_common.organizations_cache import OrganizationSnapshotStore
+from aft_common.service_catalog import (
+    ProvisionedProductMirror,
+    get_account_id_if_enrolled,
+)
 from aft_common.shared_account import shared_account_request
+from aft_common.validation import ACCOUNT_REQUEST_STREAM_EVENT_SCHEMA, validate_event
+from boto3.session import Session
 
 logger = logging.getLogger("aft")
 
 
 class AccountRequestRecordHandler:
-    def __init__(self, auth: AuthClient, event: Dict[str, Any]) -> None:
-        AccountRequestRecordHandler._validate_event(event=event)
+    def __init__(
+        self,
+        auth: AuthClient,
+        record: Dict[str, Any],
+        ct_management_session: Optional[Session] = None,
+        orgs_agent: Optional[OrganizationsAgent] = None,
+        product_mirror: Optional[ProvisionedProductMirror] = None,
+    ) -> None:
+        # The sessions, organizations agent and mirror may be shared by the records
+        # of a batch, see aft_account_request_action_trigger
         self._aft_management_session = auth.get_aft_management_session()
-        self._ct_management_session = auth.get_ct_management_session()
-        self.record = event["Records"][0]
+        if ct_management_session is None:
+            ct_management_session = auth.get_ct_management_session()
+        self._ct_management_session = ct_management_session
+        if orgs_agent is None:
+            orgs_agent = OrganizationsAgent(
+                ct_management_session=self._ct_management_session,
+                snapshot_store=OrganizationSnapshotStore(self._aft_management_session),
+            )
+        self._orgs_agent = orgs_agent
+        self._product_mirror = product_mirror
+        self.record = record
         self._old_image = self.record["dynamodb"].get("OldImage")
         self._new_image = self.record["dynamodb"].get("NewImage")
         self.control_tower_parameters_updated = self._control_tower_parameters_changed()
@@ -43,16 +66,11 @@ class AccountRequestRecordHandler:
 
     def _get_account_id(self, account_request: Dict[str, Any]) -> str:
         email = account_request["id"]
-        orgs = OrganizationsAgent(ct_management_session=self._ct_management_session)
-        return orgs.get_account_id_from_email(email=email)
+        return self._orgs_agent.get_account_id_from_email(email=email)
 
     @staticmethod
-    def _validate_event(event: Dict[str, Any]) -> None:
-        try:
-            if event["Records"][0]["eventSource"] != "aws:dynamodb":
-                raise Exception("Invalid event source")
-        except (KeyError, IndexError):
-            raise Exception("Invalid event structure")
+    def validate_record(record: Dict[str, Any]) -> None:
+        validate_event(ACCOUNT_REQUEST_STREAM_EVENT_SCHEMA, {"Records": [record]})
 
     def handle_remove(self) -> None:
         account_request = ddb.unmarshal_ddb_item(self._old_image)
@@ -100,6 +118,7 @@ class AccountRequestRecordHandler:
             account_id=account_id,
             account_request=account_request,
             control_tower_event=account_provisioning_payload,
+            orgs_agent=self._orgs_agent,
         )
         account_provisioning_stepfunction = ssm.get_ssm_parameter_value(
             self._aft_management_session, aft_common.constants.SSM_PARAM_AFT_SFN_NAME
@@ -120,12 +139,20 @@ class AccountRequestRecordHandler:
         # Triggering customization for shared account
         elif not control_tower_param_changed(
             record=self.record
-        ) and shared_account_request(event_record=self.record, auth=self.auth):
+        ) and shared_account_request(
+            event_record=self.record,
+            auth=self.auth,
+            ct_management_session=self._ct_management_session,
+        ):
             logger.info("Customization request received")
             self.handle_customization_request()
 
         elif self.is_create_action:
-            enrolled_account_id = get_account_id_if_enrolled(record=self.record)
+            enrolled_account_id = get_account_id_if_enrolled(
+                record=self.record,
+                orgs_agent=self._orgs_agent,
+                product_mirror=self._product_mirror,
+            )
             if enrolled_account_id is None:
                 logger.info("New account request received")
                 self.handle_account_request(new_account=True)
@@ -1,7 +1,7 @@
 # Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
 # SPDX-License-Identifier: Apache-2.0
 #
-from typing import Any, Dict, Literal, TypedDict
+from typing import Any, Dict, List, Literal, Optional, TypedDict
 
 
 class AftAccountInfo(TypedDict):
@@ -17,6 +17,51 @@ class AftAccountInfo(TypedDict):
     vendor: Literal["aws"]
 
 
+class OrganizationalUnitTreeInfo(TypedDict):
+    parent_id: Optional[str]
+    depth: int  # Root is depth 0
+    path_ids: List[str]  # OU ids from the root down to and including this OU
+    path: str  # OU names from the root, joined with "/"
+
+
+class AccountState(TypedDict):
+    parent_id: str
+    status: str
+    tags: Dict[str, str]
+
+
+class AccountFactoryProduct(TypedDict):
+    product_name: str
+    product_id: str
+    provisioning_artifact_id: str
+    active_provisioning_artifact_ids: List[str]
+    expires_at: int
+
+
+class ProvisionedProductRecord(TypedDict):
+    id: str
+    name: str
+    account_id: Optional[str]  # physicalId, set once the account is created
+    status: str
+    provisioning_artifact_id: str
+    last_successful_provisioning_record_id: Optional[str]
+
+
+class StreamBatchItemFailure(TypedDict):
+    itemIdentifier: str  # SequenceNumber of the stream record
+
+
+class StreamBatchResponse(TypedDict):
+    batchItemFailures: List[StreamBatchItemFailure]
+
+
+class PipelineLaunchResult(TypedDict):
+    pipeline_name: Optional[str]
+    status: Literal["started", "already_running", "not_found", "failed"]
+    execution_id: Optional[str]
+    error: Optional[str]
+
+
 class AftInvokeAccountCustomizationPayload(TypedDict):
     account_info: Dict[Literal["account"], AftAccountInfo]
     account_request: Dict[str, Any]
@@ -4,6 +4,7 @@
 import logging
 import random
 import re
+import threading
 import time
 from functools import wraps
 from typing import (
@@ -123,6 +124,36 @@ def get_region_connectivity_botoconfig() -> Config:
     return Config(retries={"total_max_attempts": 5, "mode": "standard"})
 
 
+class TokenBucket:
+    """
+    Thread-safe client-side rate limiter. Threads sharing a bucket block in
+    acquire() until a token is available, keeping the combined request rate at
+    or below requests_per_second with bursts of up to burst_size requests.
+    """
+
+    def __init__(self, requests_per_second: float, burst_size: int) -> None:
+        self.requests_per_second = requests_per_second
+        self.burst_size = burst_size
+        self._tokens = float(burst_size)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    float(self.burst_size),
+                    self._tokens + (now - self._last_refill) * self.requests_per_second,
+                )
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_sec = (1 - self._tokens) / self.requests_per_second
+            time.sleep(wait_sec)
+
+
 def emails_are_equal(first_email: str, second_email: str) -> bool:
     return first_email.lower() == second_email.lower()
 
@@ -3,14 +3,37 @@
 #
 import logging
 import re
-from typing import Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, cast
 
 import aft_common.aft_utils as utils
+from aft_common.aft_types import PipelineLaunchResult
+from aft_common.constants import SSM_PARAM_AFT_DDB_CACHE_TABLE
+from aft_common.ssm import get_ssm_parameter_value
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeSerializer
 from boto3.session import Session
 
+if TYPE_CHECKING:
+    from mypy_boto3_codepipeline import CodePipelineClient
+    from mypy_boto3_codepipeline.type_defs import PipelineExecutionSummaryTypeDef
+    from mypy_boto3_dynamodb import DynamoDBClient
+    from mypy_boto3_dynamodb.service_resource import Table
+    from mypy_boto3_dynamodb.type_defs import TransactWriteItemTypeDef
+else:
+    CodePipelineClient = object
+    PipelineExecutionSummaryTypeDef = object
+    DynamoDBClient = object
+    TransactWriteItemTypeDef = object
+    Table = object
+
 logger = logging.getLogger("aft")
 
 AFT_CUSTOMIZATIONS_PIPELINE_NAME_PATTERN = r"^\d\d\d\d\d\d\d\d\d\d\d\d-.*$"
+PIPELINE_PROBE_MAX_WORKERS = 10
+PIPELINE_LAUNCH_REQUESTS_PER_SECOND = 10.0
+PIPELINE_LAUNCH_BURST_SIZE = 10
 
 
 def get_pipeline_for_account(session: Session, account_id: str) -> str:
@@ -38,45 +61,232 @@ def get_pipeline_for_account(session: Session, account_id: str) -> str:
                 + ":"
                 + name
             )
-            response = client.list_tags_for_resource(resourceArn=pipeline_arn)
-            for t in response["tags"]:
-                if t["key"] == "managed_by" and t["value"] == "AFT":
-                    pipeline_name: str = p["name"]
-                    return pipeline_name
+            if _is_aft_managed_pipeline(client, pipeline_arn):
+                pipeline_name: str = p["name"]
+                return pipeline_name
     raise Exception(
         "Pipelines for account id " + sanitized_account_id + " was not found"
     )
 
 
-def pipeline_is_running(session: Session, name: str) -> bool:
-    logger.info("Getting pipeline executions for " + name)
+def _is_aft_managed_pipeline(client: CodePipelineClient, pipeline_arn: str) -> bool:
+    response = client.list_tags_for_resource(resourceArn=pipeline_arn)
+    return any(
+        t["key"] == "managed_by" and t["value"] == "AFT" for t in response["tags"]
+    )
 
-    client = session.client("codepipeline", config=utils.get_high_retry_botoconfig())
-    paginator = client.get_paginator("list_pipeline_executions")
 
-    pipeline_execution_summaries = []
-    for page in paginator.paginate(pipelineName=name):
-        pipeline_execution_summaries.extend(page["pipelineExecutionSummaries"])
+class AccountPipelineIndex:
+    """
+    Maps account IDs to the names of their AFT customization pipelines, kept in the
+    AFT cache table so pipelines can be resolved without listing every pipeline in
+    the region and reading the tags of each candidate.
+
+    The whole index is read with a single Query on first use. It is built from one
+    pipeline listing when missing or expired, updated by aft-create-pipeline and
+    cleanup, and accounts absent from the index fall back to get_pipeline_for_account.
+    """
+
+    PARTITION_KEY = "account-pipelines"
+    META_SORT_KEY = "meta"
+    ACCOUNT_SORT_KEY_PREFIX = "account#"
+    DEFAULT_TTL_SECONDS = 86400
+    TAG_MAX_WORKERS = 5
+    TAG_REQUESTS_PER_SECOND = 5.0
+    TAG_BURST_SIZE = 10
+
+    def __init__(
+        self,
+        aft_management_session: Session,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.session = aft_management_session
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+        self.ttl_seconds = ttl_seconds
+        self._pipeline_names: Optional[Dict[str, str]] = None
+
+    def get_pipeline_name(self, account_id: str) -> str:
+        pipeline_names = self._get_pipeline_names()
+        if account_id in pipeline_names:
+            return pipeline_names[account_id]
+        pipeline_name = get_pipeline_for_account(self.session, account_id)
+        self.put(account_id=account_id, pipeline_name=pipeline_name)
+        return pipeline_name
+
+    def put(self, account_id: str, pipeline_name: str) -> None:
+        self.table.put_item(
+            Item={
+                "pk": self.PARTITION_KEY,
+                "sk": f"{self.ACCOUNT_SORT_KEY_PREFIX}{account_id}",
+                "pipeline_name": pipeline_name,
+            }
+        )
+        if self._pipeline_names is not None:
+            self._pipeline_names[account_id] = pipeline_name
+
+    def remove(self, account_id: str) -> None:
+        self.table.delete_item(
+            Key={
+                "pk": self.PARTITION_KEY,
+                "sk": f"{self.ACCOUNT_SORT_KEY_PREFIX}{account_id}",
+            }
+        )
+        if self._pipeline_names is not None:
+            self._pipeline_names.pop(account_id, None)
+
+    def rebuild(self) -> Dict[str, str]:
+        """
+        Lists the region's pipelines once and indexes every AFT managed pipeline
+        whose name starts with an account ID, replacing stale entries
+        """
+        client: CodePipelineClient = self.session.client(
+            "codepipeline", config=utils.get_high_retry_botoconfig()
+        )
+        current_account = self.session.client("sts").get_caller_identity()["Account"]
+        arn_prefix = f"arn:{utils.get_aws_partition(self.session)}:codepipeline:{self.session.region_name}:{current_account}"
+
+        pattern = re.compile(AFT_CUSTOMIZATIONS_PIPELINE_NAME_PATTERN)
+        candidates: Dict[str, str] = {}
+        for page in client.get_paginator("list_pipelines").paginate():
+            for pipeline in page["pipelines"]:
+                name = pipeline["name"]
+                if re.match(pattern, name):
+                    # Keep the first match per account, as get_pipeline_for_account does
+                    candidates.setdefault(name.split("-", 1)[0], name)
+
+        token_bucket = utils.TokenBucket(
+            requests_per_second=self.TAG_REQUESTS_PER_SECOND,
+            burst_size=self.TAG_BURST_SIZE,
+        )
 
-    if not pipeline_execution_summaries:
-        # No executions for this pipeline in the last 12 months, so cannot be currently running
-        return False
+        def is_aft_managed(name: str) -> bool:
+            token_bucket.acquire()
+            return _is_aft_managed_pipeline(client, f"{arn_prefix}:{name}")
+
+        with ThreadPoolExecutor(max_workers=self.TAG_MAX_WORKERS) as executor:
+            managed = executor.map(is_aft_managed, candidates.values())
+            pipeline_names = {
+                account_id: name
+                for (account_id, name), is_managed in zip(candidates.items(), managed)
+                if is_managed
+            }
+        logger.info(f"Indexing {len(pipeline_names)} AFT customization pipelines")
+
+        indexed = self._query_pipeline_names()
+        with self.table.batch_writer() as batch:
+            for account_id in indexed.keys() - pipeline_names.keys():
+                batch.delete_item(
+                    Key={
+                        "pk": self.PARTITION_KEY,
+                        "sk": f"{self.ACCOUNT_SORT_KEY_PREFIX}{account_id}",
+                    }
+                )
+            for account_id, name in pipeline_names.items():
+                if indexed.get(account_id) != name:
+                    batch.put_item(
+                        Item={
+                            "pk": self.PARTITION_KEY,
+                            "sk": f"{self.ACCOUNT_SORT_KEY_PREFIX}{account_id}",
+                            "pipeline_name": name,
+                        }
+                    )
+        self.table.put_item(
+            Item={
+                "pk": self.PARTITION_KEY,
+                "sk": self.META_SORT_KEY,
+                "expires_at": int(time.time()) + self.ttl_seconds,
+            }
+        )
+        return pipeline_names
+
+    def _get_pipeline_names(self) -> Dict[str, str]:
+        if self._pipeline_names is None:
+            meta = self.table.get_item(
+                Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY},
+                ConsistentRead=True,
+            ).get("Item")
+            if meta is None or int(str(meta["expires_at"])) <= int(time.time()):
+                logger.info("Account pipeline index is missing or expired")
+                self._pipeline_names = self.rebuild()
+            else:
+                self._pipeline_names = self._query_pipeline_names()
+        return self._pipeline_names
+
+    def _query_pipeline_names(self) -> Dict[str, str]:
+        pipeline_names: Dict[str, str] = {}
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.PARTITION_KEY)
+            & Key("sk").begins_with(self.ACCOUNT_SORT_KEY_PREFIX),
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            for item in response["Items"]:
+                account_id = str(item["sk"])[len(self.ACCOUNT_SORT_KEY_PREFIX) :]
+                pipeline_names[account_id] = str(item["pipeline_name"])
+            if "LastEvaluatedKey" not in response:
+                return pipeline_names
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def get_latest_pipeline_execution(
+    client: CodePipelineClient, name: str
+) -> Optional[PipelineExecutionSummaryTypeDef]:
+    """
+    Executions are listed newest first, so a single page of one summary is enough
+    to tell whether a pipeline is running
+    """
+    logger.info("Getting latest pipeline execution for " + name)
+    response = client.list_pipeline_executions(pipelineName=name, maxResults=1)
+    summaries = response["pipelineExecutionSummaries"]
+    if not summaries:
+        # No executions for this pipeline in the last 12 months
+        return None
+    return summaries[0]
 
-    latest_execution = sorted(
-        pipeline_execution_summaries, key=lambda i: i["startTime"], reverse=True
-    )[0]
+
+def pipeline_is_running(session: Session, name: str) -> bool:
+    client = session.client("codepipeline", config=utils.get_high_retry_botoconfig())
+    latest_execution = get_latest_pipeline_execution(client, name)
 
     logger.info(f"Latest Execution: {latest_execution}")
-    if latest_execution["status"] == "InProgress":
-        return True
-    else:
-        return False
+    return latest_execution is not None and latest_execution["status"] == "InProgress"
+
 
+def _get_pipeline_running_state(
+    session: Session,
+    account_id: str,
+    pipeline_index: Optional[AccountPipelineIndex],
+) -> Tuple[str, bool]:
+    if pipeline_index is None:
+        name = get_pipeline_for_account(session, account_id)
+        return name, pipeline_is_running(session, name)
 
-def execute_pipeline(session: Session, account_id: str) -> None:
+    name = pipeline_index.get_pipeline_name(account_id)
     client = session.client("codepipeline")
-    name = get_pipeline_for_account(session, account_id)
-    if not pipeline_is_running(session, name):
+    try:
+        return name, pipeline_is_running(session, name)
+    except client.exceptions.PipelineNotFoundException:
+        # Stale entry, e.g. a pipeline deleted outside of AFT
+        logger.info(f"Indexed pipeline {name} no longer exists, refreshing")
+        pipeline_index.remove(account_id)
+        name = pipeline_index.get_pipeline_name(account_id)
+        return name, pipeline_is_running(session, name)
+
+
+def execute_pipeline(
+    session: Session,
+    account_id: str,
+    pipeline_index: Optional[AccountPipelineIndex] = None,
+) -> None:
+    client = session.client("codepipeline")
+    name, is_running = _get_pipeline_running_state(session, account_id, pipeline_index)
+    if not is_running:
         logger.info("Executing pipeline - " + name)
         response = client.start_pipeline_execution(name=name)
         sanitized_response = utils.sanitize_input_for_logging(response)
@@ -85,6 +295,102 @@ def execute_pipeline(session: Session, account_id: str) -> None:
         logger.info("Pipeline is currently running")
 
 
+def execute_pipelines(
+    session: Session,
+    account_ids: List[str],
+    pipeline_index: AccountPipelineIndex,
+    max_workers: int = PIPELINE_PROBE_MAX_WORKERS,
+) -> Dict[str, PipelineLaunchResult]:
+    """
+    Batch counterpart to execute_pipeline. Pipeline names are resolved from the
+    index up front, then every pipeline is probed and, unless already running,
+    started from a thread pool sharing one client, with starts rate limited.
+    Returns the launch result of each account rather than raising on the first error
+    """
+    results: Dict[str, PipelineLaunchResult] = {}
+    pipeline_names: Dict[str, str] = {}
+    for account_id in account_ids:
+        try:
+            pipeline_names[account_id] = pipeline_index.get_pipeline_name(account_id)
+        except Exception as error:
+            results[account_id] = _failed_launch(None, str(error))
+
+    client: CodePipelineClient = session.client(
+        "codepipeline", config=utils.get_high_retry_botoconfig()
+    )
+    token_bucket = utils.TokenBucket(
+        requests_per_second=PIPELINE_LAUNCH_REQUESTS_PER_SECOND,
+        burst_size=PIPELINE_LAUNCH_BURST_SIZE,
+    )
+
+    def launch(account_id: str) -> PipelineLaunchResult:
+        name = pipeline_names[account_id]
+        try:
+            latest_execution = get_latest_pipeline_execution(client, name)
+            if (
+                latest_execution is not None
+                and latest_execution["status"] == "InProgress"
+            ):
+                logger.info(f"Pipeline {name} is currently running")
+                return {
+                    "pipeline_name": name,
+                    "status": "already_running",
+                    "execution_id": latest_execution["pipelineExecutionId"],
+                    "error": None,
+                }
+            token_bucket.acquire()
+            logger.info("Executing pipeline - " + name)
+            response = client.start_pipeline_execution(name=name)
+            return {
+                "pipeline_name": name,
+                "status": "started",
+                "execution_id": response["pipelineExecutionId"],
+                "error": None,
+            }
+        except client.exceptions.PipelineNotFoundException as error:
+            return {
+                "pipeline_name": name,
+                "status": "not_found",
+                "execution_id": None,
+                "error": str(error),
+            }
+        except Exception as error:
+            return _failed_launch(name, str(error))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results.update(
+            zip(pipeline_names.keys(), executor.map(launch, pipeline_names.keys()))
+        )
+
+    # Stale index entries, e.g. pipelines deleted outside of AFT, are resolved again
+    # here as the index is not shared with the worker threads
+    for account_id, result in list(results.items()):
+        if result["status"] == "not_found":
+            logger.info(f"Indexed pipeline {result['pipeline_name']} no longer exists")
+            pipeline_index.remove(account_id)
+            try:
+                pipeline_names[account_id] = pipeline_index.get_pipeline_name(
+                    account_id
+                )
+                results[account_id] = launch(account_id)
+            except Exception as error:
+                results[account_id] = _failed_launch(None, str(error))
+            if results[account_id]["status"] == "not_found":
+                results[account_id]["status"] = "failed"
+
+    logger.info("Pipeline launch results: " + utils.sanitize_input_for_logging(results))
+    return results
+
+
+def _failed_launch(pipeline_name: Optional[str], error: str) -> PipelineLaunchResult:
+    return {
+        "pipeline_name": pipeline_name,
+        "status": "failed",
+        "execution_id": None,
+        "error": error,
+    }
+
+
 def list_pipelines(session: Session) -> List[Any]:
     logger.info("Listing Pipelines - ")
 
@@ -106,45 +412,291 @@ def list_pipelines(session: Session) -> List[Any]:
 
 
 def get_running_pipeline_count(session: Session, pipeline_names: List[str]) -> int:
-    pipeline_counter = 0
-    client = session.client("codepipeline", config=utils.get_high_retry_botoconfig())
-
-    for name in pipeline_names:
-        logger.info("Getting pipeline executions for " + name)
+    pipeline_counter = len(get_running_pipeline_executions(session, pipeline_names))
+    logger.info("The number of running pipelines is " + str(pipeline_counter))
+    return pipeline_counter
 
-        paginator = client.get_paginator("list_pipeline_executions")
-        pipeline_execution_summaries = []
-        for page in paginator.paginate(pipelineName=name):
-            pipeline_execution_summaries.extend(page["pipelineExecutionSummaries"])
 
-        if not pipeline_execution_summaries:
-            # No executions for this pipeline in the last 12 months
-            continue
-        else:
-            latest_execution = sorted(
-                pipeline_execution_summaries, key=lambda i: i["startTime"], reverse=True
-            )[0]
-            logger.info("Latest Execution: ")
-            logger.info(latest_execution)
+def get_running_pipeline_executions(
+    session: Session,
+    pipeline_names: List[str],
+    max_workers: int = PIPELINE_PROBE_MAX_WORKERS,
+) -> Dict[str, str]:
+    """
+    Returns the ID of the latest execution of each pipeline where it is in progress.
+    Pipelines are probed concurrently through a single client, which unlike the
+    session is thread safe
+    """
+    client: CodePipelineClient = session.client(
+        "codepipeline", config=utils.get_high_retry_botoconfig()
+    )
 
-            if latest_execution["status"] == "InProgress":
-                pipeline_counter += 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        latest_executions = executor.map(
+            lambda name: get_latest_pipeline_execution(client, name), pipeline_names
+        )
+        return {
+            name: latest_execution["pipelineExecutionId"]
+            for name, latest_execution in zip(pipeline_names, latest_executions)
+            if latest_execution is not None
+            and latest_execution["status"] == "InProgress"
+        }
+
+
+class RunningPipelineCounter:
+    """
+    Number of AFT customization pipelines with an execution in progress, kept in
+    the AFT cache table from CodePipeline execution state change events so it can
+    be read with a single GetItem.
+
+    Each execution has a marker item holding its last applied state and event time.
+    A state change updates the marker and adjusts the counter in one transaction,
+    conditioned on the marker read beforehand, so duplicate and out of order events
+    leave the count unchanged. reconcile() periodically realigns markers and counter
+    with the executions reported by CodePipeline to correct any remaining drift.
+    Every counter adjustment bumps the counter's version, and the reconciled count
+    is only written if no adjustment happened while the markers were counted.
+    """
+
+    PARTITION_KEY = "pipeline-executions"
+    COUNTER_SORT_KEY = "running-count"
+    EXECUTION_SORT_KEY_PREFIX = "execution#"
+    RUNNING_STATES = {"STARTED", "RESUMED"}
+    ENDED_MARKER_TTL_SECONDS = 7 * 86400
+    MAX_WRITE_ATTEMPTS = 5
+
+    def __init__(self, aft_management_session: Session) -> None:
+        self.session = aft_management_session
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+        self.client: DynamoDBClient = aft_management_session.client("dynamodb")
+        self.serializer = TypeSerializer()
+
+    def get_running_count(self) -> Optional[int]:
+        """Returns the number of running pipelines, or None if never reconciled"""
+        item = self.table.get_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self.COUNTER_SORT_KEY},
+            ConsistentRead=True,
+        ).get("Item")
+        if item is None or "reconciled_at" not in item:
+            return None
+        return max(int(str(item["running"])), 0)
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """Applies a CodePipeline Pipeline Execution State Change event"""
+        detail = event["detail"]
+        pipeline_name = detail["pipeline"]
+        if not re.match(AFT_CUSTOMIZATIONS_PIPELINE_NAME_PATTERN, pipeline_name):
+            return
+        self.record_execution_state(
+            pipeline_name=pipeline_name,
+            execution_id=detail["execution-id"],
+            running=detail["state"] in self.RUNNING_STATES,
+            event_time=event["time"],
+        )
 
-    logger.info("The number of running pipelines is " + str(pipeline_counter))
+    def record_execution_state(
+        self, pipeline_name: str, execution_id: str, running: bool, event_time: str
+    ) -> bool:
+        """Returns whether the state was recorded, False if a newer state was known"""
+        sort_key = f"{self.EXECUTION_SORT_KEY_PREFIX}{pipeline_name}#{execution_id}"
+        for _ in range(self.MAX_WRITE_ATTEMPTS):
+            marker = self.table.get_item(
+                Key={"pk": self.PARTITION_KEY, "sk": sort_key}, ConsistentRead=True
+            ).get("Item")
+            was_running = marker is not None and bool(marker["running"])
+            if marker is not None:
+                marker_time = str(marker["event_time"])
+                # On a tie the ended state wins, as an execution cannot restart within
+                # the same second it ended
+                if marker_time > event_time or (
+                    marker_time == event_time and (not was_running or running)
+                ):
+                    logger.info(f"Ignoring stale state change for {sort_key}")
+                    return False
+
+            if self._write_execution_state(
+                sort_key=sort_key,
+                marker=marker,
+                running=running,
+                event_time=event_time,
+                delta=int(running) - int(was_running),
+            ):
+                return True
+        raise Exception(f"Exceeded attempts to record state change for {sort_key}")
+
+    def reconcile(self) -> int:
+        """
+        Realigns execution markers and the counter with the in-progress executions
+        of every AFT customization pipeline, and returns the reconciled count
+        """
+        # Captured before the pipelines are probed, so that markers written by events
+        # during the probe are newer than the corrections and win over them
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        counter = self.table.get_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self.COUNTER_SORT_KEY},
+            ConsistentRead=True,
+        ).get("Item")
+        version = int(str(counter.get("version", 0))) if counter is not None else 0
+        running_executions = get_running_pipeline_executions(
+            self.session, list_pipelines(self.session)
+        )
+        actual = {
+            f"{self.EXECUTION_SORT_KEY_PREFIX}{name}#{execution_id}": (
+                name,
+                execution_id,
+            )
+            for name, execution_id in running_executions.items()
+        }
+        markers = self._query_running_markers()
+        # Each correction recorded changes the running count, so bumps the version
+        for sort_key in markers - actual.keys():
+            pipeline_name, execution_id = sort_key[
+                len(self.EXECUTION_SORT_KEY_PREFIX) :
+            ].split("#", 1)
+            version += self.record_execution_state(
+                pipeline_name, execution_id, False, now
+            )
+        for sort_key in actual.keys() - markers:
+            pipeline_name, execution_id = actual[sort_key]
+            version += self.record_execution_state(
+                pipeline_name, execution_id, True, now
+            )
 
-    return pipeline_counter
+        running_count = len(self._query_running_markers())
+        if self._write_reconciled_count(version, running_count, now):
+            logger.info(f"Reconciled running pipeline count: {running_count}")
+        else:
+            # Events applied since the counter was read keep it in step with the
+            # markers they changed; the next reconcile realigns it
+            logger.info(
+                "Execution markers changed while reconciling, count not written"
+            )
+            running_count = len(self._query_running_markers())
+        return running_count
+
+    def _write_reconciled_count(
+        self, version: int, running_count: int, now: str
+    ) -> bool:
+        # Conditioned on the counter version expected from the reconcile's own
+        # corrections, so that no state change applied by an event is overwritten
+        values: Dict[str, Any] = {
+            ":running": running_count,
+            ":reconciled_at": now,
+            ":one": 1,
+        }
+        if version == 0:
+            condition = "attribute_not_exists(version)"
+        else:
+            condition = "version = :version"
+            values[":version"] = version
+        try:
+            self.table.update_item(
+                Key={"pk": self.PARTITION_KEY, "sk": self.COUNTER_SORT_KEY},
+                UpdateExpression=(
+                    "SET running = :running, reconciled_at = :reconciled_at "
+                    "ADD version :one"
+                ),
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values,
+            )
+            return True
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def _write_execution_state(
+        self,
+        sort_key: str,
+        marker: Optional[Dict[str, Any]],
+        running: bool,
+        event_time: str,
+        delta: int,
+    ) -> bool:
+        item: Dict[str, Any] = {
+            "pk": self.PARTITION_KEY,
+            "sk": sort_key,
+            "running": running,
+            "event_time": event_time,
+        }
+        if not running:
+            item["expires_at"] = int(time.time()) + self.ENDED_MARKER_TTL_SECONDS
+        put: Dict[str, Any] = {
+            "TableName": self.table_name,
+            "Item": {k: self.serializer.serialize(v) for k, v in item.items()},
+        }
+        if marker is None:
+            put["ConditionExpression"] = "attribute_not_exists(sk)"
+        else:
+            put["ConditionExpression"] = (
+                "event_time = :event_time AND running = :running"
+            )
+            put["ExpressionAttributeValues"] = {
+                ":event_time": self.serializer.serialize(marker["event_time"]),
+                ":running": self.serializer.serialize(marker["running"]),
+            }
+
+        transact_items: List[Dict[str, Any]] = [{"Put": put}]
+        if delta:
+            transact_items.append(
+                {
+                    "Update": {
+                        "TableName": self.table_name,
+                        "Key": {
+                            "pk": {"S": self.PARTITION_KEY},
+                            "sk": {"S": self.COUNTER_SORT_KEY},
+                        },
+                        "UpdateExpression": "ADD running :delta, version :one",
+                        "ExpressionAttributeValues": {
+                            ":delta": {"N": str(delta)},
+                            ":one": {"N": "1"},
+                        },
+                    }
+                }
+            )
+        try:
+            self.client.transact_write_items(
+                TransactItems=cast(List[TransactWriteItemTypeDef], transact_items)
+            )
+            return True
+        except self.client.exceptions.TransactionCanceledException:
+            logger.info(f"Concurrent state change for {sort_key}, retrying")
+            return False
+
+    def _query_running_markers(self) -> Set[str]:
+        sort_keys: Set[str] = set()
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.PARTITION_KEY)
+            & Key("sk").begins_with(self.EXECUTION_SORT_KEY_PREFIX),
+            "FilterExpression": Attr("running").eq(True),
+            "ProjectionExpression": "sk",
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            sort_keys.update(str(item["sk"]) for item in response["Items"])
+            if "LastEvaluatedKey" not in response:
+                return sort_keys
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
 
 
 def delete_customization_pipeline(
-    aft_management_session: Session, account_id: str
+    aft_management_session: Session,
+    account_id: str,
+    pipeline_index: Optional[AccountPipelineIndex] = None,
 ) -> None:
     client = aft_management_session.client("codepipeline")
 
-    pipeline_name = get_pipeline_for_account(
-        session=aft_management_session, account_id=account_id
+    pipeline_name, is_running = _get_pipeline_running_state(
+        aft_management_session, account_id, pipeline_index
     )
-    if not pipeline_is_running(session=aft_management_session, name=pipeline_name):
+    if not is_running:
         client.delete_pipeline(name=pipeline_name)
+        if pipeline_index is not None:
+            pipeline_index.remove(account_id)
         logger.info(
             f"Deleted customization pipeline for {utils.sanitize_input_for_logging(account_id)}"
         )
@@ -19,6 +19,7 @@ SSM_PARAM_AFT_SFN_NAME = (
 )
 SSM_PARAM_AFT_DDB_REQ_TABLE = "/aft/resources/ddb/aft-request-table-name"
 SSM_PARAM_AFT_DDB_AUDIT_TABLE = "/aft/resources/ddb/aft-request-audit-table-name"
+SSM_PARAM_AFT_DDB_CACHE_TABLE = "/aft/resources/ddb/aft-cache-table-name"
 SSM_PARAM_AFT_REQUEST_ACTION_TRIGGER_FUNCTION_ARN = (
     "/aft/resources/lambda/aft-account-request-action-trigger-function-arn"
 )
@@ -48,6 +49,22 @@ SSM_PARAM_AFT_ACCOUNT_PROVISIONING_FRAMEWORK_NOTIFY_SUCCESS_FUNCTION_ARN = "/aft
 SSM_PARAM_AFT_MAXIMUM_CONCURRENT_CUSTOMIZATIONS = (
     "/aft/config/customizations/maximum_concurrent_customizations"
 )
+SSM_PARAM_AFT_CUSTOMIZATION_SCHEDULING_POLICY = (
+    "/aft/config/customizations/customization_scheduling_policy"
+)
+SSM_PARAM_AFT_VCS_PROVIDER = "/aft/config/vcs/provider"
+SSM_PARAM_GLOBAL_CUSTOMIZATIONS_REPO_NAME = (
+    "/aft/config/global-customizations/repo-name"
+)
+SSM_PARAM_GLOBAL_CUSTOMIZATIONS_REPO_BRANCH = (
+    "/aft/config/global-customizations/repo-branch"
+)
+SSM_PARAM_ACCOUNT_CUSTOMIZATIONS_REPO_NAME = (
+    "/aft/config/account-customizations/repo-name"
+)
+SSM_PARAM_ACCOUNT_CUSTOMIZATIONS_REPO_BRANCH = (
+    "/aft/config/account-customizations/repo-branch"
+)
 SSM_PARAM_FEATURE_CLOUDTRAIL_DATA_EVENTS_ENABLED = (
     "/aft/config/feature/cloudtrail-data-events-enabled"
 )
@@ -0,0 +1,223 @@
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import hashlib
+import json
+import logging
+import re
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set, Tuple
+
+import aft_common.aft_utils as utils
+from aft_common import ddb
+from aft_common.account_request_framework import get_account_request_record
+from aft_common.codepipeline import AFT_CUSTOMIZATIONS_PIPELINE_NAME_PATTERN
+from aft_common.constants import (
+    SSM_PARAM_ACCOUNT_CUSTOMIZATIONS_REPO_BRANCH,
+    SSM_PARAM_ACCOUNT_CUSTOMIZATIONS_REPO_NAME,
+    SSM_PARAM_AFT_DDB_META_TABLE,
+    SSM_PARAM_AFT_VCS_PROVIDER,
+    SSM_PARAM_GLOBAL_CUSTOMIZATIONS_REPO_BRANCH,
+    SSM_PARAM_GLOBAL_CUSTOMIZATIONS_REPO_NAME,
+)
+from aft_common.ssm import get_ssm_parameter_value
+from boto3.dynamodb.conditions import Attr
+from boto3.session import Session
+
+if TYPE_CHECKING:
+    from mypy_boto3_codecommit import CodeCommitClient
+    from mypy_boto3_dynamodb.service_resource import Table
+else:
+    CodeCommitClient = object
+    Table = object
+
+logger = logging.getLogger("aft")
+
+GLOBAL_CUSTOMIZATIONS_SOURCE = "global_customizations"
+ACCOUNT_CUSTOMIZATIONS_SOURCE = "account_customizations"
+# Output artifacts of the source actions of the customization pipelines
+PIPELINE_SOURCE_ARTIFACTS = {
+    "source-aft-global-customizations": GLOBAL_CUSTOMIZATIONS_SOURCE,
+    "source-aft-account-customizations": ACCOUNT_CUSTOMIZATIONS_SOURCE,
+}
+FINGERPRINT_ATTRIBUTE = "customizations_fingerprint"
+
+
+class CustomizationFingerprinter:
+    """
+    Fingerprints the inputs of an account's customization pipeline: the global
+    customizations revision, the revision of the account's customizations and its
+    account request record, custom fields included. The fingerprint of each
+    successful run is stored in the AFT request metadata table, so that runs with
+    unchanged inputs can be skipped.
+
+    On CodeCommit the account's customizations are identified by the tree ID of
+    its account_customizations_name folder, which only changes when that folder
+    does, and branch heads are resolved directly. Other providers expose no head
+    revision to AFT, so their commits must be supplied by the caller.
+    """
+
+    def __init__(self, aft_management_session: Session) -> None:
+        self.session = aft_management_session
+        self.vcs_provider = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_VCS_PROVIDER
+        ).lower()
+        self.metadata_table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_META_TABLE
+        )
+        self.metadata_table: Table = aft_management_session.resource("dynamodb").Table(
+            self.metadata_table_name
+        )
+        self._folder_revisions: Dict[Tuple[str, str], str] = {}
+
+    @property
+    def is_codecommit(self) -> bool:
+        return self.vcs_provider == "codecommit"
+
+    @cached_property
+    def codecommit_client(self) -> CodeCommitClient:
+        return self.session.client("codecommit")
+
+    def get_head_revisions(
+        self, source_revisions: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Returns the commits to customize from, preferring those supplied. Returns
+        None if they cannot be resolved for the configured VCS provider
+        """
+        if source_revisions:
+            return dict(source_revisions)
+        if not self.is_codecommit:
+            return None
+        revisions: Dict[str, str] = {}
+        for source, repo_param, branch_param in (
+            (
+                GLOBAL_CUSTOMIZATIONS_SOURCE,
+                SSM_PARAM_GLOBAL_CUSTOMIZATIONS_REPO_NAME,
+                SSM_PARAM_GLOBAL_CUSTOMIZATIONS_REPO_BRANCH,
+            ),
+            (
+                ACCOUNT_CUSTOMIZATIONS_SOURCE,
+                SSM_PARAM_ACCOUNT_CUSTOMIZATIONS_REPO_NAME,
+                SSM_PARAM_ACCOUNT_CUSTOMIZATIONS_REPO_BRANCH,
+            ),
+        ):
+            response = self.codecommit_client.get_branch(
+                repositoryName=get_ssm_parameter_value(self.session, repo_param),
+                branchName=get_ssm_parameter_value(self.session, branch_param),
+            )
+            revisions[source] = response["branch"]["commitId"]
+        return revisions
+
+    def compute(
+        self, revisions: Dict[str, str], account_request: Dict[str, Any]
+    ) -> str:
+        inputs = {
+            GLOBAL_CUSTOMIZATIONS_SOURCE: revisions[GLOBAL_CUSTOMIZATIONS_SOURCE],
+            ACCOUNT_CUSTOMIZATIONS_SOURCE: self._get_account_customizations_revision(
+                commit_id=revisions[ACCOUNT_CUSTOMIZATIONS_SOURCE],
+                folder=str(account_request.get("account_customizations_name") or ""),
+            ),
+            "account_request": account_request,
+        }
+        return hashlib.sha256(
+            json.dumps(inputs, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def get_unchanged_accounts(
+        self, account_requests: Dict[str, Dict[str, Any]], revisions: Dict[str, str]
+    ) -> Set[str]:
+        """
+        Returns the accounts, among those of account_requests keyed by account ID,
+        whose fingerprint matches that of their last successful run
+        """
+        items = ddb.batch_get_ddb_items(
+            session=self.session,
+            table_name=self.metadata_table_name,
+            primary_keys=[{"id": account_id} for account_id in account_requests],
+            projection_expression=f"id, {FINGERPRINT_ATTRIBUTE}",
+        )
+        recorded = {
+            str(item["id"]): str(item[FINGERPRINT_ATTRIBUTE])
+            for item in items
+            if FINGERPRINT_ATTRIBUTE in item
+        }
+        return {
+            account_id
+            for account_id, account_request in account_requests.items()
+            if account_id in recorded
+            and recorded[account_id] == self.compute(revisions, account_request)
+        }
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """
+        Records the fingerprint of a successful run from a CodePipeline Pipeline
+        Execution State Change event
+        """
+        detail = event["detail"]
+        if detail["state"] != "SUCCEEDED" or not re.match(
+            AFT_CUSTOMIZATIONS_PIPELINE_NAME_PATTERN, detail["pipeline"]
+        ):
+            return
+        self.record_execution(detail["pipeline"], detail["execution-id"])
+
+    def record_execution(self, pipeline_name: str, execution_id: str) -> None:
+        client = self.session.client(
+            "codepipeline", config=utils.get_high_retry_botoconfig()
+        )
+        execution = client.get_pipeline_execution(
+            pipelineName=pipeline_name, pipelineExecutionId=execution_id
+        )["pipelineExecution"]
+        revisions = {
+            PIPELINE_SOURCE_ARTIFACTS[revision["name"]]: revision["revisionId"]
+            for revision in execution.get("artifactRevisions", [])
+            if revision.get("name") in PIPELINE_SOURCE_ARTIFACTS
+            and "revisionId" in revision
+        }
+        if len(revisions) != len(PIPELINE_SOURCE_ARTIFACTS):
+            logger.info(f"Source revisions of {pipeline_name} are unknown")
+            return
+
+        account_id = pipeline_name.split("-", 1)[0]
+        metadata = ddb.get_ddb_item(
+            session=self.session,
+            table_name=self.metadata_table_name,
+            primary_key={"id": account_id},
+        )
+        if metadata is None:
+            logger.info(f"Account {account_id} has no AFT metadata")
+            return
+        account_request = get_account_request_record(
+            self.session, str(metadata["email"])
+        )
+        self.record(account_id, self.compute(revisions, account_request))
+
+    def record(self, account_id: str, fingerprint: str) -> None:
+        try:
+            self.metadata_table.update_item(
+                Key={"id": account_id},
+                UpdateExpression=f"SET {FINGERPRINT_ATTRIBUTE} = :fingerprint",
+                ConditionExpression=Attr("id").exists(),
+                ExpressionAttributeValues={":fingerprint": fingerprint},
+            )
+        except (
+            self.metadata_table.meta.client.exceptions.ConditionalCheckFailedException
+        ):
+            logger.info(f"Account {account_id} has no AFT metadata")
+
+    def _get_account_customizations_revision(self, commit_id: str, folder: str) -> str:
+        if not self.is_codecommit or not folder:
+            return commit_id
+        key = (commit_id, folder)
+        if key not in self._folder_revisions:
+            try:
+                self._folder_revisions[key] = self.codecommit_client.get_folder(
+                    repositoryName=get_ssm_parameter_value(
+                        self.session, SSM_PARAM_ACCOUNT_CUSTOMIZATIONS_REPO_NAME
+                    ),
+                    commitSpecifier=commit_id,
+                    folderPath=folder,
+                )["treeId"]
+            except self.codecommit_client.exceptions.FolderDoesNotExistException:
+                self._folder_revisions[key] = ""
+        return self._folder_revisions[key]
@@ -0,0 +1,603 @@
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import logging
+import random
+import re
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, cast
+
+from aft_common.aft_types import PipelineLaunchResult
+from aft_common.codepipeline import (
+    AFT_CUSTOMIZATIONS_PIPELINE_NAME_PATTERN,
+    AccountPipelineIndex,
+    RunningPipelineCounter,
+    execute_pipelines,
+)
+from aft_common.constants import (
+    SSM_PARAM_AFT_DDB_CACHE_TABLE,
+    SSM_PARAM_AFT_MAXIMUM_CONCURRENT_CUSTOMIZATIONS,
+)
+from aft_common.ssm import get_ssm_parameter_value
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeSerializer
+from boto3.session import Session
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+    from mypy_boto3_dynamodb.service_resource import Table
+    from mypy_boto3_dynamodb.type_defs import TransactWriteItemTypeDef
+    from mypy_boto3_stepfunctions import SFNClient
+else:
+    DynamoDBClient = object
+    Table = object
+    TransactWriteItemTypeDef = object
+    SFNClient = object
+
+logger = logging.getLogger("aft")
+
+SCHEDULING_POLICY_LIST_ORDER = "list_order"
+SCHEDULING_POLICY_LONGEST_FIRST = "longest_first"
+SCHEDULING_POLICY_SHORTEST_FIRST = "shortest_first"
+EVENT_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class CustomizationScheduler:
+    """
+    Global customization concurrency control based on leases held in the AFT cache
+    table. Accounts to customize are queued, and each launched pipeline holds one of
+    maximum_concurrent_customizations lease slots until its execution ends.
+
+    Slots are acquired with conditional writes, so any number of dispatchers can
+    run concurrently. The pipeline execution state change handler releases the
+    lease of each ended execution and dispatches the next queued accounts right
+    away. Leases expire so that slots held by lost events or failed launches are
+    eventually reclaimed.
+
+    Queued accounts do not expire, as a full rollout can stay queued for days.
+    The accounts of a state machine execution that ended before they were launched,
+    aborted or failed, are purged when dispatchers find them at the queue head.
+    """
+
+    QUEUE_PARTITION_KEY = "customization-queue"
+    LEASE_PARTITION_KEY = "customization-leases"
+    LEASE_SORT_KEY_PREFIX = "slot#"
+    FAILURE_PARTITION_KEY = "customization-failures"
+    TERMINAL_STATES = {"SUCCEEDED", "FAILED", "STOPPED", "SUPERSEDED", "CANCELED"}
+    LAUNCHED_STATUSES = {"started", "already_running"}
+    DEFAULT_LEASE_SECONDS = 4 * 3600
+    CLAIM_CANDIDATES = 10
+    CLAIM_MAX_ATTEMPTS = 20
+    CLAIM_MAX_SLEEP_SEC = 1.0
+
+    def __init__(
+        self,
+        aft_management_session: Session,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+    ) -> None:
+        self.session = aft_management_session
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+        self.client: DynamoDBClient = aft_management_session.client("dynamodb")
+        self.serializer = TypeSerializer()
+        self.lease_seconds = lease_seconds
+        self.pipeline_index = AccountPipelineIndex(aft_management_session)
+        self.counter = RunningPipelineCounter(aft_management_session)
+        self.sfn_client: SFNClient = aft_management_session.client("stepfunctions")
+        self._execution_statuses: Dict[str, str] = {}
+
+    def enqueue(
+        self,
+        account_ids: List[str],
+        execution_id: str,
+        execution_arn: Optional[str] = None,
+    ) -> None:
+        """
+        Queues accounts for customization on behalf of a state machine execution.
+        With the execution ARN, accounts are purged once the execution has ended
+        """
+        enqueued_at = time.time_ns()
+        with self.table.batch_writer() as batch:
+            for position, account_id in enumerate(account_ids):
+                item = {
+                    "pk": self.QUEUE_PARTITION_KEY,
+                    "sk": f"{enqueued_at:020d}#{position:06d}#{account_id}",
+                    "account_id": account_id,
+                    "execution_id": execution_id,
+                }
+                if execution_arn is not None:
+                    item["execution_arn"] = execution_arn
+                batch.put_item(Item=item)
+        logger.info(f"Queued {len(account_ids)} accounts for customization")
+
+    def dispatch(self) -> Dict[str, PipelineLaunchResult]:
+        """
+        Launches the pipelines of queued accounts while lease slots are free, and
+        returns the launch result of each dispatched account
+        """
+        if not self._peek_queue():
+            return {}
+        maximum_concurrency = int(
+            get_ssm_parameter_value(
+                self.session, SSM_PARAM_AFT_MAXIMUM_CONCURRENT_CUSTOMIZATIONS
+            )
+        )
+        # Pipelines started outside of the scheduler count against the limit too
+        running_count = self.counter.get_running_count()
+        budget = maximum_concurrency
+        if running_count is not None:
+            budget = max(maximum_concurrency - running_count, 0)
+
+        claims: List[Tuple[str, str, Dict[str, Any]]] = []
+        for slot in self._get_free_slots(maximum_concurrency):
+            if len(claims) >= budget:
+                break
+            lease_id = self._acquire_slot(slot)
+            if lease_id is None:
+                continue
+            queued_item = self._claim_next(slot, lease_id)
+            if queued_item is None:
+                self._release_slot(slot, lease_id)
+                break
+            claims.append((slot, lease_id, queued_item))
+        if not claims:
+            return {}
+
+        launch_results = execute_pipelines(
+            self.session,
+            account_ids=[str(item["account_id"]) for _, _, item in claims],
+            pipeline_index=self.pipeline_index,
+        )
+        for slot, lease_id, queued_item in claims:
+            result = launch_results[str(queued_item["account_id"])]
+            if result["status"] in self.LAUNCHED_STATUSES:
+                self._bind_lease(slot, lease_id, result)
+            else:
+                # The queued item was deleted by the claim, so the account is recorded
+                # as failed before its lease stops counting as outstanding
+                self._record_failures([queued_item])
+                self._release_slot(slot, lease_id)
+        return launch_results
+
+    def release(self, pipeline_name: str, pipeline_execution_id: str) -> bool:
+        """Releases the leases held by a pipeline execution"""
+        return self._release_leases(
+            self._get_execution_leases(pipeline_name, pipeline_execution_id)
+        )
+
+    def apply_event(self, event: Dict[str, Any]) -> Dict[str, PipelineLaunchResult]:
+        """
+        Releases the lease of an ended pipeline execution from a CodePipeline Pipeline
+        Execution State Change event, then dispatches queued accounts
+        """
+        detail = event["detail"]
+        if detail["state"] not in self.TERMINAL_STATES:
+            return {}
+        leases = self._get_execution_leases(detail["pipeline"], detail["execution-id"])
+        # Failures are recorded before the lease is released, so they are visible
+        # once the state machine execution no longer has outstanding accounts
+        if detail["state"] != "SUCCEEDED":
+            self._record_failures(leases)
+        self._release_leases(leases)
+        # Dispatch even when no lease was released, as the ended execution may have
+        # been holding back launches through the running pipeline count
+        return self.dispatch()
+
+    def get_outstanding_count(self, execution_id: str) -> int:
+        """
+        Returns the number of accounts of a state machine execution that are queued
+        or have a pipeline holding a lease
+        """
+        outstanding = sum(
+            1
+            for lease in self._query_leases()
+            if lease.get("execution_id") == execution_id
+        )
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.QUEUE_PARTITION_KEY),
+            "FilterExpression": Attr("execution_id").eq(execution_id),
+            "Select": "COUNT",
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            outstanding += response["Count"]
+            if "LastEvaluatedKey" not in response:
+                return outstanding
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def get_failed_accounts(self, execution_id: str) -> Set[str]:
+        """
+        Returns the accounts of a state machine execution whose pipeline execution
+        did not succeed
+        """
+        item = self.table.get_item(
+            Key={"pk": self.FAILURE_PARTITION_KEY, "sk": execution_id},
+            ConsistentRead=True,
+        ).get("Item")
+        if item is None:
+            return set()
+        return {str(account_id) for account_id in cast(Set[Any], item["account_ids"])}
+
+    def clear_failed_accounts(self, execution_id: str) -> None:
+        self.table.delete_item(
+            Key={"pk": self.FAILURE_PARTITION_KEY, "sk": execution_id}
+        )
+
+    def _get_execution_leases(
+        self, pipeline_name: str, pipeline_execution_id: str
+    ) -> List[Dict[str, Any]]:
+        return [
+            lease
+            for lease in self._query_leases()
+            if lease.get("pipeline_name") == pipeline_name
+            and lease.get("pipeline_execution_id") == pipeline_execution_id
+        ]
+
+    def _release_leases(self, leases: List[Dict[str, Any]]) -> bool:
+        released = False
+        for lease in leases:
+            if self._release_slot(str(lease["sk"]), str(lease["lease_id"])):
+                released = True
+                logger.info(
+                    f"Released lease of {lease['pipeline_name']} #{lease['pipeline_execution_id']}"
+                )
+        return released
+
+    def _record_failures(self, items: List[Dict[str, Any]]) -> None:
+        # Items are leases or claimed queued items, both naming execution and account
+        for item in items:
+            if "execution_id" not in item or "account_id" not in item:
+                continue
+            self.table.update_item(
+                Key={
+                    "pk": self.FAILURE_PARTITION_KEY,
+                    "sk": str(item["execution_id"]),
+                },
+                UpdateExpression="ADD account_ids :account_ids",
+                ExpressionAttributeValues={":account_ids": {str(item["account_id"])}},
+            )
+
+    def _peek_queue(self) -> List[Dict[str, Any]]:
+        while True:
+            response = self.table.query(
+                KeyConditionExpression=Key("pk").eq(self.QUEUE_PARTITION_KEY),
+                Limit=self.CLAIM_CANDIDATES,
+                ConsistentRead=True,
+            )
+            ended_execution_ids = {
+                str(item["execution_id"])
+                for item in response["Items"]
+                if not self._execution_is_running(item)
+            }
+            if not ended_execution_ids:
+                return response["Items"]
+            for execution_id in ended_execution_ids:
+                self._purge_execution(execution_id)
+
+    def _execution_is_running(self, queued_item: Dict[str, Any]) -> bool:
+        if "execution_arn" not in queued_item:
+            return True
+        execution_arn = str(queued_item["execution_arn"])
+        if execution_arn not in self._execution_statuses:
+            try:
+                self._execution_statuses[execution_arn] = (
+                    self.sfn_client.describe_execution(executionArn=execution_arn)[
+                        "status"
+                    ]
+                )
+            except self.sfn_client.exceptions.ExecutionDoesNotExist:
+                self._execution_statuses[execution_arn] = "DOES_NOT_EXIST"
+        return self._execution_statuses[execution_arn] == "RUNNING"
+
+    def _purge_execution(self, execution_id: str) -> None:
+        """Removes the queued accounts of a state machine execution that has ended"""
+        purged = 0
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.QUEUE_PARTITION_KEY),
+            "FilterExpression": Attr("execution_id").eq(execution_id),
+            "ProjectionExpression": "pk, sk",
+            "ConsistentRead": True,
+        }
+        with self.table.batch_writer() as batch:
+            while True:
+                response = self.table.query(**kwargs)
+                for item in response["Items"]:
+                    batch.delete_item(Key={"pk": item["pk"], "sk": item["sk"]})
+                    purged += 1
+                if "LastEvaluatedKey" not in response:
+                    break
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        self.clear_failed_accounts(execution_id)
+        logger.info(
+            f"Purged {purged} queued accounts of ended execution {execution_id}"
+        )
+
+    def _claim_next(self, slot: str, lease_id: str) -> Optional[Dict[str, Any]]:
+        # A queued item is claimed by deleting it and assigning it to the lease in one
+        # transaction, so concurrent dispatchers never launch the same queued account
+        # twice and the account is counted as outstanding throughout. Attempts are
+        # bounded, so that the caller releases the lease rather than holding it while
+        # contending with other dispatchers
+        attempts = 0
+        retry_sleep_sec = 0.05
+        while attempts < self.CLAIM_MAX_ATTEMPTS:
+            candidates = self._peek_queue()
+            if not candidates:
+                return None
+            for candidate in candidates:
+                if attempts >= self.CLAIM_MAX_ATTEMPTS:
+                    break
+                attempts += 1
+                transact_items: List[Dict[str, Any]] = [
+                    {
+                        "Delete": {
+                            "TableName": self.table_name,
+                            "Key": {
+                                "pk": {"S": self.QUEUE_PARTITION_KEY},
+                                "sk": {"S": str(candidate["sk"])},
+                            },
+                            "ConditionExpression": "attribute_exists(sk)",
+                        }
+                    },
+                    {
+                        "Update": {
+                            "TableName": self.table_name,
+                            "Key": {
+                                "pk": {"S": self.LEASE_PARTITION_KEY},
+                                "sk": {"S": slot},
+                            },
+                            "UpdateExpression": (
+                                "SET account_id = :account_id, "
+                                "execution_id = :execution_id"
+                            ),
+                            "ConditionExpression": "lease_id = :lease_id",
+                            "ExpressionAttributeValues": {
+                                ":account_id": self.serializer.serialize(
+                                    candidate["account_id"]
+                                ),
+                                ":execution_id": self.serializer.serialize(
+                                    candidate["execution_id"]
+                                ),
+                                ":lease_id": {"S": lease_id},
+                            },
+                        }
+                    },
+                ]
+                try:
+                    self.client.transact_write_items(
+                        TransactItems=cast(
+                            List[TransactWriteItemTypeDef], transact_items
+                        )
+                    )
+                    return candidate
+                except self.client.exceptions.TransactionCanceledException as error:
+                    codes = [
+                        reason.get("Code")
+                        for reason in error.response.get("CancellationReasons", [])
+                    ]
+                    if len(codes) > 1 and codes[1] == "ConditionalCheckFailed":
+                        logger.info(f"Lease {slot} expired before it was assigned")
+                        return None
+                    if len(codes) > 0 and codes[0] == "ConditionalCheckFailed":
+                        # Claimed by another dispatcher, try the next candidate
+                        continue
+                    # Conflicting transactions or throttling, back off and re-peek
+                    if attempts >= self.CLAIM_MAX_ATTEMPTS:
+                        break
+                    logger.info(
+                        f"Claim for lease {slot} cancelled ({codes}), retrying in {retry_sleep_sec:.2f} seconds"
+                    )
+                    time.sleep(retry_sleep_sec + random.random() * retry_sleep_sec)
+                    retry_sleep_sec = min(retry_sleep_sec * 2, self.CLAIM_MAX_SLEEP_SEC)
+                    break
+        logger.warning(
+            f"Gave up claiming a queued account for lease {slot} after {attempts} attempts"
+        )
+        return None
+
+    def _query_leases(self) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.LEASE_PARTITION_KEY),
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            items.extend(response["Items"])
+            if "LastEvaluatedKey" not in response:
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def _get_free_slots(self, maximum_concurrency: int) -> List[str]:
+        now = int(time.time())
+        held = {
+            str(lease["sk"])
+            for lease in self._query_leases()
+            if int(str(lease["expires_at"])) >= now
+        }
+        slots = [
+            f"{self.LEASE_SORT_KEY_PREFIX}{n:04d}" for n in range(maximum_concurrency)
+        ]
+        return [slot for slot in slots if slot not in held]
+
+    def _acquire_slot(self, slot: str) -> Optional[str]:
+        lease_id = str(uuid.uuid4())
+        now = int(time.time())
+        try:
+            response = self.table.put_item(
+                Item={
+                    "pk": self.LEASE_PARTITION_KEY,
+                    "sk": slot,
+                    "lease_id": lease_id,
+                    "expires_at": now + self.lease_seconds,
+                },
+                ConditionExpression=Attr("sk").not_exists()
+                | Attr("expires_at").lt(now),
+                ReturnValues="ALL_OLD",
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return None
+        # The outcome of the account of a reclaimed lease is unknown, so it is
+        # recorded as failed and its baseline is not advanced
+        expired_lease = response.get("Attributes")
+        if expired_lease is not None:
+            self._record_failures([expired_lease])
+        return lease_id
+
+    def _bind_lease(
+        self,
+        slot: str,
+        lease_id: str,
+        result: PipelineLaunchResult,
+    ) -> None:
+        try:
+            self.table.update_item(
+                Key={"pk": self.LEASE_PARTITION_KEY, "sk": slot},
+                UpdateExpression=(
+                    "SET pipeline_name = :pipeline_name, "
+                    "pipeline_execution_id = :pipeline_execution_id"
+                ),
+                ConditionExpression=Attr("lease_id").eq(lease_id),
+                ExpressionAttributeValues={
+                    ":pipeline_name": result["pipeline_name"],
+                    ":pipeline_execution_id": result["execution_id"],
+                },
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            logger.warning(
+                f"Lease {slot} expired before pipeline {result['pipeline_name']} "
+                "was launched"
+            )
+
+    def _release_slot(self, slot: str, lease_id: str) -> bool:
+        try:
+            self.table.delete_item(
+                Key={"pk": self.LEASE_PARTITION_KEY, "sk": slot},
+                ConditionExpression=Attr("lease_id").eq(lease_id),
+            )
+            return True
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+
+class PipelineDurationHistory:
+    """
+    Durations of the recent successful customization pipeline executions of each
+    account, recorded in the AFT cache table from CodePipeline execution state
+    change events and used to estimate how long the next run of an account takes.
+    """
+
+    PARTITION_KEY = "pipeline-durations"
+    ACCOUNT_SORT_KEY_PREFIX = "account#"
+    MAX_SAMPLES = 5
+
+    def __init__(self, aft_management_session: Session) -> None:
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """Applies a CodePipeline Pipeline Execution State Change event"""
+        detail = event["detail"]
+        pipeline_name = detail["pipeline"]
+        if not re.match(AFT_CUSTOMIZATIONS_PIPELINE_NAME_PATTERN, pipeline_name):
+            return
+        key = {
+            "pk": self.PARTITION_KEY,
+            "sk": f"{self.ACCOUNT_SORT_KEY_PREFIX}{pipeline_name.split('-', 1)[0]}",
+        }
+        if detail["state"] == "STARTED":
+            self.table.update_item(
+                Key=key,
+                UpdateExpression="SET started_execution_id = :id, started_at = :time",
+                ExpressionAttributeValues={
+                    ":id": detail["execution-id"],
+                    ":time": event["time"],
+                },
+            )
+        elif detail["state"] == "SUCCEEDED":
+            self._record_duration(key, detail["execution-id"], event["time"])
+
+    def get_estimates(self) -> Dict[str, float]:
+        """Returns the estimated pipeline duration in seconds of each known account"""
+        estimates: Dict[str, float] = {}
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.PARTITION_KEY),
+            "ProjectionExpression": "sk, durations",
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            for item in response["Items"]:
+                durations = [
+                    float(str(d)) for d in cast(List[Any], item.get("durations", []))
+                ]
+                if durations:
+                    account_id = str(item["sk"])[len(self.ACCOUNT_SORT_KEY_PREFIX) :]
+                    estimates[account_id] = statistics.median(durations)
+            if "LastEvaluatedKey" not in response:
+                return estimates
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def _record_duration(
+        self, key: Dict[str, str], execution_id: str, event_time: str
+    ) -> None:
+        item = self.table.get_item(Key=key, ConsistentRead=True).get("Item")
+        if item is None or item.get("started_execution_id") != execution_id:
+            # The start of this execution was not recorded
+            return
+        duration = int(
+            (
+                datetime.strptime(event_time, EVENT_TIME_FORMAT)
+                - datetime.strptime(str(item["started_at"]), EVENT_TIME_FORMAT)
+            ).total_seconds()
+        )
+        durations = [int(str(d)) for d in cast(List[Any], item.get("durations", []))]
+        durations = (durations + [duration])[-self.MAX_SAMPLES :]
+        try:
+            self.table.update_item(
+                Key=key,
+                UpdateExpression=(
+                    "SET durations = :durations "
+                    "REMOVE started_execution_id, started_at"
+                ),
+                ConditionExpression=Attr("started_execution_id").eq(execution_id),
+                ExpressionAttributeValues={":durations": durations},
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            logger.info(f"Duration of {key['sk']} #{execution_id} already recorded")
+
+
+def order_accounts(
+    account_ids: List[str], estimates: Dict[str, float], policy: str
+) -> List[str]:
+    """
+    Orders accounts for customization according to a scheduling policy. Accounts
+    without duration history are estimated at the mean of the known durations, and
+    accounts with equal estimates keep their list order.
+    """
+    if policy == SCHEDULING_POLICY_LIST_ORDER:
+        return list(account_ids)
+    if policy not in (
+        SCHEDULING_POLICY_LONGEST_FIRST,
+        SCHEDULING_POLICY_SHORTEST_FIRST,
+    ):
+        raise ValueError(f"Unsupported customization scheduling policy: {policy}")
+
+    known = [estimates[a] for a in account_ids if a in estimates]
+    default_estimate = statistics.mean(known) if known else 0.0
+    return sorted(
+        account_ids,
+        key=lambda account_id: estimates.get(account_id, default_estimate),
+        reverse=policy == SCHEDULING_POLICY_LONGEST_FIRST,
+    )
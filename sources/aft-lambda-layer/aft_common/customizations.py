@@ -3,100 +3,113 @@
 #
 import json
 import logging
-import os
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set
 
-import jsonschema
-from aft_common.aft_utils import get_high_retry_botoconfig, sanitize_input_for_logging
+from aft_common.account_id_manifest import AftAccountIdManifest
+from aft_common.aft_types import AccountState
+from aft_common.aft_utils import sanitize_input_for_logging
 from aft_common.constants import (
     SSM_PARAM_AFT_CODEPIPELINE_CUSTOMIZATIONS_BUCKET_ID,
     SSM_PARAM_AFT_DDB_META_TABLE,
 )
-from aft_common.organizations import OrganizationsAgent
-from aft_common.s3 import put_target_account_info
+from aft_common.ddb import parallel_scan_ddb_table
+from aft_common.organizations import OrganizationChangeSet, OrganizationsAgent
+from aft_common.organizations_cache import OrganizationBaselineStore
+from aft_common.s3 import put_json_lines_chunks, put_target_account_info_manifest
 from aft_common.ssm import get_ssm_parameter_value
+from aft_common.validation import IDENTIFY_TARGETS_REQUEST_SCHEMA, validate_event
 from boto3.session import Session
 
 if TYPE_CHECKING:
     from aft_common.aft_types import AftInvokeAccountCustomizationPayload
-    from mypy_boto3_organizations import OrganizationsClient
+    from mypy_boto3_s3 import S3Client
 else:
-    OrganizationsClient = object
     AftInvokeAccountCustomizationPayload = object
+    S3Client = object
 
 AFT_SHARED_ACCOUNT_NAMES = ["ct-management", "log-archive", "audit"]
+AFT_METADATA_SCAN_SEGMENTS = 4
+TARGET_ACCOUNT_INFO_CHUNK_SIZE = 500
 
 logger = logging.getLogger("aft")
 
 
 def validate_identify_targets_request(payload: Dict[str, Any]) -> bool:
-    logger.info("Function Start - validate_identify_targets_request")
-    schema_path = os.path.join(
-        os.path.dirname(__file__), "schemas/identify_targets_request_schema.json"
-    )
-    with open(schema_path) as schema_file:
-        schema_object = json.load(schema_file)
-    logger.info(
-        "Schema Loaded:" + sanitize_input_for_logging(json.dumps(schema_object))
-    )
-    validated = jsonschema.validate(payload, schema_object)
-    if validated is None:
-        logger.info("Request Validated")
-        return True
-    else:
-        raise Exception("Failure validating request.\n{validated}")
+    validate_event(IDENTIFY_TARGETS_REQUEST_SCHEMA, payload)
+    logger.info("Request Validated")
+    return True
 
 
-def get_all_aft_account_ids(aft_management_session: Session) -> List[str]:
+def get_all_aft_account_ids(
+    aft_management_session: Session, use_manifest: bool = False
+) -> List[str]:
+    """
+    Returns the IDs of every account in the AFT request metadata table, read from
+    the AftAccountIdManifest when use_manifest is set and from a parallel scan
+    otherwise. A missing or expired manifest is rebuilt from the scan.
+    """
+    manifest: Optional[AftAccountIdManifest] = None
+    if use_manifest:
+        manifest = AftAccountIdManifest(aft_management_session)
+        manifest_account_ids = manifest.get_account_ids()
+        if manifest_account_ids:
+            logger.info("Read AFT account IDs from manifest")
+            return manifest_account_ids
+
     table_name = get_ssm_parameter_value(
         aft_management_session, SSM_PARAM_AFT_DDB_META_TABLE
     )
-    dynamodb = aft_management_session.resource("dynamodb")
-    table = dynamodb.Table(table_name)
-    logger.info("Scanning DynamoDB table: " + table_name)
-
-    items: List[Dict[str, Any]] = []
-    response = table.scan(ProjectionExpression="id", ConsistentRead=True)
-    items.extend(response["Items"])
-    while "LastEvaluatedKey" in response:
-        logger.debug(
-            "Paginated response found, continuing at {}".format(
-                sanitize_input_for_logging(response["LastEvaluatedKey"])
-            )
-        )
-        response = table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-        items.extend(response["Items"])
-
-    aft_account_ids = [item["id"] for item in items]
+    items = parallel_scan_ddb_table(
+        session=aft_management_session,
+        table_name=table_name,
+        projection_expression="id",
+        total_segments=AFT_METADATA_SCAN_SEGMENTS,
+    )
+    aft_account_ids = [str(item["id"]) for item in items]
 
     if not aft_account_ids:
         raise Exception("No accounts found in the Account Metadata table")
 
+    if manifest is not None:
+        manifest.rebuild(account_ids=aft_account_ids)
     return aft_account_ids
 
 
 def filter_non_aft_accounts(
-    session: Session, account_list: List[str], operation: str = "include"
+    session: Session,
+    account_list: List[str],
+    operation: str = "include",
+    aft_account_ids: Optional[List[str]] = None,
+    core_account_ids: Optional[List[str]] = None,
 ) -> List[str]:
-    aft_accounts = get_all_aft_account_ids(session)
-    core_accounts = get_core_accounts(session)
+    if aft_account_ids is None:
+        aft_account_ids = get_all_aft_account_ids(session)
+    if core_account_ids is None:
+        core_account_ids = get_core_accounts(session)
     logger.info("Running AFT Filter for accounts " + str(account_list))
-    filtered_accounts = []
-    for a in account_list:
-        logger.info("Evaluating account " + a)
-        if a not in aft_accounts:
-            if operation == "include":
-                if a not in core_accounts:
-                    logger.info("Account " + a + " is being filtered.")
-                    filtered_accounts.append(a)
-                else:
-                    logger.info("Account " + a + " is NOT being filtered.")
-        else:
-            logger.info("Account " + a + " is NOT being filtered.")
-    for a in filtered_accounts:
-        if a in account_list:
-            account_list.remove(a)
-    return account_list
+    return filter_account_ids(
+        account_ids=account_list,
+        aft_account_ids=set(aft_account_ids),
+        core_account_ids=set(core_account_ids),
+        operation=operation,
+    )
+
+
+def filter_account_ids(
+    account_ids: List[str],
+    aft_account_ids: Set[str],
+    core_account_ids: Set[str],
+    operation: str = "include",
+) -> List[str]:
+    # Only included accounts are filtered, excluding a non-AFT account is harmless
+    if operation != "include":
+        return list(account_ids)
+    filtered_accounts = [
+        a for a in account_ids if a not in aft_account_ids and a not in core_account_ids
+    ]
+    if filtered_accounts:
+        logger.info(f"Accounts being filtered: {filtered_accounts}")
+    return [a for a in account_ids if a in aft_account_ids or a in core_account_ids]
 
 
 def get_core_accounts(aft_management_session: Session) -> List[str]:
@@ -114,38 +127,26 @@ def get_core_accounts(aft_management_session: Session) -> List[str]:
 
 # TODO: Refactor to method of OrganizationsAgent
 def get_accounts_by_tags(
-    aft_mgmt_session: Session, ct_mgmt_session: Session, tags: List[Dict[str, str]]
+    aft_mgmt_session: Session,
+    ct_mgmt_session: Session,
+    tags: List[Dict[str, str]],
+    orgs_agent: Optional[OrganizationsAgent] = None,
+    aft_account_ids: Optional[List[str]] = None,
 ) -> Optional[List[str]]:
     logger.info("Getting Account with tags - " + str(tags))
     # Get all AFT Managed Accounts
-    all_accounts = get_all_aft_account_ids(aft_mgmt_session)
-    matched_accounts = []
-    client: OrganizationsClient = ct_mgmt_session.client(
-        "organizations", config=get_high_retry_botoconfig()
-    )
-    # Loop through AFT accounts, requesting tags
+    all_accounts = aft_account_ids
     if all_accounts is None:
-        return None
+        all_accounts = get_all_aft_account_ids(aft_mgmt_session)
 
-    for a in all_accounts:
-        account_tags = {}
-        response = client.list_tags_for_resource(ResourceId=a)
-        # Format tags as a dictionary rather than a list
-        for t in response["Tags"]:
-            account_tags[t["Key"]] = t["Value"]
-        logger.info("Account tags for " + a + ": " + str(account_tags))
-        counter = 0
-        # Loop through tag filter. Append account to matched_accounts if all tags in filter match/ are present
-        for x in tags:
-            for k, v in x.items():
-                if k in account_tags.keys():
-                    if account_tags[k] == v:
-                        counter += 1
-                        if counter == len(tags):
-                            logger.info(
-                                "Account " + a + " MATCHED with tags " + str(tags)
-                            )
-                            matched_accounts.append(a)
+    if orgs_agent is None:
+        orgs_agent = OrganizationsAgent(ct_mgmt_session)
+    tag_index = orgs_agent.get_account_tag_index(account_ids=all_accounts)
+
+    # An account matches when all tags in the filter are present with matching values
+    matched_accounts = sorted(
+        tag_index.get_account_ids(tags=tags).intersection(all_accounts)
+    )
     logger.info(matched_accounts)
     if len(matched_accounts) > 0:
         return matched_accounts
@@ -153,45 +154,248 @@ def get_accounts_by_tags(
         return None
 
 
-def get_included_accounts(
+def get_account_changes(
     aft_management_session: Session,
-    ct_mgmt_session: Session,
     orgs_agent: OrganizationsAgent,
-    included: List[Dict[str, Any]],
-) -> List[str]:
-    all_aft_accounts = get_all_aft_account_ids(aft_management_session)
-    logger.info("All AFT accounts: " + str(all_aft_accounts))
-    included_accounts = []
-    for d in included:
-        if d["type"] == "all":
-            if all_aft_accounts is not None:
-                included_accounts.extend(all_aft_accounts)
-        if d["type"] == "core":
-            core_accounts = get_core_accounts(aft_management_session)
-            included_accounts.extend(core_accounts)
-        if d["type"] == "ous":
-            included_accounts.extend(
-                orgs_agent.get_account_ids_in_ous(ou_names=d["target_value"])
+    baseline_name: str = OrganizationBaselineStore.DEFAULT_BASELINE_NAME,
+    aft_account_ids: Optional[List[str]] = None,
+) -> OrganizationChangeSet:
+    """
+    Returns the changes of the AFT accounts since the last successful run using
+    the same baseline. Without a recorded baseline every account has joined. The
+    baseline is only advanced once the run succeeds, see commit_baselines
+    """
+    if aft_account_ids is None:
+        aft_account_ids = get_all_aft_account_ids(aft_management_session)
+    current_states = orgs_agent.get_account_states(account_ids=aft_account_ids)
+
+    baseline_store = OrganizationBaselineStore(aft_management_session)
+    previous_states = baseline_store.get_account_states(baseline_name=baseline_name)
+    change_set = OrganizationChangeSet(previous=previous_states, current=current_states)
+    logger.info(
+        f"Changes since baseline {sanitize_input_for_logging(baseline_name)}: {change_set}"
+    )
+    return change_set
+
+
+def stage_baselines(
+    aft_management_session: Session,
+    pending_baselines: Dict[str, Dict[str, AccountState]],
+    execution_id: str,
+) -> List[Dict[str, str]]:
+    """
+    Stages the baselines a run advances once it succeeds next to the run's target
+    chunks, and returns their locations
+    """
+    s3_bucket = get_ssm_parameter_value(
+        aft_management_session, SSM_PARAM_AFT_CODEPIPELINE_CUSTOMIZATIONS_BUCKET_ID
+    )
+    s3_client: S3Client = aft_management_session.client("s3")
+    staged_baselines: List[Dict[str, str]] = []
+    for position, (baseline_name, account_states) in enumerate(
+        pending_baselines.items()
+    ):
+        s3_key = f"sfn/{execution_id}/baselines/{position}.json"
+        s3_client.put_object(
+            Bucket=s3_bucket, Key=s3_key, Body=json.dumps(account_states)
+        )
+        staged_baselines.append(
+            {"name": baseline_name, "bucket": s3_bucket, "key": s3_key}
+        )
+    return staged_baselines
+
+
+def commit_baselines(
+    aft_management_session: Session,
+    staged_baselines: List[Dict[str, str]],
+    execution_id: str,
+    failed_account_ids: Set[str],
+) -> None:
+    """
+    Advances the baselines staged by a run once all of its customizations have
+    ended. Accounts whose customization failed keep their previous state, so that
+    their changes are selected again by the next run
+    """
+    baseline_store = OrganizationBaselineStore(aft_management_session)
+    s3_client: S3Client = aft_management_session.client("s3")
+    for staged_baseline in staged_baselines:
+        account_states: Dict[str, AccountState] = json.loads(
+            s3_client.get_object(
+                Bucket=staged_baseline["bucket"], Key=staged_baseline["key"]
+            )["Body"].read()
+        )
+        if failed_account_ids:
+            previous_states = baseline_store.get_account_states(
+                baseline_name=staged_baseline["name"]
+            )
+            for account_id in failed_account_ids:
+                if account_id in previous_states:
+                    account_states[account_id] = previous_states[account_id]
+                else:
+                    account_states.pop(account_id, None)
+        baseline_store.put_account_states(
+            account_states=account_states,
+            baseline_name=staged_baseline["name"],
+            generation=execution_id,
+        )
+
+
+class TargetAccountPlanner:
+    """
+    Evaluates the include/exclude selectors of a customization request. The AFT
+    and core account IDs are fetched once per planner, and selections are
+    evaluated with set lookups while keeping the order accounts were selected in.
+    """
+
+    def __init__(
+        self,
+        aft_management_session: Session,
+        ct_mgmt_session: Session,
+        orgs_agent: OrganizationsAgent,
+        use_manifest: bool = False,
+    ) -> None:
+        self.aft_management_session = aft_management_session
+        self.ct_mgmt_session = ct_mgmt_session
+        self.orgs_agent = orgs_agent
+        self.use_manifest = use_manifest
+        self._aft_account_ids: Optional[List[str]] = None
+        self._core_account_ids: Optional[List[str]] = None
+        # Changes since each baseline used by a "changed" selector
+        self.change_sets: Dict[str, OrganizationChangeSet] = {}
+
+    @property
+    def aft_account_ids(self) -> List[str]:
+        if self._aft_account_ids is None:
+            self._aft_account_ids = get_all_aft_account_ids(
+                self.aft_management_session, use_manifest=self.use_manifest
             )
-        if d["type"] == "tags":
+        return self._aft_account_ids
+
+    @property
+    def core_account_ids(self) -> List[str]:
+        if self._core_account_ids is None:
+            self._core_account_ids = get_core_accounts(self.aft_management_session)
+        return self._core_account_ids
+
+    def select_accounts(self, selector: Dict[str, Any]) -> List[str]:
+        if selector["type"] == "all":
+            return self.aft_account_ids
+        if selector["type"] == "core":
+            return self.core_account_ids
+        if selector["type"] == "ous":
+            return self.orgs_agent.get_account_ids_in_ous(
+                ou_names=selector["target_value"],
+                recursive=selector.get("recursive", False),
+            )
+        if selector["type"] == "tags":
             tag_accounts = get_accounts_by_tags(
-                aft_management_session, ct_mgmt_session, d["target_value"]
+                self.aft_management_session,
+                self.ct_mgmt_session,
+                selector["target_value"],
+                orgs_agent=self.orgs_agent,
+                aft_account_ids=self.aft_account_ids,
             )
-            if tag_accounts is not None:
-                included_accounts.extend(tag_accounts)
-        if d["type"] == "accounts":
-            included_accounts.extend(d["target_value"])
-    # Remove Duplicates
-    included_accounts = list(set(included_accounts))
-    logger.info("Included Accounts (pre-AFT filter): " + str(included_accounts))
-
-    # Filter non-AFT accounts
-    included_accounts = filter_non_aft_accounts(
-        aft_management_session, included_accounts
-    )
+            return tag_accounts if tag_accounts is not None else []
+        if selector["type"] == "accounts":
+            return list(selector["target_value"])
+        return []
 
-    logger.info("Included Accounts (post-AFT filter): " + str(included_accounts))
-    return included_accounts
+    def get_included_accounts(self, included: List[Dict[str, Any]]) -> List[str]:
+        logger.info("All AFT accounts: " + str(self.aft_account_ids))
+        included_accounts: List[str] = []
+        # The "changed" selector narrows the other selectors to the accounts that
+        # changed since the last run, or narrows all AFT accounts when used alone
+        changed_accounts: Optional[Set[str]] = None
+        for d in included:
+            if d["type"] == "changed":
+                baseline_name = d.get(
+                    "target_value", OrganizationBaselineStore.DEFAULT_BASELINE_NAME
+                )
+                change_set = get_account_changes(
+                    self.aft_management_session,
+                    self.orgs_agent,
+                    baseline_name,
+                    aft_account_ids=self.aft_account_ids,
+                )
+                self.change_sets[baseline_name] = change_set
+                changed_accounts = (changed_accounts or set()).union(
+                    change_set.changed_account_ids
+                )
+                continue
+            included_accounts.extend(self.select_accounts(selector=d))
+        if changed_accounts is not None:
+            if all(d["type"] == "changed" for d in included):
+                included_accounts = self.aft_account_ids
+            included_accounts = [a for a in included_accounts if a in changed_accounts]
+        # Remove Duplicates
+        included_accounts = list(dict.fromkeys(included_accounts))
+        logger.info("Included Accounts (pre-AFT filter): " + str(included_accounts))
+
+        # Filter non-AFT accounts
+        included_accounts = filter_account_ids(
+            account_ids=included_accounts,
+            aft_account_ids=set(self.aft_account_ids),
+            core_account_ids=set(self.core_account_ids),
+        )
+
+        logger.info("Included Accounts (post-AFT filter): " + str(included_accounts))
+        return included_accounts
+
+    def get_excluded_accounts(self, excluded: List[Dict[str, Any]]) -> List[str]:
+        excluded_accounts: List[str] = []
+        for d in excluded:
+            # Excluding all accounts is not supported
+            if d["type"] != "all":
+                excluded_accounts.extend(self.select_accounts(selector=d))
+        # Remove Duplicates
+        excluded_accounts = list(dict.fromkeys(excluded_accounts))
+        logger.info("Excluded Accounts: " + str(excluded_accounts))
+        return excluded_accounts
+
+    def get_pending_baselines(
+        self, target_accounts: List[str]
+    ) -> Dict[str, Dict[str, AccountState]]:
+        """
+        Returns the state each baseline used advances to once the targets are
+        customized. Changed accounts that are not targeted keep their previous
+        state, so that their changes are left for a later run
+        """
+        targets = set(target_accounts)
+        pending_baselines: Dict[str, Dict[str, AccountState]] = {}
+        for baseline_name, change_set in self.change_sets.items():
+            account_states: Dict[str, AccountState] = {}
+            for account_id, account_state in change_set.current.items():
+                if (
+                    account_id in change_set.changed_account_ids
+                    and account_id not in targets
+                ):
+                    if account_id in change_set.previous:
+                        account_states[account_id] = change_set.previous[account_id]
+                    continue
+                account_states[account_id] = account_state
+            pending_baselines[baseline_name] = account_states
+        return pending_baselines
+
+    def plan(
+        self,
+        included: List[Dict[str, Any]],
+        excluded: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[str]:
+        included_accounts = self.get_included_accounts(included=included)
+        if not excluded:
+            return included_accounts
+        excluded_accounts = self.get_excluded_accounts(excluded=excluded)
+        return get_target_accounts(included_accounts, excluded_accounts)
+
+
+def get_included_accounts(
+    aft_management_session: Session,
+    ct_mgmt_session: Session,
+    orgs_agent: OrganizationsAgent,
+    included: List[Dict[str, Any]],
+) -> List[str]:
+    planner = TargetAccountPlanner(aft_management_session, ct_mgmt_session, orgs_agent)
+    return planner.get_included_accounts(included=included)
 
 
 def get_excluded_accounts(
@@ -200,63 +404,47 @@ def get_excluded_accounts(
     orgs_agent: OrganizationsAgent,
     excluded: List[Dict[str, Any]],
 ) -> List[str]:
-    excluded_accounts = []
-    for d in excluded:
-        if d["type"] == "core":
-            core_accounts = get_core_accounts(aft_management_session)
-            excluded_accounts.extend(core_accounts)
-        if d["type"] == "ous":
-            excluded_accounts.extend(
-                orgs_agent.get_account_ids_in_ous(ou_names=d["target_value"])
-            )
-        if d["type"] == "tags":
-            tag_accounts = get_accounts_by_tags(
-                aft_management_session, ct_mgmt_session, d["target_value"]
-            )
-            if tag_accounts is not None:
-                excluded_accounts.extend(tag_accounts)
-        if d["type"] == "accounts":
-            excluded_accounts.extend(d["target_value"])
-    # Remove Duplicates
-    excluded_accounts = list(set(excluded_accounts))
-    logger.info("Excluded Accounts (pre-AFT filter): " + str(excluded_accounts))
-
-    # Filter non-AFT accounts
-    excluded_accounts = filter_non_aft_accounts(
-        aft_management_session, excluded_accounts, "exclude"
-    )
-
-    logger.info("Excluded Accounts (post-AFT filter): " + str(excluded_accounts))
-    return excluded_accounts
+    planner = TargetAccountPlanner(aft_management_session, ct_mgmt_session, orgs_agent)
+    return planner.get_excluded_accounts(excluded=excluded)
 
 
 def get_target_accounts(
     included_accounts: List[str], excluded_accounts: List[str]
 ) -> List[str]:
-    for i in excluded_accounts:
-        if i in included_accounts:
-            included_accounts.remove(i)
-    logger.info("TARGET ACCOUNTS: " + str(included_accounts))
-    return included_accounts
+    excluded_set = set(excluded_accounts)
+    target_accounts = [a for a in included_accounts if a not in excluded_set]
+    logger.info("TARGET ACCOUNTS: " + str(target_accounts))
+    return target_accounts
 
 
 def upload_target_account_info(
     aft_management_session: Session,
-    target_account_info: List[AftInvokeAccountCustomizationPayload],
+    target_account_info: Iterable[AftInvokeAccountCustomizationPayload],
     execution_id: str,
-) -> Dict[str, str]:
+    chunk_size: int = TARGET_ACCOUNT_INFO_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    Streams the payloads to JSON Lines chunks of chunk_size payloads, which the
+    customizations state machine fans out over one chunk at a time. The chunk
+    manifest is returned inline and also persisted next to the chunks
+    """
     s3_bucket = get_ssm_parameter_value(
         aft_management_session, SSM_PARAM_AFT_CODEPIPELINE_CUSTOMIZATIONS_BUCKET_ID
     )
-    s3_key = f"sfn/{execution_id}/target_account_info.json"
-    put_target_account_info(
+    s3_key_prefix = f"sfn/{execution_id}/target_account_info"
+    chunks = put_json_lines_chunks(
         aft_management_session,
         s3_bucket,
-        s3_key,
+        s3_key_prefix,
         target_account_info,
+        chunk_size,
     )
+    s3_key = f"{s3_key_prefix}/manifest.json"
     s3_object = {
         "bucket": s3_bucket,
         "key": s3_key,
+        "chunk_keys": [chunk["key"] for chunk in chunks],
+        "number_payloads": sum(chunk["count"] for chunk in chunks),
     }
+    put_target_account_info_manifest(aft_management_session, s3_bucket, s3_key, chunks)
     return s3_object
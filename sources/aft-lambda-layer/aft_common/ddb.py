@@ -1,14 +1,23 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 #
+import json
 import logging
-from typing import TYPE_CHECKING, Any, Dict, Optional
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
 
-from aft_common.aft_utils import sanitize_input_for_logging
+from aft_common.aft_types import StreamBatchResponse
+from aft_common.aft_utils import sanitize_input_for_logging, yield_batches_from_list
+from aft_common.constants import SSM_PARAM_AFT_DDB_CACHE_TABLE
+from aft_common.ssm import get_ssm_parameter_value
 from boto3.dynamodb.types import TypeDeserializer
 from boto3.session import Session
 
 if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
     from mypy_boto3_dynamodb.type_defs import (
         AttributeValueTypeDef,
         DeleteItemOutputTableTypeDef,
@@ -16,6 +25,7 @@ if TYPE_CHECKING:
         PutItemOutputTableTypeDef,
     )
 else:
+    DynamoDBClient = object
     AttributeValueTypeDef = object
     GetItemOutputTableTypeDef = object
     PutItemOutputTableTypeDef = object
@@ -23,6 +33,11 @@ else:
 
 logger = logging.getLogger("aft")
 
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 8
+BATCH_GET_MAX_SLEEP_SEC = 8
+STREAM_MAX_WORKERS = 10
+
 
 def get_ddb_item(
     session: Session, table_name: str, primary_key: Dict[str, Any]
@@ -61,6 +76,81 @@ def delete_ddb_item(
     return response
 
 
+def parallel_scan_ddb_table(
+    session: Session,
+    table_name: str,
+    projection_expression: str,
+    total_segments: int = 4,
+) -> List[Dict[str, Any]]:
+    """
+    Scans a table with one thread per segment. A single client is shared by the
+    threads as clients, unlike sessions and resources, are thread safe.
+    """
+    client: DynamoDBClient = session.client("dynamodb")
+    logger.info(f"Scanning DynamoDB table: {table_name} with {total_segments} segments")
+
+    def scan_segment(segment: int) -> List[Dict[str, Any]]:
+        kwargs: Dict[str, Any] = {
+            "TableName": table_name,
+            "ProjectionExpression": projection_expression,
+            "ConsistentRead": True,
+            "Segment": segment,
+            "TotalSegments": total_segments,
+        }
+        items = []
+        while True:
+            response = client.scan(**kwargs)
+            items.extend([unmarshal_ddb_item(item) for item in response["Items"]])
+            if "LastEvaluatedKey" not in response:
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        segments = executor.map(scan_segment, range(total_segments))
+        return [item for segment_items in segments for item in segment_items]
+
+
+def batch_get_ddb_items(
+    session: Session,
+    table_name: str,
+    primary_keys: Sequence[Dict[str, Any]],
+    projection_expression: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetches items in chunks of BatchGetItem's 100 key limit, resubmitting any
+    unprocessed keys with clipped exponential backoff. Keys without an item are
+    simply absent from the result.
+    """
+    dynamodb = session.resource("dynamodb")
+    logger.info(f"Batch getting {len(primary_keys)} items from table: {table_name}")
+
+    items: List[Dict[str, Any]] = []
+    for batch in yield_batches_from_list(primary_keys, BATCH_GET_MAX_KEYS):
+        request: Dict[str, Any] = {"Keys": list(batch), "ConsistentRead": True}
+        if projection_expression is not None:
+            request["ProjectionExpression"] = projection_expression
+        request_items: Dict[str, Any] = {table_name: request}
+
+        retry_sleep_sec = 0.05
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            items.extend(response["Responses"].get(table_name, []))
+            request_items = dict(response.get("UnprocessedKeys", {}))
+            if not request_items:
+                break
+            if attempt == BATCH_GET_MAX_RETRIES:
+                raise Exception(
+                    f"Exceeded retries on unprocessed keys from table: {table_name}"
+                )
+            unprocessed_count = len(request_items[table_name]["Keys"])
+            logger.info(
+                f"Retrying {unprocessed_count} unprocessed keys in {retry_sleep_sec:.2f} seconds"
+            )
+            time.sleep(retry_sleep_sec + random.random() * retry_sleep_sec)
+            retry_sleep_sec = min(retry_sleep_sec * 2, BATCH_GET_MAX_SLEEP_SEC)
+    return items
+
+
 def unmarshal_ddb_item(
     low_level_data: Dict[str, AttributeValueTypeDef],
 ) -> Dict[str, Any]:
@@ -69,3 +159,127 @@ def unmarshal_ddb_item(
     deserializer = TypeDeserializer()
     python_data = {k: deserializer.deserialize(v) for k, v in low_level_data.items()}
     return python_data
+
+
+class StreamRecordCheckpoint:
+    """
+    Records the stream records a consumer has processed in the AFT cache table, so
+    that records redelivered when Lambda retries a batch from an earlier failed
+    record are not processed twice. Items expire with the stream's 24 hour
+    retention. A single client is used, as the checkpoint is shared by the
+    threads processing a batch
+    """
+
+    PARTITION_KEY_PREFIX = "stream-records#"
+    TTL_SECONDS = 86400
+
+    def __init__(self, aft_management_session: Session, consumer: str) -> None:
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.client: DynamoDBClient = aft_management_session.client("dynamodb")
+        self.partition_key = self.PARTITION_KEY_PREFIX + consumer
+
+    def is_processed(self, record: Dict[str, Any]) -> bool:
+        response = self.client.get_item(
+            TableName=self.table_name,
+            Key=self._build_key(record),
+            ConsistentRead=True,
+        )
+        return "Item" in response
+
+    def mark_processed(self, record: Dict[str, Any]) -> None:
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={
+                **self._build_key(record),
+                "expires_at": {"N": str(int(time.time()) + self.TTL_SECONDS)},
+            },
+        )
+
+    def _build_key(self, record: Dict[str, Any]) -> Dict[str, AttributeValueTypeDef]:
+        return {"pk": {"S": self.partition_key}, "sk": {"S": record["eventID"]}}
+
+
+def process_stream_records(
+    records: Sequence[Dict[str, Any]],
+    process_record: Callable[[Dict[str, Any]], None],
+    max_workers: int = STREAM_MAX_WORKERS,
+    checkpoint: Optional[StreamRecordCheckpoint] = None,
+) -> Dict[str, str]:
+    """
+    Processes the records of a DynamoDB stream batch, records of different items
+    concurrently and the records of each item in stream order. No record is
+    started once one has failed, as Lambda retries the batch from the earliest
+    failed record and so redelivers every record after it. Records completed
+    before the failure are redelivered too, so they are recorded in the
+    checkpoint, when given, and skipped on redelivery. Returns the errors of the
+    failed and unprocessed records, keyed by sequence number. process_record runs
+    in worker threads, so anything it shares with other records must be safe to
+    use concurrently
+    """
+    records_by_key: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        key = json.dumps(record["dynamodb"].get("Keys", {}), sort_keys=True)
+        records_by_key.setdefault(key, []).append(record)
+
+    failed = threading.Event()
+
+    def process_item_records(item_records: List[Dict[str, Any]]) -> Dict[str, str]:
+        for i, record in enumerate(item_records):
+            if failed.is_set():
+                return {
+                    str(skipped_record["dynamodb"].get("SequenceNumber", "")): (
+                        "Skipped after an earlier record of the batch failed"
+                    )
+                    for skipped_record in item_records[i:]
+                }
+            try:
+                if checkpoint is not None and checkpoint.is_processed(record):
+                    logger.info("Stream record already processed, skipping")
+                    continue
+                process_record(record)
+                if checkpoint is not None:
+                    checkpoint.mark_processed(record)
+            except Exception as error:
+                failed.set()
+                logger.exception(f"Failed to process stream record: {error}")
+                failures = {
+                    str(record["dynamodb"].get("SequenceNumber", "")): str(error)
+                }
+                for skipped_record in item_records[i + 1 :]:
+                    failures[
+                        str(skipped_record["dynamodb"].get("SequenceNumber", ""))
+                    ] = "Skipped after an earlier record of the same item failed"
+                return failures
+        return {}
+
+    failures: Dict[str, str] = {}
+    if len(records_by_key) == 0:
+        return failures
+    logger.info(
+        f"Processing {len(records)} stream records of {len(records_by_key)} items"
+    )
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(records_by_key))
+    ) as executor:
+        for item_failures in executor.map(
+            process_item_records, records_by_key.values()
+        ):
+            failures.update(item_failures)
+    return failures
+
+
+def build_stream_batch_response(failures: Dict[str, str]) -> StreamBatchResponse:
+    """
+    Reports the earliest failed record of a batch to Lambda, which retries the batch
+    from that record. Later failures are not reported, as they are redelivered
+    anyway. An empty identifier fails the whole batch
+    """
+    if len(failures) == 0:
+        return {"batchItemFailures": []}
+    # Sequence numbers are decimal strings, ordered by length then by digits
+    earliest = min(
+        failures, key=lambda sequence_number: (len(sequence_number), sequence_number)
+    )
+    return {"batchItemFailures": [{"itemIdentifier": earliest}]}
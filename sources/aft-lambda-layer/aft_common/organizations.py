@@ -3,18 +3,29 @@
 #
 import logging
 import re
-from copy import deepcopy
-from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple, cast
-
-from aft_common.aft_types import AftAccountInfo
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple, cast
+
+from aft_common.aft_types import (
+    AccountState,
+    AftAccountInfo,
+    OrganizationalUnitTreeInfo,
+)
 from aft_common.aft_utils import (
+    TokenBucket,
     emails_are_equal,
     get_high_retry_botoconfig,
     resubmit_request_on_boto_throttle,
 )
 from boto3.session import Session
+from botocore.exceptions import ClientError
 
 if TYPE_CHECKING:
+    from aft_common.organizations_cache import (
+        AccountTagIndexStore,
+        OrganizationSnapshotStore,
+    )
     from mypy_boto3_organizations import OrganizationsClient
     from mypy_boto3_organizations.type_defs import (
         AccountTypeDef,
@@ -31,10 +42,241 @@ else:
     OrganizationalUnitTypeDef = object
     AccountTypeDef = object
     ParentTypeDef = object
+    OrganizationSnapshotStore = object
+    AccountTagIndexStore = object
 
 logger = logging.getLogger("aft")
 
 
+class OrganizationalUnitTree:
+    """
+    Result of a breadth-first crawl of the OU tree. `ous` holds the root followed
+    by every OU in level order, `info` holds the parent, depth and path of each OU.
+    When accounts are crawled, `accounts_by_parent` maps each OU id to its accounts.
+    """
+
+    def __init__(
+        self,
+        root: OrganizationalUnitTypeDef,
+        ous: List[OrganizationalUnitTypeDef],
+        info: Dict[str, OrganizationalUnitTreeInfo],
+        accounts_by_parent: Dict[str, List[AccountTypeDef]],
+    ):
+        self.root = root
+        self.ous = ous
+        self.info = info
+        self.accounts_by_parent = accounts_by_parent
+
+
+class OrganizationalUnitResolver:
+    """
+    Resolves OU targets to OU IDs from an in-memory OU tree. Targets can be given
+    as a name, in the nested "Name (ou-id)" format, or as a path from the root such
+    as "Root/Workloads/Prod". Descendants are found through child pointers.
+    """
+
+    PATH_SEPARATOR = "/"
+
+    def __init__(
+        self,
+        root: OrganizationalUnitTypeDef,
+        ous: List[OrganizationalUnitTypeDef],
+        ou_parent_ids: Dict[str, str],
+    ):
+        self.root = root
+        self.ous_by_id: Dict[str, OrganizationalUnitTypeDef] = {
+            ou["Id"]: ou for ou in ous
+        }
+        self.ous_by_id[root["Id"]] = root
+        self.ou_parent_ids = ou_parent_ids
+
+        # OU names are not unique, map each name to every OU carrying it
+        self.ou_ids_by_name: Dict[str, List[str]] = {}
+        self.ou_children_ids: Dict[str, List[str]] = {}
+        for ou_id, ou in self.ous_by_id.items():
+            self.ou_ids_by_name.setdefault(ou["Name"], []).append(ou_id)
+            parent_id = ou_parent_ids.get(ou_id)
+            if parent_id is not None:
+                self.ou_children_ids.setdefault(parent_id, []).append(ou_id)
+
+        self.ou_paths: Dict[str, str] = {}
+        for ou_id in self.ous_by_id:
+            self.ou_paths[ou_id] = self._build_path(ou_id=ou_id)
+        self.ou_ids_by_path: Dict[str, str] = {
+            path: ou_id for ou_id, path in self.ou_paths.items()
+        }
+
+    def _build_path(self, ou_id: str) -> str:
+        names = []
+        current_id: Optional[str] = ou_id
+        while current_id is not None:
+            names.append(self.ous_by_id[current_id]["Name"])
+            current_id = self.ou_parent_ids.get(current_id)
+        return self.PATH_SEPARATOR.join(reversed(names))
+
+    def resolve(self, target_ou_names: List[str]) -> List[str]:
+        matched_ou_ids = []
+        for target_name in target_ou_names:
+            # Only match nested OU targets if both name and ID are the same
+            nested_parsed = OrganizationsAgent.get_name_and_id_from_nested_ou(
+                nested_ou_name=target_name
+            )
+            if nested_parsed is not None:  # Nested OU pattern matched!
+                nested_name, nested_id = nested_parsed
+                nested_ou = self.ous_by_id.get(nested_id)
+                if nested_ou is not None and nested_ou["Name"] == nested_name:
+                    matched_ou_ids.append(nested_id)
+            elif target_name in self.ou_ids_by_name:
+                # Ambiguous names resolve to a single OU, use a path or the
+                # nested format to target a specific one
+                matched_ou_ids.append(self.ou_ids_by_name[target_name][0])
+            elif target_name in self.ou_ids_by_path:
+                matched_ou_ids.append(self.ou_ids_by_path[target_name])
+        return matched_ou_ids
+
+    def get_descendant_ids(self, ou_ids: List[str]) -> List[str]:
+        """Returns the given OU IDs followed by the IDs of all their descendants"""
+        descendant_ids: List[str] = []
+        seen: Set[str] = set()
+        ous_to_visit = list(ou_ids)
+        while len(ous_to_visit) > 0:
+            ou_id = ous_to_visit.pop()
+            if ou_id in seen:
+                continue
+            seen.add(ou_id)
+            descendant_ids.append(ou_id)
+            ous_to_visit.extend(self.ou_children_ids.get(ou_id, []))
+        return descendant_ids
+
+
+class OrganizationChangeSet:
+    """
+    Differences between two states of the organization's accounts: accounts that
+    joined, left, moved to another OU, had their tags changed, or were suspended.
+    """
+
+    INACTIVE_STATUSES = ["SUSPENDED", "PENDING_CLOSURE"]
+
+    def __init__(
+        self,
+        previous: Dict[str, AccountState],
+        current: Dict[str, AccountState],
+    ):
+        self.previous = previous
+        self.current = current
+        self.joined: Set[str] = set(current.keys()) - set(previous.keys())
+        self.removed: Set[str] = set(previous.keys()) - set(current.keys())
+        self.moved: Set[str] = set()
+        self.tags_changed: Set[str] = set()
+        self.suspended: Set[str] = set()
+        for account_id in set(current.keys()) & set(previous.keys()):
+            if current[account_id]["parent_id"] != previous[account_id]["parent_id"]:
+                self.moved.add(account_id)
+            if current[account_id]["tags"] != previous[account_id]["tags"]:
+                self.tags_changed.add(account_id)
+            if (
+                current[account_id]["status"] in self.INACTIVE_STATUSES
+                and previous[account_id]["status"] not in self.INACTIVE_STATUSES
+            ):
+                self.suspended.add(account_id)
+
+    @property
+    def changed_account_ids(self) -> Set[str]:
+        """Accounts worth customizing again; suspended accounts are left out"""
+        return (self.joined | self.moved | self.tags_changed) - self.suspended
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.joined)} joined, {len(self.removed)} removed, "
+            f"{len(self.moved)} moved, {len(self.tags_changed)} with changed tags, "
+            f"{len(self.suspended)} suspended"
+        )
+
+
+class AccountTagIndex:
+    """
+    Inverted index of account tags, mapping each (key, value) pair to the set of
+    account IDs carrying it. Tag filters are resolved with set intersections.
+    """
+
+    def __init__(self, account_tags: Dict[str, Dict[str, str]]):
+        self.account_tags = account_tags
+        self.index: Dict[Tuple[str, str], Set[str]] = {}
+        for account_id, tags in account_tags.items():
+            for key, value in tags.items():
+                self.index.setdefault((key, value), set()).add(account_id)
+
+    def get_account_ids(self, tags: List[Dict[str, str]]) -> Set[str]:
+        """Returns the accounts carrying every key/value pair of every tag filter"""
+        pairs = [(key, value) for tag in tags for key, value in tag.items()]
+        if len(pairs) == 0:
+            return set()
+        # Intersect starting from the smallest set
+        matches = sorted(
+            (self.index.get(pair, set()) for pair in pairs), key=lambda ids: len(ids)
+        )
+        return set(matches[0]).intersection(*matches[1:])
+
+
+class OrganizationSnapshot:
+    """
+    In-memory index of an organization, built from a single crawl of the OU tree.
+    Provides constant time lookups of accounts by ID, email and name, of the parent
+    of every account, and of the OU tree through parent pointers.
+    """
+
+    def __init__(
+        self,
+        root: OrganizationalUnitTypeDef,
+        ous: List[OrganizationalUnitTypeDef],
+        ou_parent_ids: Dict[str, str],
+        accounts: List[AccountTypeDef],
+        account_parents: Dict[str, ParentTypeDef],
+    ) -> None:
+        self.root = root
+        self.ous: List[OrganizationalUnitTypeDef] = [root] + ous
+        self.ous_by_id: Dict[str, OrganizationalUnitTypeDef] = {
+            ou["Id"]: ou for ou in self.ous
+        }
+        # Child OU ID -> parent OU/root ID. The root has no entry
+        self.ou_parent_ids = ou_parent_ids
+        self.ou_children_ids: Dict[str, List[str]] = {ou["Id"]: [] for ou in self.ous}
+        for ou_id, parent_id in ou_parent_ids.items():
+            self.ou_children_ids.setdefault(parent_id, []).append(ou_id)
+
+        self.accounts = accounts
+        self.accounts_by_id: Dict[str, AccountTypeDef] = {}
+        self.accounts_by_email: Dict[str, AccountTypeDef] = {}
+        self.accounts_by_name: Dict[str, AccountTypeDef] = {}
+        for account in accounts:
+            self.accounts_by_id[account["Id"]] = account
+            self.accounts_by_email[account["Email"].lower()] = account
+            self.accounts_by_name[account["Name"]] = account
+
+        self.account_parents = account_parents
+        self.ou_account_ids: Dict[str, List[str]] = {ou["Id"]: [] for ou in self.ous}
+        for account_id, parent in account_parents.items():
+            self.ou_account_ids.setdefault(parent["Id"], []).append(account_id)
+
+    def get_account(self, account_id: str) -> Optional[AccountTypeDef]:
+        return self.accounts_by_id.get(account_id)
+
+    def get_account_by_email(self, email: str) -> Optional[AccountTypeDef]:
+        return self.accounts_by_email.get(email.lower())
+
+    def get_account_by_name(self, name: str) -> Optional[AccountTypeDef]:
+        return self.accounts_by_name.get(name)
+
+    def get_parent(self, account_id: str) -> Optional[ParentTypeDef]:
+        return self.account_parents.get(account_id)
+
+    def get_ou(self, ou_id: str) -> Optional[OrganizationalUnitTypeDef]:
+        return self.ous_by_id.get(ou_id)
+
+    def get_account_ids_for_ou(self, ou_id: str) -> List[str]:
+        return self.ou_account_ids.get(ou_id, [])
+
+
 class OrganizationsAgent:
     ROOT_OU = "Root"
     # https://docs.aws.amazon.com/organizations/latest/APIReference/API_OrganizationalUnit.html
@@ -45,17 +287,51 @@ class OrganizationsAgent:
         rf"{OU_NAME_PATTERN}\s{OU_ID_PATTERN}"  # <Name> space (<Id>)
     )
 
-    def __init__(self, ct_management_session: Session):
+    # Client-side budget for the OU tree crawler, kept below the Organizations
+    # API throttling limits so concurrent calls do not get throttled
+    # https://docs.aws.amazon.com/organizations/latest/userguide/orgs_reference_limits.html
+    CRAWLER_MAX_WORKERS = 10
+    CRAWLER_REQUESTS_PER_SECOND = 10.0
+    CRAWLER_BURST_SIZE = 20
+
+    # Below this many accounts, describing each account is cheaper than listing
+    # the accounts of every OU
+    BULK_ACCOUNT_INFO_MIN_ACCOUNTS = 25
+
+    def __init__(
+        self,
+        ct_management_session: Session,
+        use_snapshot: bool = False,
+        snapshot_store: Optional[OrganizationSnapshotStore] = None,
+        tag_index_store: Optional[AccountTagIndexStore] = None,
+    ):
         self.orgs_client: OrganizationsClient = ct_management_session.client(
             "organizations", config=get_high_retry_botoconfig()
         )
 
-        # Memoization - cache org query results
-        # Cache is not shared between AFT invocations so staleness due to org updates is unlikely
+        # Memoization - cache org query results for the lifetime of the agent
+        # Persisted snapshots are shared between invocations; they expire and are kept
+        # current by Organizations events, see OrganizationSnapshotStore
         self.org_root_ou_id: Optional[str] = None
         self.org_ous: Optional[List[OrganizationalUnitTypeDef]] = None
+        self.org_ou_tree: Optional[OrganizationalUnitTree] = None
+        self.ou_resolver: Optional[OrganizationalUnitResolver] = None
         self.org_accounts: Optional[List[AccountTypeDef]] = None
 
+        # Snapshot mode - crawl the org once and answer account/OU lookups from memory.
+        # Worthwhile when many accounts are looked up in the same invocation, or when
+        # a persisted snapshot store is provided so the crawl is shared across invocations
+        self.use_snapshot = use_snapshot or snapshot_store is not None
+        self.snapshot_store = snapshot_store
+        self._snapshot: Optional[OrganizationSnapshot] = None
+        # Agents may be shared by threads, which must not load the snapshot twice
+        self._snapshot_lock = threading.Lock()
+
+        # Account tag index - optionally persisted so tags fetched by one invocation
+        # are reused by others until they expire or are updated by tag events
+        self.tag_index_store = tag_index_store
+        self.account_tag_index: Optional[AccountTagIndex] = None
+
     @staticmethod
     def ou_name_is_nested_format(ou_name: str) -> bool:
         pattern = re.compile(OrganizationsAgent.NESTED_OU_NAME_PATTERN)
@@ -97,6 +373,159 @@ class OrganizationsAgent:
         self.org_root_ou_id = self.orgs_client.list_roots()["Roots"][0]["Id"]
         return self.org_root_ou_id
 
+    @property
+    def snapshot(self) -> Optional[OrganizationSnapshot]:
+        if not self.use_snapshot:
+            return None
+        with self._snapshot_lock:
+            if self._snapshot is None:
+                if self.snapshot_store is not None:
+                    self._snapshot = self.snapshot_store.get_snapshot(orgs_agent=self)
+                else:
+                    self._snapshot = self.build_snapshot()
+        return self._snapshot
+
+    def build_snapshot(self) -> OrganizationSnapshot:
+        """
+        Crawls the OU tree once, listing the child OUs and the accounts of every OU.
+        Accounts are listed per parent so the parent of every account is known
+        without a ListParents call per account.
+        """
+        logger.info("Building organization snapshot")
+        tree = self.crawl_ou_tree(include_accounts=True)
+
+        ou_parent_ids: Dict[str, str] = {}
+        accounts: List[AccountTypeDef] = []
+        account_parents: Dict[str, ParentTypeDef] = {}
+        for ou in tree.ous:
+            ou_parent_id = tree.info[ou["Id"]]["parent_id"]
+            if ou_parent_id is not None:
+                ou_parent_ids[ou["Id"]] = ou_parent_id
+
+            parent: ParentTypeDef = {"Id": ou["Id"], "Type": "ORGANIZATIONAL_UNIT"}
+            if ou["Id"] == tree.root["Id"]:
+                parent = {"Id": ou["Id"], "Type": "ROOT"}
+            for account in tree.accounts_by_parent.get(ou["Id"], []):
+                accounts.append(account)
+                account_parents[account["Id"]] = parent
+
+        snapshot = OrganizationSnapshot(
+            root=tree.root,
+            ous=tree.ous[1:],
+            ou_parent_ids=ou_parent_ids,
+            accounts=accounts,
+            account_parents=account_parents,
+        )
+        logger.info(
+            f"Organization snapshot built with {len(snapshot.ous)} OUs and {len(accounts)} accounts"
+        )
+        return snapshot
+
+    def crawl_ou_tree(self, include_accounts: bool = False) -> OrganizationalUnitTree:
+        """
+        Crawls the OU tree breadth-first, listing every OU of a level concurrently.
+        All calls share one TokenBucket so the crawl stays within the Organizations
+        API rate limits regardless of the number of worker threads.
+        """
+        list_root_response = self.orgs_client.list_roots()
+        # NOTE: Assumes single root structure
+        root_ou: OrganizationalUnitTypeDef = {
+            "Id": list_root_response["Roots"][0]["Id"],
+            "Arn": list_root_response["Roots"][0]["Arn"],
+            "Name": list_root_response["Roots"][0]["Name"],
+        }
+        self.org_root_ou_id = root_ou["Id"]
+
+        ous = [root_ou]
+        info: Dict[str, OrganizationalUnitTreeInfo] = {
+            root_ou["Id"]: {
+                "parent_id": None,
+                "depth": 0,
+                "path_ids": [root_ou["Id"]],
+                "path": root_ou["Name"],
+            }
+        }
+        accounts_by_parent: Dict[str, List[AccountTypeDef]] = {}
+
+        rate_limiter = TokenBucket(
+            requests_per_second=self.CRAWLER_REQUESTS_PER_SECOND,
+            burst_size=self.CRAWLER_BURST_SIZE,
+        )
+        level = [root_ou["Id"]]
+        with ThreadPoolExecutor(max_workers=self.CRAWLER_MAX_WORKERS) as executor:
+            while len(level) > 0:
+                children_futures = [
+                    executor.submit(
+                        self._list_children_ous_rate_limited,
+                        parent_id=parent_id,
+                        rate_limiter=rate_limiter,
+                    )
+                    for parent_id in level
+                ]
+                accounts_futures = []
+                if include_accounts:
+                    accounts_futures = [
+                        executor.submit(
+                            self._list_accounts_for_parent_rate_limited,
+                            parent_id=parent_id,
+                            rate_limiter=rate_limiter,
+                        )
+                        for parent_id in level
+                    ]
+
+                next_level = []
+                for parent_id, children_future in zip(level, children_futures):
+                    parent_info = info[parent_id]
+                    for child_ou in children_future.result():
+                        ous.append(child_ou)
+                        info[child_ou["Id"]] = {
+                            "parent_id": parent_id,
+                            "depth": parent_info["depth"] + 1,
+                            "path_ids": parent_info["path_ids"] + [child_ou["Id"]],
+                            "path": f"{parent_info['path']}/{child_ou['Name']}",
+                        }
+                        next_level.append(child_ou["Id"])
+                for parent_id, accounts_future in zip(level, accounts_futures):
+                    accounts_by_parent[parent_id] = accounts_future.result()
+                level = next_level
+
+        logger.info(
+            f"Crawled {len(ous)} OUs across {max(ou_info['depth'] for ou_info in info.values()) + 1} levels"
+        )
+        return OrganizationalUnitTree(
+            root=root_ou, ous=ous, info=info, accounts_by_parent=accounts_by_parent
+        )
+
+    def _list_children_ous_rate_limited(
+        self, parent_id: str, rate_limiter: TokenBucket
+    ) -> List[OrganizationalUnitTypeDef]:
+        rate_limiter.acquire()
+        response = self.orgs_client.list_organizational_units_for_parent(
+            ParentId=parent_id
+        )
+        children_ous = response["OrganizationalUnits"]
+        while "NextToken" in response:
+            rate_limiter.acquire()
+            response = self.orgs_client.list_organizational_units_for_parent(
+                ParentId=parent_id, NextToken=response["NextToken"]
+            )
+            children_ous.extend(response["OrganizationalUnits"])
+        return children_ous
+
+    def _list_accounts_for_parent_rate_limited(
+        self, parent_id: str, rate_limiter: TokenBucket
+    ) -> List[AccountTypeDef]:
+        rate_limiter.acquire()
+        response = self.orgs_client.list_accounts_for_parent(ParentId=parent_id)
+        accounts = response["Accounts"]
+        while "NextToken" in response:
+            rate_limiter.acquire()
+            response = self.orgs_client.list_accounts_for_parent(
+                ParentId=parent_id, NextToken=response["NextToken"]
+            )
+            accounts.extend(response["Accounts"])
+        return accounts
+
     def get_ous_for_root(self) -> List[OrganizationalUnitTypeDef]:
         return self.get_children_ous_from_parent_id(parent_id=self.get_root_ou_id())
 
@@ -115,6 +544,11 @@ class OrganizationsAgent:
     def get_account_by_email(self, email: str) -> Optional[AccountTypeDef]:
         """Find an account by email using Organizations ListAccounts.
         Returns the account if found, None otherwise."""
+        if self.snapshot is not None:
+            snapshot_account = self.snapshot.get_account_by_email(email)
+            if snapshot_account is not None:
+                return snapshot_account
+
         for account in self.get_all_org_accounts():
             if emails_are_equal(email, account["Email"]):
                 return account
@@ -124,33 +558,38 @@ class OrganizationsAgent:
         if self.org_ous is not None:
             return self.org_ous
 
-        # Including the root OU
-        list_root_response = self.orgs_client.list_roots()
-        root_ou: OrganizationalUnitTypeDef = {
-            "Id": list_root_response["Roots"][0]["Id"],
-            "Arn": list_root_response["Roots"][0]["Arn"],
-            "Name": list_root_response["Roots"][0]["Name"],
-        }
-
-        org_ous = [root_ou]
-
-        # Get the children OUs of the root as the first pass
-        root_children = self.get_ous_for_root()
-        org_ous.extend(root_children)
-
-        # Exclude root to avoid double counting children
-        ous_to_query = deepcopy(root_children)
+        if self.snapshot is not None:
+            self.org_ous = self.snapshot.ous
+            return self.org_ous
 
-        # Recursively search all children OUs for further children
-        while len(ous_to_query) > 0:
-            parent_id: str = ous_to_query.pop()["Id"]
-            children_ous = self.get_children_ous_from_parent_id(parent_id=parent_id)
-            org_ous.extend(children_ous)
-            ous_to_query.extend(children_ous)
+        self.org_ou_tree = self.crawl_ou_tree()
+        self.org_ous = self.org_ou_tree.ous
+        return self.org_ous
 
-        self.org_ous = org_ous
+    def get_ou_resolver(self) -> OrganizationalUnitResolver:
+        if self.ou_resolver is not None:
+            return self.ou_resolver
 
-        return self.org_ous
+        if self.snapshot is not None:
+            self.ou_resolver = OrganizationalUnitResolver(
+                root=self.snapshot.root,
+                ous=self.snapshot.ous,
+                ou_parent_ids=self.snapshot.ou_parent_ids,
+            )
+            return self.ou_resolver
+
+        if self.org_ou_tree is None:
+            self.org_ou_tree = self.crawl_ou_tree()
+        ou_parent_ids = {}
+        for ou_id, ou_info in self.org_ou_tree.info.items():
+            if ou_info["parent_id"] is not None:
+                ou_parent_ids[ou_id] = ou_info["parent_id"]
+        self.ou_resolver = OrganizationalUnitResolver(
+            root=self.org_ou_tree.root,
+            ous=self.org_ou_tree.ous,
+            ou_parent_ids=ou_parent_ids,
+        )
+        return self.ou_resolver
 
     def get_parents_from_account_id(self, account_id: str) -> List[ParentTypeDef]:
         paginator = self.orgs_client.get_paginator("list_parents")
@@ -172,36 +611,23 @@ class OrganizationsAgent:
             children_ous.extend(page["OrganizationalUnits"])
         return children_ous
 
-    def get_ou_ids_from_ou_names(self, target_ou_names: List[str]) -> List[str]:
-        ous = self.get_all_org_ous()
-        org_ou_map = {}
-
-        # Convert list of OUs to id->name map for constant time lookups
-        for ou in ous:
-            org_ou_map[ou["Id"]] = ou["Name"]
-
-        # Search the map for every target exactly once
-        matched_ou_ids = []
-        for target_name in target_ou_names:
-            # Only match nested OU targets if both name and ID are the same
-            nested_parsed = OrganizationsAgent.get_name_and_id_from_nested_ou(
-                nested_ou_name=target_name
-            )
-            if nested_parsed is not None:  # Nested OU pattern matched!
-                target_name, target_id = nested_parsed
-                if target_id in org_ou_map.keys():
-                    if org_ou_map[target_id] == target_name:
-                        matched_ou_ids.append(target_id)
-            else:
-                if target_name in org_ou_map.values():
-                    target_id = [
-                        id for id, name in org_ou_map.items() if target_name == name
-                    ][0]
-                    matched_ou_ids.append(target_id)
-
+    def get_ou_ids_from_ou_names(
+        self, target_ou_names: List[str], recursive: bool = False
+    ) -> List[str]:
+        ou_resolver = self.get_ou_resolver()
+        matched_ou_ids = ou_resolver.resolve(target_ou_names=target_ou_names)
+        if recursive:
+            return ou_resolver.get_descendant_ids(ou_ids=matched_ou_ids)
         return matched_ou_ids
 
     def get_ou_from_account_id(self, account_id: str) -> OrganizationalUnitTypeDef:
+        if self.snapshot is not None:
+            snapshot_parent = self.snapshot.get_parent(account_id)
+            if snapshot_parent is not None:
+                snapshot_ou = self.snapshot.get_ou(snapshot_parent["Id"])
+                if snapshot_ou is not None:
+                    return snapshot_ou
+
         # NOTE: Assumes single-parent accounts
         parents = self.get_parents_from_account_id(account_id=account_id)
         parent = parents[0]
@@ -227,15 +653,31 @@ class OrganizationsAgent:
         return parent_ou
 
     def get_accounts_for_ou(self, ou_id: str) -> List[AccountTypeDef]:
+        if self.snapshot is not None and self.snapshot.get_ou(ou_id) is not None:
+            return [
+                self.snapshot.accounts_by_id[account_id]
+                for account_id in self.snapshot.get_account_ids_for_ou(ou_id)
+            ]
+        return self._list_accounts_for_parent(parent_id=ou_id)
+
+    def _list_accounts_for_parent(self, parent_id: str) -> List[AccountTypeDef]:
         paginator = self.orgs_client.get_paginator("list_accounts_for_parent")
-        pages = paginator.paginate(ParentId=ou_id)
+        pages = paginator.paginate(ParentId=parent_id)
         accounts = []
         for page in pages:
             accounts.extend(page["Accounts"])
         return accounts
 
-    def get_account_ids_in_ous(self, ou_names: List[str]) -> List[str]:
-        ou_ids = self.get_ou_ids_from_ou_names(target_ou_names=ou_names)
+    def get_account_ids_in_ous(
+        self, ou_names: List[str], recursive: bool = False
+    ) -> List[str]:
+        """
+        Returns the accounts directly in the named OUs, or anywhere beneath them
+        when recursive. Membership comes from the snapshot when available.
+        """
+        ou_ids = self.get_ou_ids_from_ou_names(
+            target_ou_names=ou_names, recursive=recursive
+        )
         account_ids = []
         for ou_id in ou_ids:
             account_ids.extend(
@@ -278,7 +720,89 @@ class OrganizationsAgent:
     def list_tags_for_resource(self, resource: str) -> List[TagTypeDef]:
         return self.orgs_client.list_tags_for_resource(ResourceId=resource)["Tags"]
 
+    def list_tags_for_accounts(
+        self, account_ids: List[str]
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Lists the tags of many accounts concurrently, sharing one TokenBucket so
+        the calls stay within the Organizations API rate limits
+        """
+        rate_limiter = TokenBucket(
+            requests_per_second=self.CRAWLER_REQUESTS_PER_SECOND,
+            burst_size=self.CRAWLER_BURST_SIZE,
+        )
+        with ThreadPoolExecutor(max_workers=self.CRAWLER_MAX_WORKERS) as executor:
+            futures = {
+                account_id: executor.submit(
+                    self._list_tags_rate_limited,
+                    resource=account_id,
+                    rate_limiter=rate_limiter,
+                )
+                for account_id in account_ids
+            }
+            return {
+                account_id: {tag["Key"]: tag["Value"] for tag in future.result()}
+                for account_id, future in futures.items()
+            }
+
+    def _list_tags_rate_limited(
+        self, resource: str, rate_limiter: TokenBucket
+    ) -> List[TagTypeDef]:
+        rate_limiter.acquire()
+        response = self.orgs_client.list_tags_for_resource(ResourceId=resource)
+        tags = response["Tags"]
+        while "NextToken" in response:
+            rate_limiter.acquire()
+            response = self.orgs_client.list_tags_for_resource(
+                ResourceId=resource, NextToken=response["NextToken"]
+            )
+            tags.extend(response["Tags"])
+        return tags
+
+    def get_account_tag_index(self, account_ids: List[str]) -> AccountTagIndex:
+        """
+        Returns a tag index covering at least the given accounts, memoized for
+        the lifetime of the agent
+        """
+        if self.account_tag_index is not None and set(account_ids).issubset(
+            self.account_tag_index.account_tags.keys()
+        ):
+            return self.account_tag_index
+
+        if self.tag_index_store is not None:
+            account_tags = self.tag_index_store.get_account_tags(
+                orgs_agent=self, account_ids=account_ids
+            )
+        else:
+            account_tags = self.list_tags_for_accounts(account_ids=account_ids)
+        logger.info(f"Built account tag index for {len(account_tags)} accounts")
+        self.account_tag_index = AccountTagIndex(account_tags=account_tags)
+        return self.account_tag_index
+
+    def get_account_states(self, account_ids: List[str]) -> Dict[str, AccountState]:
+        """
+        Returns the parent, status and tags of the given accounts, the state an
+        OrganizationChangeSet is computed from. Accounts that do not exist are omitted
+        """
+        account_infos = self.get_aft_account_infos(account_ids=account_ids)
+        account_tags = self.get_account_tag_index(
+            account_ids=list(account_infos.keys())
+        ).account_tags
+        return {
+            account_id: {
+                "parent_id": account_info["parent_id"],
+                "status": account_info["status"],
+                "tags": account_tags.get(account_id, {}),
+            }
+            for account_id, account_info in account_infos.items()
+        }
+
     def get_account_email_from_id(self, account_id: str) -> str:
+        if self.snapshot is not None:
+            snapshot_account = self.snapshot.get_account(account_id)
+            if snapshot_account is not None:
+                return snapshot_account["Email"]
+
         response: DescribeAccountResponseTypeDef = self.orgs_client.describe_account(
             AccountId=account_id
         )
@@ -287,6 +811,11 @@ class OrganizationsAgent:
     def get_account_id_from_email(
         self, email: str, ou_name: Optional[str] = None
     ) -> str:
+        if self.snapshot is not None:
+            snapshot_account = self.snapshot.get_account_by_email(email)
+            if snapshot_account is not None:
+                return snapshot_account["Id"]
+
         if ou_name is not None:
             # If OU known, search it instead of the entire org; supports nested OU format
             # NOTE: Be careful using this parameter as the OU in account request is
@@ -306,14 +835,82 @@ class OrganizationsAgent:
     def get_aft_account_info(self, account_id: str) -> AftAccountInfo:
         logger.info(f"Getting details for {account_id}")
 
-        describe_response = self.orgs_client.describe_account(AccountId=account_id)
-        account = describe_response["Account"]
+        account: Optional[AccountTypeDef] = None
+        parent: Optional[ParentTypeDef] = None
+        if self.snapshot is not None:
+            account = self.snapshot.get_account(account_id)
+            parent = self.snapshot.get_parent(account_id)
 
-        # NOTE: Assumes single-parent accounts
-        parents = self.get_parents_from_account_id(account_id=account_id)
-        parent = parents[0]
+        if account is None or parent is None:
+            describe_response = self.orgs_client.describe_account(AccountId=account_id)
+            account = describe_response["Account"]
+
+            # NOTE: Assumes single-parent accounts
+            parents = self.get_parents_from_account_id(account_id=account_id)
+            parent = parents[0]
+
+        aft_account_info = OrganizationsAgent._build_aft_account_info(
+            account=account, parent=parent
+        )
+
+        logger.info(f"Account details: {aft_account_info}")
 
-        aft_account_info = AftAccountInfo(
+        return aft_account_info
+
+    def get_aft_account_infos(
+        self, account_ids: List[str]
+    ) -> Dict[str, AftAccountInfo]:
+        """
+        Builds the AftAccountInfo of many accounts from per-OU account listings
+        rather than a DescribeAccount and ListParents call per account; the OU an
+        account is listed under is its parent. Accounts not found in the listings
+        fall back to get_aft_account_info, and are omitted if they do not exist.
+        """
+        logger.info(f"Getting details for {len(account_ids)} accounts")
+        account_infos: Dict[str, AftAccountInfo] = {}
+
+        if self.snapshot is not None:
+            for account_id in account_ids:
+                account = self.snapshot.get_account(account_id)
+                parent = self.snapshot.get_parent(account_id)
+                if account is not None and parent is not None:
+                    account_infos[account_id] = self._build_aft_account_info(
+                        account=account, parent=parent
+                    )
+        elif len(account_ids) >= self.BULK_ACCOUNT_INFO_MIN_ACCOUNTS:
+            target_account_ids = set(account_ids)
+            tree = self.crawl_ou_tree(include_accounts=True)
+            for parent_id, accounts in tree.accounts_by_parent.items():
+                ou_parent: ParentTypeDef = {
+                    "Id": parent_id,
+                    "Type": "ORGANIZATIONAL_UNIT",
+                }
+                if parent_id == tree.root["Id"]:
+                    ou_parent = {"Id": parent_id, "Type": "ROOT"}
+                for account in accounts:
+                    if account["Id"] in target_account_ids:
+                        account_infos[account["Id"]] = self._build_aft_account_info(
+                            account=account, parent=ou_parent
+                        )
+
+        for account_id in account_ids:
+            if account_id in account_infos:
+                continue
+            try:
+                account_infos[account_id] = self.get_aft_account_info(
+                    account_id=account_id
+                )
+            except ClientError as error:
+                if error.response["Error"]["Code"] != "AccountNotFoundException":
+                    raise
+                logger.info(f"Account {account_id} not found in the organization")
+        return account_infos
+
+    @staticmethod
+    def _build_aft_account_info(
+        account: AccountTypeDef, parent: ParentTypeDef
+    ) -> AftAccountInfo:
+        return AftAccountInfo(
             id=account["Id"],
             email=account["Email"],
             name=account["Name"],
@@ -325,7 +922,3 @@ class OrganizationsAgent:
             type="account",
             vendor="aws",
         )
-
-        logger.info(f"Account details: {aft_account_info}")
-
-        return aft_account_info
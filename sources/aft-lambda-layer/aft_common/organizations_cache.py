@@ -0,0 +1,664 @@
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import logging
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, cast
+
+from aft_common.aft_types import AccountState
+from aft_common.aft_utils import sanitize_input_for_logging
+from aft_common.constants import SSM_PARAM_AFT_DDB_CACHE_TABLE
+from aft_common.organizations import OrganizationsAgent, OrganizationSnapshot
+from aft_common.ssm import get_ssm_parameter_value
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.session import Session
+from botocore.exceptions import ClientError
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb.service_resource import Table
+    from mypy_boto3_organizations.type_defs import (
+        AccountTypeDef,
+        OrganizationalUnitTypeDef,
+        ParentTypeDef,
+    )
+else:
+    Table = object
+    AccountTypeDef = object
+    OrganizationalUnitTypeDef = object
+    ParentTypeDef = object
+
+logger = logging.getLogger("aft")
+
+# Per-container cache of the last snapshot read from the table, keyed by table name.
+# Reused for as long as the persisted snapshot ID and version are unchanged
+_snapshot_cache: Dict[str, Tuple[str, int, OrganizationSnapshot]] = {}
+
+
+class OrganizationSnapshotStore:
+    """
+    Persists the organization snapshot in the AFT cache table so it is shared across
+    Lambda invocations and containers. The snapshot is stored as one item per account
+    and per OU, sorted under the snapshot ID so that a snapshot is read with a single
+    key-bounded query, plus a metadata item holding the current snapshot ID, its
+    version and its expiry. Organizations events update the items in place and bump
+    the version; events that cannot be applied invalidate the snapshot.
+    """
+
+    PARTITION_KEY = "organization"
+    META_SORT_KEY = "meta"
+    ACCOUNT_SORT_KEY_PREFIX = "account#"
+    OU_SORT_KEY_PREFIX = "ou#"
+    DEFAULT_TTL_SECONDS = 900
+
+    # Events which only touch data not held in the snapshot, tag events are
+    # applied by AccountTagIndexStore
+    IGNORED_EVENTS = ["TagResource", "UntagResource"]
+
+    def __init__(
+        self,
+        aft_management_session: Session,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+        self.ttl_seconds = ttl_seconds
+
+    def get_snapshot(self, orgs_agent: OrganizationsAgent) -> OrganizationSnapshot:
+        """
+        Returns the persisted snapshot if it has not expired, crawling the
+        organization and persisting a new snapshot otherwise
+        """
+        meta = self._get_meta()
+        if meta is not None:
+            snapshot_id = str(meta["snapshot_id"])
+            version = int(meta["version"])
+            cached = _snapshot_cache.get(self.table_name)
+            if cached is not None and cached[:2] == (snapshot_id, version):
+                logger.info(
+                    f"Using cached organization snapshot {snapshot_id} (version {version})"
+                )
+                return cached[2]
+
+            snapshot = self._load_snapshot(snapshot_id=snapshot_id, root=meta["root"])
+            logger.info(
+                f"Loaded persisted organization snapshot {snapshot_id} (version {version})"
+            )
+            _snapshot_cache[self.table_name] = (snapshot_id, version, snapshot)
+            return snapshot
+
+        snapshot = orgs_agent.build_snapshot()
+        self.put_snapshot(snapshot=snapshot)
+        return snapshot
+
+    def put_snapshot(self, snapshot: OrganizationSnapshot) -> None:
+        snapshot_id = str(uuid.uuid4())
+        expires_at = int(time.time()) + self.ttl_seconds
+        logger.info(f"Persisting organization snapshot {snapshot_id}")
+
+        # Items are written before the metadata item so readers never observe a
+        # partially written snapshot. Items of replaced snapshots sort under their
+        # own snapshot ID, so they are never read, and are removed by the table TTL
+        with self.table.batch_writer() as batch:
+            for ou_id, ou in snapshot.ous_by_id.items():
+                if ou_id == snapshot.root["Id"]:
+                    continue
+                batch.put_item(
+                    Item=self._build_ou_item(
+                        snapshot_id=snapshot_id,
+                        expires_at=expires_at,
+                        ou=ou,
+                        parent_id=snapshot.ou_parent_ids[ou_id],
+                    )
+                )
+            for account_id, account in snapshot.accounts_by_id.items():
+                batch.put_item(
+                    Item=self._build_account_item(
+                        snapshot_id=snapshot_id,
+                        expires_at=expires_at,
+                        account=account,
+                        parent=snapshot.account_parents[account_id],
+                    )
+                )
+
+        response = self.table.update_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY},
+            UpdateExpression="SET snapshot_id = :snapshot_id, root = :root, built_at = :built_at, expires_at = :expires_at ADD version :one",
+            ExpressionAttributeValues={
+                ":snapshot_id": snapshot_id,
+                ":root": dict(snapshot.root),
+                ":built_at": datetime.now().isoformat(),
+                ":expires_at": expires_at,
+                ":one": 1,
+            },
+            ReturnValues="UPDATED_NEW",
+        )
+        version = int(cast(int, response["Attributes"]["version"]))
+        _snapshot_cache[self.table_name] = (snapshot_id, version, snapshot)
+
+    def invalidate(self) -> None:
+        logger.info("Invalidating persisted organization snapshot")
+        self.table.delete_item(Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY})
+        _snapshot_cache.pop(self.table_name, None)
+
+    def apply_event(
+        self, event: Dict[str, Any], orgs_agent: OrganizationsAgent
+    ) -> None:
+        """
+        Applies an Organizations CloudTrail event to the persisted snapshot. Events
+        that cannot be applied incrementally invalidate the snapshot so the next
+        reader re-crawls the organization
+        """
+        detail = event.get("detail", {})
+        event_name = detail.get("eventName")
+        logger.info(
+            f"Applying Organizations event {sanitize_input_for_logging(event_name)} to snapshot"
+        )
+
+        if event_name in OrganizationSnapshotStore.IGNORED_EVENTS or (
+            event_name == "CreateAccountResult"
+            and detail.get("serviceEventDetails", {})
+            .get("createAccountStatus", {})
+            .get("state")
+            != "SUCCEEDED"
+        ):
+            logger.info("Event does not affect the organization snapshot")
+            return
+
+        meta = self._get_meta()
+        if meta is None:
+            logger.info("No current organization snapshot, nothing to update")
+            return
+        snapshot_id = str(meta["snapshot_id"])
+        expires_at = int(meta["expires_at"])
+
+        try:
+            applied = self._apply_event_detail(
+                event_name=event_name,
+                detail=detail,
+                snapshot_id=snapshot_id,
+                expires_at=expires_at,
+                orgs_agent=orgs_agent,
+            )
+        except (KeyError, IndexError, TypeError) as error:
+            logger.warning(f"Unable to parse Organizations event: {error}")
+            applied = False
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            logger.info("Snapshot item not found for event")
+            applied = False
+
+        if not applied:
+            self.invalidate()
+            return
+
+        try:
+            self.table.update_item(
+                Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY},
+                UpdateExpression="ADD version :one",
+                ConditionExpression="snapshot_id = :snapshot_id",
+                ExpressionAttributeValues={":one": 1, ":snapshot_id": snapshot_id},
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            # A newer snapshot was persisted while the event was being applied
+            logger.info("Organization snapshot replaced, skipping version update")
+
+    def _apply_event_detail(
+        self,
+        event_name: str,
+        detail: Dict[str, Any],
+        snapshot_id: str,
+        expires_at: int,
+        orgs_agent: OrganizationsAgent,
+    ) -> bool:
+        request_parameters = detail.get("requestParameters") or {}
+
+        if event_name == "MoveAccount":
+            destination_id = request_parameters["destinationParentId"]
+            parent: ParentTypeDef = {
+                "Id": destination_id,
+                "Type": "ORGANIZATIONAL_UNIT",
+            }
+            if destination_id.startswith("r-"):
+                parent = {"Id": destination_id, "Type": "ROOT"}
+            self._update_item(
+                sort_key=self._account_sort_key(
+                    snapshot_id, request_parameters["accountId"]
+                ),
+                snapshot_id=snapshot_id,
+                update_expression="SET parent = :parent",
+                values={":parent": dict(parent)},
+            )
+            return True
+
+        if event_name == "CreateAccountResult":
+            account_id = detail["serviceEventDetails"]["createAccountStatus"][
+                "accountId"
+            ]
+            account = orgs_agent.orgs_client.describe_account(AccountId=account_id)[
+                "Account"
+            ]
+            # NOTE: Assumes single-parent accounts
+            parent = orgs_agent.get_parents_from_account_id(account_id=account_id)[0]
+            self.table.put_item(
+                Item=self._build_account_item(
+                    snapshot_id=snapshot_id,
+                    expires_at=expires_at,
+                    account=account,
+                    parent=parent,
+                )
+            )
+            return True
+
+        if event_name == "CloseAccount":
+            self._update_item(
+                sort_key=self._account_sort_key(
+                    snapshot_id, request_parameters["accountId"]
+                ),
+                snapshot_id=snapshot_id,
+                update_expression="SET account.#status = :status",
+                values={":status": "PENDING_CLOSURE"},
+                names={"#status": "Status"},
+            )
+            return True
+
+        if event_name == "RemoveAccountFromOrganization":
+            self.table.delete_item(
+                Key={
+                    "pk": self.PARTITION_KEY,
+                    "sk": self._account_sort_key(
+                        snapshot_id, request_parameters["accountId"]
+                    ),
+                }
+            )
+            return True
+
+        if event_name == "CreateOrganizationalUnit":
+            created_ou = detail["responseElements"]["organizationalUnit"]
+            ou: OrganizationalUnitTypeDef = {
+                "Id": created_ou["id"],
+                "Arn": created_ou["arn"],
+                "Name": created_ou["name"],
+            }
+            self.table.put_item(
+                Item=self._build_ou_item(
+                    snapshot_id=snapshot_id,
+                    expires_at=expires_at,
+                    ou=ou,
+                    parent_id=request_parameters["parentId"],
+                )
+            )
+            return True
+
+        if event_name == "UpdateOrganizationalUnit":
+            self._update_item(
+                sort_key=self._ou_sort_key(
+                    snapshot_id, request_parameters["organizationalUnitId"]
+                ),
+                snapshot_id=snapshot_id,
+                update_expression="SET ou.#name = :name",
+                values={":name": request_parameters["name"]},
+                names={"#name": "Name"},
+            )
+            return True
+
+        if event_name == "DeleteOrganizationalUnit":
+            self.table.delete_item(
+                Key={
+                    "pk": self.PARTITION_KEY,
+                    "sk": self._ou_sort_key(
+                        snapshot_id, request_parameters["organizationalUnitId"]
+                    ),
+                }
+            )
+            return True
+
+        return False
+
+    def _account_sort_key(self, snapshot_id: str, account_id: str) -> str:
+        return f"{snapshot_id}#{self.ACCOUNT_SORT_KEY_PREFIX}{account_id}"
+
+    def _ou_sort_key(self, snapshot_id: str, ou_id: str) -> str:
+        return f"{snapshot_id}#{self.OU_SORT_KEY_PREFIX}{ou_id}"
+
+    def _update_item(
+        self,
+        sort_key: str,
+        snapshot_id: str,
+        update_expression: str,
+        values: Dict[str, Any],
+        names: Optional[Dict[str, str]] = None,
+    ) -> None:
+        # Only update items belonging to the current snapshot; a missing item
+        # raises ConditionalCheckFailedException and invalidates the snapshot
+        kwargs: Dict[str, Any] = {}
+        if names is not None:
+            kwargs["ExpressionAttributeNames"] = names
+        self.table.update_item(
+            Key={"pk": self.PARTITION_KEY, "sk": sort_key},
+            UpdateExpression=update_expression,
+            ConditionExpression="snapshot_id = :snapshot_id",
+            ExpressionAttributeValues={":snapshot_id": snapshot_id, **values},
+            **kwargs,
+        )
+
+    def _get_meta(self) -> Optional[Dict[str, Any]]:
+        response = self.table.get_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY},
+            ConsistentRead=True,
+        )
+        meta: Optional[Dict[str, Any]] = response.get("Item")
+        if meta is None or "snapshot_id" not in meta:
+            return None
+        if int(meta["expires_at"]) <= int(time.time()):
+            logger.info("Persisted organization snapshot has expired")
+            return None
+        return meta
+
+    def _load_snapshot(
+        self, snapshot_id: str, root: Dict[str, Any]
+    ) -> OrganizationSnapshot:
+        ous: List[OrganizationalUnitTypeDef] = []
+        ou_parent_ids: Dict[str, str] = {}
+        accounts: List[AccountTypeDef] = []
+        account_parents: Dict[str, ParentTypeDef] = {}
+
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.PARTITION_KEY)
+            & Key("sk").begins_with(f"{snapshot_id}#"),
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            for item in response["Items"]:
+                if "account" in item:
+                    account = cast(Dict[str, Any], item["account"])
+                    account["JoinedTimestamp"] = datetime.fromisoformat(
+                        account["JoinedTimestamp"]
+                    )
+                    accounts.append(cast(AccountTypeDef, account))
+                    account_parents[account["Id"]] = cast(ParentTypeDef, item["parent"])
+                elif "ou" in item:
+                    ou = cast(OrganizationalUnitTypeDef, item["ou"])
+                    ous.append(ou)
+                    ou_parent_ids[ou["Id"]] = str(item["parent_id"])
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+        return OrganizationSnapshot(
+            root=cast(OrganizationalUnitTypeDef, root),
+            ous=ous,
+            ou_parent_ids=ou_parent_ids,
+            accounts=accounts,
+            account_parents=account_parents,
+        )
+
+    def _build_ou_item(
+        self,
+        snapshot_id: str,
+        expires_at: int,
+        ou: OrganizationalUnitTypeDef,
+        parent_id: str,
+    ) -> Dict[str, Any]:
+        return {
+            "pk": self.PARTITION_KEY,
+            "sk": self._ou_sort_key(snapshot_id, ou["Id"]),
+            "snapshot_id": snapshot_id,
+            "expires_at": expires_at,
+            "ou": dict(ou),
+            "parent_id": parent_id,
+        }
+
+    def _build_account_item(
+        self,
+        snapshot_id: str,
+        expires_at: int,
+        account: AccountTypeDef,
+        parent: ParentTypeDef,
+    ) -> Dict[str, Any]:
+        serialized_account: Dict[str, Any] = dict(account)
+        serialized_account["JoinedTimestamp"] = account["JoinedTimestamp"].isoformat()
+        return {
+            "pk": self.PARTITION_KEY,
+            "sk": self._account_sort_key(snapshot_id, account["Id"]),
+            "snapshot_id": snapshot_id,
+            "expires_at": expires_at,
+            "account": serialized_account,
+            "parent": {"Id": parent["Id"], "Type": parent["Type"]},
+        }
+
+
+class AccountTagIndexStore:
+    """
+    Persists account tags in the AFT cache table, one item per account, so the
+    tags fetched by one invocation are reused by others. Items expire after the
+    TTL and are refreshed in place by TagResource/UntagResource events.
+    """
+
+    PARTITION_KEY = "account-tags"
+    ACCOUNT_SORT_KEY_PREFIX = "account#"
+    DEFAULT_TTL_SECONDS = 900
+    TAG_EVENTS = ["TagResource", "UntagResource"]
+    ACCOUNT_ID_PATTERN = r"^\d{12}$"
+
+    def __init__(
+        self,
+        aft_management_session: Session,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+        self.ttl_seconds = ttl_seconds
+
+    def get_account_tags(
+        self, orgs_agent: OrganizationsAgent, account_ids: List[str]
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Returns the tags of the given accounts, reading unexpired items from the
+        table and fetching and persisting the tags of the remaining accounts
+        """
+        account_tags = self._load_account_tags()
+        missing_account_ids = [
+            account_id for account_id in account_ids if account_id not in account_tags
+        ]
+        logger.info(
+            f"Loaded tags of {len(account_ids) - len(missing_account_ids)} accounts from cache, fetching {len(missing_account_ids)}"
+        )
+        if len(missing_account_ids) == 0:
+            return account_tags
+
+        fetched_tags = orgs_agent.list_tags_for_accounts(
+            account_ids=missing_account_ids
+        )
+        expires_at = int(time.time()) + self.ttl_seconds
+        with self.table.batch_writer() as batch:
+            for account_id, tags in fetched_tags.items():
+                batch.put_item(
+                    Item=self._build_item(
+                        account_id=account_id, tags=tags, expires_at=expires_at
+                    )
+                )
+        account_tags.update(fetched_tags)
+        return account_tags
+
+    def apply_event(
+        self, event: Dict[str, Any], orgs_agent: OrganizationsAgent
+    ) -> None:
+        """
+        Refreshes the persisted tags of an account after a TagResource or
+        UntagResource event. Tags of OUs, roots and policies are not indexed
+        """
+        detail = event.get("detail", {})
+        if detail.get("eventName") not in AccountTagIndexStore.TAG_EVENTS:
+            return
+        resource_id = (detail.get("requestParameters") or {}).get("resourceId")
+        if not isinstance(resource_id, str) or not re.match(
+            AccountTagIndexStore.ACCOUNT_ID_PATTERN, resource_id
+        ):
+            logger.info("Tag event does not target an account, ignoring")
+            return
+
+        logger.info(
+            f"Refreshing cached tags for account {sanitize_input_for_logging(resource_id)}"
+        )
+        tags = orgs_agent.list_tags_for_accounts(account_ids=[resource_id])[resource_id]
+        self.table.put_item(
+            Item=self._build_item(
+                account_id=resource_id,
+                tags=tags,
+                expires_at=int(time.time()) + self.ttl_seconds,
+            )
+        )
+
+    def _load_account_tags(self) -> Dict[str, Dict[str, str]]:
+        account_tags: Dict[str, Dict[str, str]] = {}
+        # Items are replaced in place, so the partition holds at most one item per
+        # account. TTL deletion is not immediate, expired items are filtered out
+        # before they are returned
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.PARTITION_KEY),
+            "FilterExpression": Attr("expires_at").gt(int(time.time())),
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            for item in response["Items"]:
+                account_id = str(item["sk"])[len(self.ACCOUNT_SORT_KEY_PREFIX) :]
+                account_tags[account_id] = cast(Dict[str, str], item["tags"])
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        return account_tags
+
+    def _build_item(
+        self, account_id: str, tags: Dict[str, str], expires_at: int
+    ) -> Dict[str, Any]:
+        return {
+            "pk": self.PARTITION_KEY,
+            "sk": self.ACCOUNT_SORT_KEY_PREFIX + account_id,
+            "expires_at": expires_at,
+            "tags": tags,
+        }
+
+
+class OrganizationBaselineStore:
+    """
+    Persists named baselines of account states in the AFT cache table. A baseline
+    records the organization as it was at the last successful customization run
+    using it, so the next run can target only what changed. Each recorded baseline
+    is a generation of one item per account, sorted under the generation ID, which
+    the baseline's metadata item points to once it is fully written.
+    """
+
+    PARTITION_KEY_PREFIX = "baseline#"
+    META_SORT_KEY = "meta"
+    ACCOUNT_SORT_KEY_PREFIX = "account#"
+    DEFAULT_BASELINE_NAME = "default"
+
+    def __init__(self, aft_management_session: Session) -> None:
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+
+    def get_account_states(
+        self, baseline_name: str = DEFAULT_BASELINE_NAME
+    ) -> Dict[str, AccountState]:
+        partition_key = self.PARTITION_KEY_PREFIX + baseline_name
+        meta = self.table.get_item(
+            Key={"pk": partition_key, "sk": self.META_SORT_KEY},
+            ConsistentRead=True,
+        ).get("Item")
+        if meta is None:
+            return {}
+        generation = str(meta["generation"])
+        prefix = f"{generation}#{self.ACCOUNT_SORT_KEY_PREFIX}"
+        account_states: Dict[str, AccountState] = {}
+        for item in self._query_generation(partition_key, generation):
+            account_id = str(item["sk"])[len(prefix) :]
+            account_states[account_id] = {
+                "parent_id": str(item["parent_id"]),
+                "status": str(item["status"]),
+                "tags": cast(Dict[str, str], item["tags"]),
+            }
+        return account_states
+
+    def put_account_states(
+        self,
+        account_states: Dict[str, AccountState],
+        baseline_name: str = DEFAULT_BASELINE_NAME,
+        generation: Optional[str] = None,
+    ) -> None:
+        """
+        Records account states as a new generation of a baseline. Recording the same
+        generation again, such as a retried run, is idempotent
+        """
+        if generation is None:
+            generation = str(uuid.uuid4())
+        logger.info(
+            f"Recording baseline {sanitize_input_for_logging(baseline_name)} of {len(account_states)} accounts"
+        )
+        partition_key = self.PARTITION_KEY_PREFIX + baseline_name
+        with self.table.batch_writer() as batch:
+            for account_id, account_state in account_states.items():
+                batch.put_item(
+                    Item={
+                        "pk": partition_key,
+                        "sk": f"{generation}#{self.ACCOUNT_SORT_KEY_PREFIX}{account_id}",
+                        "parent_id": account_state["parent_id"],
+                        "status": account_state["status"],
+                        "tags": account_state["tags"],
+                    }
+                )
+
+        # The generation replaced is returned atomically, so that concurrent writers
+        # each delete the generation they replaced
+        replaced = self.table.put_item(
+            Item={
+                "pk": partition_key,
+                "sk": self.META_SORT_KEY,
+                "generation": generation,
+                "recorded_at": datetime.now().isoformat(),
+            },
+            ReturnValues="ALL_OLD",
+        ).get("Attributes")
+        if replaced is None or replaced["generation"] == generation:
+            return
+        with self.table.batch_writer() as batch:
+            for item in self._query_generation(
+                partition_key, str(replaced["generation"]), projection="pk, sk"
+            ):
+                batch.delete_item(Key={"pk": item["pk"], "sk": item["sk"]})
+
+    def _query_generation(
+        self, partition_key: str, generation: str, projection: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(partition_key)
+            & Key("sk").begins_with(f"{generation}#"),
+            "ConsistentRead": True,
+        }
+        if projection is not None:
+            kwargs["ProjectionExpression"] = projection
+        while True:
+            response = self.table.query(**kwargs)
+            yield from response["Items"]
+            if "LastEvaluatedKey" not in response:
+                return
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
@@ -3,28 +3,165 @@
 #
 import json
 import logging
-from typing import TYPE_CHECKING, List
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Type
 
 from boto3.session import Session
 
 logger = logging.getLogger("aft")
 
 if TYPE_CHECKING:
-    from aft_common.aft_types import AftInvokeAccountCustomizationPayload
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import CompletedPartTypeDef
 else:
-    AftInvokeAccountCustomizationPayload = object
+    S3Client = object
+    CompletedPartTypeDef = object
 
 
-def put_target_account_info(
+def put_target_account_info_manifest(
     session: Session,
     bucket: str,
     key: str,
-    target_account_info: List[AftInvokeAccountCustomizationPayload],
+    chunks: List[Dict[str, Any]],
 ) -> None:
 
     s3 = session.resource("s3")
-    json_data = json.dumps(target_account_info)
+    json_data = json.dumps({"bucket": bucket, "chunks": chunks})
 
-    logger.info(f"Uploading target account info to s3://{bucket}/{key}")
+    logger.info(f"Uploading target account info manifest to s3://{bucket}/{key}")
     s3.Object(bucket, key).put(Body=json_data)
-    logger.info(f"Successfully uploaded target account info to s3://{bucket}/{key}")
+    logger.info(
+        f"Successfully uploaded target account info manifest to s3://{bucket}/{key}"
+    )
+
+
+class JsonLinesMultipartWriter:
+    """
+    Streams records to an S3 object as JSON Lines. Serialized records are buffered
+    only until a part is full, so memory is bounded by the part size rather than by
+    the object size. Objects smaller than one part are written with a single put.
+    """
+
+    MIN_PART_SIZE_BYTES = 5 * 1024 * 1024
+
+    def __init__(
+        self,
+        session: Session,
+        bucket: str,
+        key: str,
+        part_size_bytes: int = MIN_PART_SIZE_BYTES,
+    ) -> None:
+        self.client: S3Client = session.client("s3")
+        self.bucket = bucket
+        self.key = key
+        self.part_size_bytes = max(part_size_bytes, self.MIN_PART_SIZE_BYTES)
+        self.record_count = 0
+        self._buffer: List[bytes] = []
+        self._buffer_size = 0
+        self._upload_id: Optional[str] = None
+        self._parts: List[CompletedPartTypeDef] = []
+
+    def __enter__(self) -> "JsonLinesMultipartWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, record: Any) -> None:
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        self._buffer.append(line)
+        self._buffer_size += len(line)
+        self.record_count += 1
+        if self._buffer_size >= self.part_size_bytes:
+            self._upload_part()
+
+    def close(self) -> None:
+        if self._upload_id is None:
+            logger.info(
+                f"Uploading {self.record_count} records to s3://{self.bucket}/{self.key}"
+            )
+            self.client.put_object(
+                Bucket=self.bucket, Key=self.key, Body=b"".join(self._buffer)
+            )
+        else:
+            if self._buffer:
+                self._upload_part()
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+            logger.info(
+                f"Completed upload of {self.record_count} records in {len(self._parts)} parts to s3://{self.bucket}/{self.key}"
+            )
+        self._buffer = []
+        self._buffer_size = 0
+
+    def abort(self) -> None:
+        if self._upload_id is not None:
+            logger.info(f"Aborting multipart upload to s3://{self.bucket}/{self.key}")
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+            self._upload_id = None
+        self._buffer = []
+        self._buffer_size = 0
+
+    def _upload_part(self) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )["UploadId"]
+        part_number = len(self._parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=b"".join(self._buffer),
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self._buffer = []
+        self._buffer_size = 0
+
+
+def put_json_lines_chunks(
+    session: Session,
+    bucket: str,
+    key_prefix: str,
+    records: Iterable[Any],
+    chunk_size: int,
+) -> List[Dict[str, Any]]:
+    """
+    Writes records as consecutive JSON Lines objects of at most chunk_size records
+    each, consuming the iterable lazily. Returns the manifest of written chunks
+    """
+    chunks: List[Dict[str, Any]] = []
+    writer: Optional[JsonLinesMultipartWriter] = None
+    try:
+        for record in records:
+            if writer is None:
+                key = f"{key_prefix}/chunk-{len(chunks):05d}.jsonl"
+                writer = JsonLinesMultipartWriter(session, bucket, key)
+            writer.write(record)
+            if writer.record_count == chunk_size:
+                writer.close()
+                chunks.append({"key": writer.key, "count": writer.record_count})
+                writer = None
+        if writer is not None:
+            writer.close()
+            chunks.append({"key": writer.key, "count": writer.record_count})
+            writer = None
+    finally:
+        if writer is not None:
+            writer.abort()
+    return chunks
@@ -2,6 +2,9 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 import logging
+import threading
+import time
+import uuid
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -13,30 +16,47 @@ from typing import (
     Mapping,
     Optional,
     Sequence,
+    Tuple,
+    cast,
 )
 
 from aft_common import aft_utils as utils
 from aft_common import ddb
 from aft_common.account_provisioning_framework import ProvisionRoles
+from aft_common.aft_types import AccountFactoryProduct, ProvisionedProductRecord
 from aft_common.auth import AuthClient
-from aft_common.constants import SSM_PARAM_SC_PRODUCT_NAME
+from aft_common.constants import (
+    SSM_PARAM_AFT_DDB_CACHE_TABLE,
+    SSM_PARAM_SC_PRODUCT_NAME,
+)
 from aft_common.organizations import OrganizationsAgent
+from aft_common.organizations_cache import OrganizationSnapshotStore
 from aft_common.ssm import get_ssm_parameter_value
+from boto3.dynamodb.conditions import Key
 from boto3.session import Session
 
 if TYPE_CHECKING:
+    from mypy_boto3_dynamodb.service_resource import Table
     from mypy_boto3_servicecatalog import ServiceCatalogClient
     from mypy_boto3_servicecatalog.type_defs import (
         ProvisionedProductAttributeTypeDef,
         SearchProvisionedProductsOutputTypeDef,
     )
 else:
+    Table = object
     ServiceCatalogClient = object
     SearchProvisionedProductsOutputTypeDef = object
     ProvisionedProductAttributeTypeDef = object
 
 logger = logging.getLogger("aft")
 
+# Per-container cache of the resolved Account Factory product, keyed by table name
+_product_cache: Dict[str, AccountFactoryProduct] = {}
+
+# Per-container cache of the last provisioned product mirror read from the table,
+# keyed by table name. Reused for as long as the mirror ID and version are unchanged
+_mirror_cache: Dict[str, Tuple[str, int, Dict[str, ProvisionedProductRecord]]] = {}
+
 
 def get_ct_product_id(session: Session, ct_management_session: Session) -> str:
     client: ServiceCatalogClient = ct_management_session.client("servicecatalog")
@@ -92,6 +112,487 @@ def get_ct_provisioning_artifact_id(
     raise Exception("No Provisioning Artifact ID found")
 
 
+class AccountFactoryProductResolver:
+    """
+    Resolves the Control Tower Account Factory product and its active provisioning
+    artifacts with two Service Catalog calls, instead of describing the product and
+    each of its artifacts per account request. The resolution is cached per
+    container and in the AFT cache table until it expires. Callers invalidate it
+    when the resolved artifact may have been deactivated, e.g. on a failed request.
+    """
+
+    PARTITION_KEY = "account-factory-product"
+    SORT_KEY = "meta"
+    DEFAULT_TTL_SECONDS = 3600
+
+    def __init__(
+        self,
+        aft_management_session: Session,
+        ct_management_session: Session,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.ct_management_session = ct_management_session
+        self.product_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_SC_PRODUCT_NAME
+        )
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def product_id(self) -> str:
+        return self.get_product()["product_id"]
+
+    @property
+    def provisioning_artifact_id(self) -> str:
+        return self.get_product()["provisioning_artifact_id"]
+
+    def is_artifact_active(self, artifact_id: str) -> bool:
+        return artifact_id in self.get_product()["active_provisioning_artifact_ids"]
+
+    def get_product(self) -> AccountFactoryProduct:
+        now = int(time.time())
+        cached = _product_cache.get(self.table_name)
+        if self._is_current(cached, now):
+            return cast(AccountFactoryProduct, cached)
+
+        item = self.table.get_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self.SORT_KEY}
+        ).get("Item")
+        product: Optional[AccountFactoryProduct] = None
+        if item is not None:
+            product = {
+                "product_name": str(item["product_name"]),
+                "product_id": str(item["product_id"]),
+                "provisioning_artifact_id": str(item["provisioning_artifact_id"]),
+                "active_provisioning_artifact_ids": [
+                    str(artifact_id)
+                    for artifact_id in cast(
+                        List[Any], item["active_provisioning_artifact_ids"]
+                    )
+                ],
+                "expires_at": int(cast(int, item["expires_at"])),
+            }
+        if not self._is_current(product, now):
+            product = self._resolve(expires_at=now + self.ttl_seconds)
+            self.table.put_item(
+                Item={
+                    "pk": self.PARTITION_KEY,
+                    "sk": self.SORT_KEY,
+                    **cast(Dict[str, Any], product),
+                }
+            )
+        product = cast(AccountFactoryProduct, product)
+        _product_cache[self.table_name] = product
+        return product
+
+    def invalidate(self) -> None:
+        logger.info("Invalidating resolved Account Factory product")
+        _product_cache.pop(self.table_name, None)
+        self.table.delete_item(Key={"pk": self.PARTITION_KEY, "sk": self.SORT_KEY})
+
+    def _is_current(self, product: Optional[AccountFactoryProduct], now: int) -> bool:
+        return (
+            product is not None
+            and product["product_name"] == self.product_name
+            and product["expires_at"] > now
+        )
+
+    def _resolve(self, expires_at: int) -> AccountFactoryProduct:
+        client: ServiceCatalogClient = self.ct_management_session.client(
+            "servicecatalog", config=utils.get_high_retry_botoconfig()
+        )
+        logger.info("Resolving Account Factory product " + self.product_name)
+        response = client.describe_product_as_admin(Name=self.product_name)
+        product_id = response["ProductViewDetail"]["ProductViewSummary"]["ProductId"]
+        active_ids = [
+            artifact["Id"]
+            for artifact in client.list_provisioning_artifacts(ProductId=product_id)[
+                "ProvisioningArtifactDetails"
+            ]
+            if artifact.get("Active")
+        ]
+        # Artifacts are tried in the order described, as get_ct_provisioning_artifact_id does
+        artifact_ids = [
+            artifact["Id"]
+            for artifact in response["ProvisioningArtifactSummaries"]
+            if artifact["Id"] in active_ids
+        ]
+        if len(artifact_ids) == 0:
+            raise Exception("No Provisioning Artifact ID found")
+        logger.info(
+            f"Using product ID {product_id} and provisioning artifact ID {artifact_ids[0]}"
+        )
+        return {
+            "product_name": self.product_name,
+            "product_id": product_id,
+            "provisioning_artifact_id": artifact_ids[0],
+            "active_provisioning_artifact_ids": active_ids,
+            "expires_at": expires_at,
+        }
+
+
+class ProvisionedProductMirror:
+    """
+    Mirror of the Control Tower account provisioned products, indexed by account ID
+    (physicalId). Built from one paginated search and persisted in the AFT cache
+    table as one item per product plus a metadata item, so that it is shared across
+    invocations. The metadata item also records the page reached by a build in
+    progress, so that a build cut short by the Lambda timeout is resumed by the next
+    invocation instead of restarted. Control Tower lifecycle events refresh the
+    products of their account; lookups that miss refresh the account too, so a
+    stale mirror costs one search rather than a wrong answer.
+    """
+
+    PARTITION_KEY = "provisioned-products"
+    META_SORT_KEY = "meta"
+    PRODUCT_SORT_KEY_PREFIX = "product#"
+    DEFAULT_TTL_SECONDS = 3600
+    CT_ACCOUNT_PRODUCT_QUERY = "type:CONTROL_TOWER_ACCOUNT"
+
+    def __init__(
+        self,
+        aft_management_session: Session,
+        ct_management_session: Session,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.table_name = get_ssm_parameter_value(
+            aft_management_session, SSM_PARAM_AFT_DDB_CACHE_TABLE
+        )
+        self.table: Table = aft_management_session.resource("dynamodb").Table(
+            self.table_name
+        )
+        self.sc_client: ServiceCatalogClient = ct_management_session.client(
+            "servicecatalog", config=utils.get_high_retry_botoconfig()
+        )
+        self.ttl_seconds = ttl_seconds
+        self._mirror_id: Optional[str] = None
+        self._expires_at = 0
+        self.products: Dict[str, ProvisionedProductRecord] = {}
+        self.products_by_account_id: Dict[str, List[ProvisionedProductRecord]] = {}
+        # Mirrors may be shared by threads, which load and refresh it in turn
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def is_healthy(product: ProvisionedProductRecord) -> bool:
+        # Matches ct_account_product_is_healthy
+        return product["status"] in ["AVAILABLE", "TAINTED"] and bool(
+            product["last_successful_provisioning_record_id"]
+        )
+
+    def get_healthy_product(
+        self, account_id: str
+    ) -> Optional[ProvisionedProductRecord]:
+        product = self._find_healthy_product(account_id)
+        if product is None:
+            logger.info("No healthy provisioned product mirrored for account")
+            self.refresh_account(account_id)
+            product = self._find_healthy_product(account_id)
+        return product
+
+    def get_current_healthy_product(
+        self, account_id: str
+    ) -> Optional[ProvisionedProductRecord]:
+        """
+        Returns the healthy provisioned product of an account after re-reading it,
+        for callers about to act on it. The account is refreshed if the product is
+        no longer healthy or has changed since it was mirrored
+        """
+        product = self.get_healthy_product(account_id)
+        if product is None or self._is_current(product):
+            return product
+        logger.info("Mirrored provisioned product outdated, refreshing account")
+        self.refresh_account(account_id)
+        return self._find_healthy_product(account_id)
+
+    def refresh_account(self, account_id: str) -> None:
+        """Replaces the mirrored products of an account with its current products"""
+        with self._lock:
+            self._refresh_account(account_id)
+
+    def _refresh_account(self, account_id: str) -> None:
+        self._load()
+        mirror_id = cast(str, self._mirror_id)
+        records = [
+            record
+            for page, _ in self._search_pages(query=[f"physicalId:{account_id}"])
+            for record in page
+        ]
+        logger.info(f"Refreshing {len(records)} mirrored provisioned products")
+        stale_ids = {
+            product["id"] for product in self.products_by_account_id.get(account_id, [])
+        } - {record["id"] for record in records}
+        for product_id in stale_ids:
+            del self.products[product_id]
+        for record in records:
+            self.products[record["id"]] = record
+        self._index()
+
+        with self.table.batch_writer() as batch:
+            for product_id in stale_ids:
+                batch.delete_item(
+                    Key={
+                        "pk": self.PARTITION_KEY,
+                        "sk": self._product_sort_key(mirror_id, product_id),
+                    }
+                )
+            for record in records:
+                batch.put_item(Item=self._build_item(record))
+        try:
+            response = self.table.update_item(
+                Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY},
+                UpdateExpression="ADD version :one",
+                ConditionExpression="mirror_id = :mirror_id",
+                ExpressionAttributeValues={":one": 1, ":mirror_id": mirror_id},
+                ReturnValues="UPDATED_NEW",
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            # A newer mirror was persisted while the account was being refreshed
+            logger.info("Provisioned product mirror replaced, skipping version update")
+            return
+        version = int(cast(int, response["Attributes"]["version"]))
+        _mirror_cache[self.table_name] = (mirror_id, version, self.products)
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """
+        Refreshes the products of the account of a successful CreateManagedAccount or
+        UpdateManagedAccount Control Tower event, if a mirror is persisted
+        """
+        if not utils.is_aft_supported_controltower_event(event):
+            return
+        event_name_to_event_detail_key_map = {
+            "CreateManagedAccount": "createManagedAccountStatus",
+            "UpdateManagedAccount": "updateManagedAccountStatus",
+        }
+        detail = event["detail"]
+        status = detail["serviceEventDetails"][
+            event_name_to_event_detail_key_map[detail["eventName"]]
+        ]
+        if status.get("state") != "SUCCEEDED":
+            return
+        if not self._is_live(self._get_meta()):
+            logger.info("No current provisioned product mirror, nothing to update")
+            return
+        self.refresh_account(account_id=status["account"]["accountId"])
+
+    def invalidate(self) -> None:
+        logger.info("Invalidating persisted provisioned product mirror")
+        self.table.delete_item(Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY})
+        _mirror_cache.pop(self.table_name, None)
+
+    def _find_healthy_product(
+        self, account_id: str
+    ) -> Optional[ProvisionedProductRecord]:
+        self._load()
+        for product in self.products_by_account_id.get(account_id, []):
+            if ProvisionedProductMirror.is_healthy(product):
+                return product
+        return None
+
+    def _is_current(self, product: ProvisionedProductRecord) -> bool:
+        try:
+            detail = self.sc_client.describe_provisioned_product(Id=product["id"])[
+                "ProvisionedProductDetail"
+            ]
+        except self.sc_client.exceptions.ResourceNotFoundException:
+            return False
+        return (
+            ProvisionedProductMirror.is_healthy(
+                {
+                    **product,
+                    "status": detail.get("Status", ""),
+                    "last_successful_provisioning_record_id": detail.get(
+                        "LastSuccessfulProvisioningRecordId"
+                    ),
+                }
+            )
+            and detail.get("ProvisioningArtifactId")
+            == product["provisioning_artifact_id"]
+            and detail.get("LastSuccessfulProvisioningRecordId")
+            == product["last_successful_provisioning_record_id"]
+        )
+
+    def _load(self) -> None:
+        with self._lock:
+            self._load_mirror()
+
+    def _load_mirror(self) -> None:
+        if self._mirror_id is not None and self._expires_at > int(time.time()):
+            return
+
+        meta = self._get_meta()
+        if not self._is_live(meta):
+            self._build(meta or {})
+            return
+
+        meta = cast(Dict[str, Any], meta)
+        mirror_id = str(meta["mirror_id"])
+        version = int(meta["version"])
+        cached = _mirror_cache.get(self.table_name)
+        if cached is not None and cached[:2] == (mirror_id, version):
+            logger.info(f"Using cached provisioned product mirror {mirror_id}")
+            products = cached[2]
+        else:
+            products = self._load_items(mirror_id=mirror_id)
+            logger.info(f"Loaded persisted provisioned product mirror {mirror_id}")
+            _mirror_cache[self.table_name] = (mirror_id, version, products)
+        self._mirror_id = mirror_id
+        self._expires_at = int(meta["expires_at"])
+        # Copied so that refreshes do not alter the cached version
+        self.products = dict(products)
+        self._index()
+
+    def _build(self, meta: Dict[str, Any]) -> None:
+        now = int(time.time())
+        products: Dict[str, ProvisionedProductRecord] = {}
+        page_token: Optional[str] = None
+        if "build_id" in meta and int(meta["build_expires_at"]) > now:
+            build_id = str(meta["build_id"])
+            expires_at = int(meta["build_expires_at"])
+            page_token = meta.get("build_page_token")
+            products = self._load_items(mirror_id=build_id)
+            logger.info(
+                f"Resuming provisioned product mirror {build_id} after {len(products)} products"
+            )
+        else:
+            build_id = str(uuid.uuid4())
+            expires_at = now + self.ttl_seconds
+            logger.info(f"Building provisioned product mirror {build_id}")
+        self._mirror_id = build_id
+        self._expires_at = expires_at
+
+        # Each page is written before the build records the next page token, so a
+        # build interrupted by a timeout resumes after its last written page. Items
+        # of replaced mirrors are ignored on read and removed by the table TTL
+        for records, next_page_token in self._search_pages(
+            query=[self.CT_ACCOUNT_PRODUCT_QUERY], page_token=page_token
+        ):
+            with self.table.batch_writer() as batch:
+                for record in records:
+                    batch.put_item(Item=self._build_item(record))
+                    products[record["id"]] = record
+            if next_page_token is not None:
+                self.table.update_item(
+                    Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY},
+                    UpdateExpression="SET build_id = :build_id, build_expires_at = :expires_at, build_page_token = :page_token",
+                    ExpressionAttributeValues={
+                        ":build_id": build_id,
+                        ":expires_at": expires_at,
+                        ":page_token": next_page_token,
+                    },
+                )
+
+        response = self.table.update_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY},
+            UpdateExpression="SET mirror_id = :mirror_id, expires_at = :expires_at REMOVE build_id, build_expires_at, build_page_token ADD version :one",
+            ExpressionAttributeValues={
+                ":mirror_id": build_id,
+                ":expires_at": expires_at,
+                ":one": 1,
+            },
+            ReturnValues="UPDATED_NEW",
+        )
+        version = int(cast(int, response["Attributes"]["version"]))
+        self.products = products
+        self._index()
+        _mirror_cache[self.table_name] = (build_id, version, products)
+        logger.info(
+            f"Provisioned product mirror {build_id} built with {len(products)} products"
+        )
+
+    def _index(self) -> None:
+        self.products_by_account_id = {}
+        for product in self.products.values():
+            if product["account_id"] is not None:
+                self.products_by_account_id.setdefault(
+                    product["account_id"], []
+                ).append(product)
+
+    def _search_pages(
+        self, query: List[str], page_token: Optional[str] = None
+    ) -> Iterator[Tuple[List[ProvisionedProductRecord], Optional[str]]]:
+        """Yields the products of each page of a search, with the next page token"""
+        kwargs: Dict[str, Any] = {"Filters": {"SearchQuery": query}, "PageSize": 100}
+        while True:
+            if page_token is not None:
+                kwargs["PageToken"] = page_token
+            response = self.sc_client.search_provisioned_products(**kwargs)
+            page_token = response.get("NextPageToken") or None
+            yield [
+                self._build_record(product)
+                for product in response["ProvisionedProducts"]
+                if product.get("Type") == "CONTROL_TOWER_ACCOUNT"
+            ], page_token
+            if page_token is None:
+                break
+
+    @staticmethod
+    def _build_record(
+        product: ProvisionedProductAttributeTypeDef,
+    ) -> ProvisionedProductRecord:
+        return {
+            "id": product["Id"],
+            "name": product["Name"],
+            "account_id": product.get("PhysicalId"),
+            "status": product["Status"],
+            "provisioning_artifact_id": product["ProvisioningArtifactId"],
+            "last_successful_provisioning_record_id": product.get(
+                "LastSuccessfulProvisioningRecordId"
+            ),
+        }
+
+    def _product_sort_key(self, mirror_id: str, product_id: str) -> str:
+        return f"{mirror_id}#{self.PRODUCT_SORT_KEY_PREFIX}{product_id}"
+
+    def _build_item(self, record: ProvisionedProductRecord) -> Dict[str, Any]:
+        mirror_id = cast(str, self._mirror_id)
+        return {
+            "pk": self.PARTITION_KEY,
+            "sk": self._product_sort_key(mirror_id, record["id"]),
+            "mirror_id": mirror_id,
+            "expires_at": self._expires_at,
+            "product": dict(record),
+        }
+
+    def _load_items(self, mirror_id: str) -> Dict[str, ProvisionedProductRecord]:
+        products: Dict[str, ProvisionedProductRecord] = {}
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("pk").eq(self.PARTITION_KEY)
+            & Key("sk").begins_with(f"{mirror_id}#"),
+            "ConsistentRead": True,
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            for item in response["Items"]:
+                product = cast(ProvisionedProductRecord, item["product"])
+                products[product["id"]] = product
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        return products
+
+    @staticmethod
+    def _is_live(meta: Optional[Dict[str, Any]]) -> bool:
+        if meta is None or "mirror_id" not in meta:
+            return False
+        if int(meta["expires_at"]) <= int(time.time()):
+            logger.info("Persisted provisioned product mirror has expired")
+            return False
+        return True
+
+    def _get_meta(self) -> Optional[Dict[str, Any]]:
+        response = self.table.get_item(
+            Key={"pk": self.PARTITION_KEY, "sk": self.META_SORT_KEY},
+            ConsistentRead=True,
+        )
+        meta: Optional[Dict[str, Any]] = response.get("Item")
+        return meta
+
+
 def get_healthy_ct_product_batch(
     ct_management_session: Session,
 ) -> Iterator[Iterable[ProvisionedProductAttributeTypeDef]]:
@@ -149,37 +650,40 @@ def email_exists_in_batch(
     return False
 
 
-def get_account_id_if_enrolled(record: Dict[str, Any]) -> Optional[str]:
-    auth = AuthClient()
-    ct_management_session = auth.get_ct_management_session(
-        role_name=ProvisionRoles.SERVICE_ROLE_NAME
-    )
+def get_account_id_if_enrolled(
+    record: Dict[str, Any],
+    orgs_agent: Optional[OrganizationsAgent] = None,
+    product_mirror: Optional[ProvisionedProductMirror] = None,
+) -> Optional[str]:
+    if orgs_agent is None or product_mirror is None:
+        auth = AuthClient()
+        ct_management_session = auth.get_ct_management_session(
+            role_name=ProvisionRoles.SERVICE_ROLE_NAME
+        )
+        if orgs_agent is None:
+            orgs_agent = OrganizationsAgent(
+                ct_management_session=ct_management_session,
+                snapshot_store=OrganizationSnapshotStore(
+                    auth.get_aft_management_session()
+                ),
+            )
+        if product_mirror is None:
+            product_mirror = ProvisionedProductMirror(
+                aft_management_session=auth.get_aft_management_session(),
+                ct_management_session=ct_management_session,
+            )
     account_email = ddb.unmarshal_ddb_item(record["dynamodb"]["NewImage"])[
         "control_tower_parameters"
     ]["AccountEmail"]
 
-    orgs_agent = OrganizationsAgent(ct_management_session=ct_management_session)
     account = orgs_agent.get_account_by_email(account_email)
     if account is None:
         logger.info("Account not found in Organizations")
         return None
 
-    sc_client: "ServiceCatalogClient" = ct_management_session.client(
-        "servicecatalog", config=utils.get_high_retry_botoconfig()
-    )
-    kwargs: Dict[str, Any] = {
-        "Filters": {"SearchQuery": [f"physicalId:{account['Id']}"]},
-        "PageSize": 100,
-    }
-    while True:
-        response = sc_client.search_provisioned_products(**kwargs)
-        for product in response["ProvisionedProducts"]:
-            if ct_account_product_is_healthy(product):
-                logger.info("Healthy provisioned product found for account")
-                return account["Id"]
-        if "NextPageToken" not in response:
-            break
-        kwargs["PageToken"] = response["NextPageToken"]
+    if product_mirror.get_healthy_product(account["Id"]) is not None:
+        logger.info("Healthy provisioned product found for account")
+        return account["Id"]
 
     logger.info(
         "Account exists in Organizations but has no healthy provisioned product"
@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from aft_common import ddb
 from aft_common.account_provisioning_framework import ProvisionRoles
@@ -20,7 +20,11 @@ from boto3.session import Session
 logger = logging.getLogger("aft")
 
 
-def shared_account_request(event_record: Dict[str, Any], auth: AuthClient) -> bool:
+def shared_account_request(
+    event_record: Dict[str, Any],
+    auth: AuthClient,
+    ct_management_session: Optional[Session] = None,
+) -> bool:
     ct_params = ddb.unmarshal_ddb_item(event_record["dynamodb"]["NewImage"])[
         "control_tower_parameters"
     ]
@@ -30,9 +34,10 @@ def shared_account_request(event_record: Dict[str, Any], auth: AuthClient) -> bo
     shared_account_ids = get_shared_ids(
         aft_management_session=auth.get_aft_management_session()
     )
-    ct_management_session = auth.get_ct_management_session(
-        role_name=ProvisionRoles.SERVICE_ROLE_NAME
-    )
+    if ct_management_session is None:
+        ct_management_session = auth.get_ct_management_session(
+            role_name=ProvisionRoles.SERVICE_ROLE_NAME
+        )
     orgs_client = ct_management_session.client(
         "organizations", config=get_high_retry_botoconfig()
     )
@@ -4,7 +4,7 @@
 import json
 import logging
 import uuid
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 
 import aft_common.constants
 import aft_common.ssm
@@ -13,14 +13,23 @@ from boto3.session import Session
 
 if TYPE_CHECKING:
     from mypy_boto3_sqs import SQSClient
-    from mypy_boto3_sqs.type_defs import MessageTypeDef, SendMessageResultTypeDef
+    from mypy_boto3_sqs.type_defs import (
+        DeleteMessageBatchRequestEntryTypeDef,
+        MessageTypeDef,
+        SendMessageResultTypeDef,
+    )
 else:
     SQSClient = object
+    DeleteMessageBatchRequestEntryTypeDef = object
     MessageTypeDef = object
     SendMessageResultTypeDef = object
 
 logger = logging.getLogger("aft")
 
+# https://docs.aws.amazon.com/AWSSimpleQueueService/latest/SQSDeveloperGuide/quotas-messages.html
+SQS_MAX_BATCH_SIZE = 10
+SQS_LONG_POLL_WAIT_SECONDS = 5
+
 
 def build_sqs_url(session: Session, queue_name: str) -> str:
     account_info = utils.get_session_info(session)
@@ -48,6 +57,38 @@ def receive_sqs_message(session: Session, sqs_queue: str) -> Optional[MessageTyp
         return None
 
 
+def receive_sqs_messages(
+    session: Session,
+    sqs_queue: str,
+    max_messages: int,
+    wait_time_seconds: int = SQS_LONG_POLL_WAIT_SECONDS,
+) -> List[MessageTypeDef]:
+    """
+    Receives up to max_messages messages, long polling for the first batch and
+    receiving further batches until the queue runs dry
+    """
+    client: SQSClient = session.client("sqs")
+    sqs_url = build_sqs_url(session, sqs_queue)
+    logger.info(f"Fetching up to {max_messages} SQS Messages from {sqs_url}")
+
+    messages: List[MessageTypeDef] = []
+    while len(messages) < max_messages:
+        response = client.receive_message(
+            QueueUrl=sqs_url,
+            MaxNumberOfMessages=min(max_messages - len(messages), SQS_MAX_BATCH_SIZE),
+            WaitTimeSeconds=wait_time_seconds if len(messages) == 0 else 0,
+            ReceiveRequestAttemptId=str(uuid.uuid1()),
+        )
+        if len(response.get("Messages", [])) == 0:
+            break
+        messages.extend(response["Messages"])
+
+    logger.info(f"Retrieved {len(messages)} messages pending processing")
+    for message in messages:
+        logger.info(utils.sanitize_input_for_logging(message))
+    return messages
+
+
 def delete_sqs_message(session: Session, message: MessageTypeDef) -> None:
     client: SQSClient = session.client("sqs")
     sqs_queue = aft_common.ssm.get_ssm_parameter_value(
@@ -60,6 +101,35 @@ def delete_sqs_message(session: Session, message: MessageTypeDef) -> None:
     )
 
 
+def delete_sqs_messages(
+    session: Session, messages: Sequence[MessageTypeDef]
+) -> List[str]:
+    """
+    Deletes messages in batches, returning the IDs of the messages that could not
+    be deleted
+    """
+    client: SQSClient = session.client("sqs")
+    sqs_queue = aft_common.ssm.get_ssm_parameter_value(
+        session, aft_common.constants.SSM_PARAM_ACCOUNT_REQUEST_QUEUE
+    )
+    sqs_url = build_sqs_url(session, sqs_queue)
+
+    failed_message_ids: List[str] = []
+    for i in range(0, len(messages), SQS_MAX_BATCH_SIZE):
+        entries: List[DeleteMessageBatchRequestEntryTypeDef] = [
+            {"Id": message["MessageId"], "ReceiptHandle": message["ReceiptHandle"]}
+            for message in messages[i : i + SQS_MAX_BATCH_SIZE]
+        ]
+        logger.info(f"Deleting {len(entries)} SQS messages")
+        response = client.delete_message_batch(QueueUrl=sqs_url, Entries=entries)
+        for failure in response.get("Failed", []):
+            logger.error(
+                f"Failed to delete SQS message {failure['Id']}: {failure.get('Message')}"
+            )
+            failed_message_ids.append(failure["Id"])
+    return failed_message_ids
+
+
 def send_sqs_message(
     session: Session, sqs_url: str, message: Dict[str, Any]
 ) -> SendMessageResultTypeDef:
@@ -0,0 +1,54 @@
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Dict
+
+from jsonschema.validators import validator_for
+
+if TYPE_CHECKING:
+    from jsonschema.protocols import Validator
+else:
+    Validator = object
+
+logger = logging.getLogger("aft")
+
+SCHEMAS_DIR = os.path.join(os.path.dirname(__file__), "schemas")
+
+IDENTIFY_TARGETS_REQUEST_SCHEMA = "identify_targets_request_schema"
+ACCOUNT_REQUEST_STREAM_EVENT_SCHEMA = "account_request_stream_event_schema"
+ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA = (
+    "account_provisioning_framework_event_schema"
+)
+FEATURE_OPTIONS_EVENT_SCHEMA = "feature_options_event_schema"
+
+# Compiled validators, kept for the lifetime of the container
+_VALIDATORS: Dict[str, Validator] = {}
+
+
+def get_validator(schema_name: str) -> Validator:
+    """
+    Returns the validator for schemas/<schema_name>.json. The schema is read and
+    checked on first use only; later calls reuse the same validator instance
+    """
+    validator = _VALIDATORS.get(schema_name)
+    if validator is None:
+        with open(os.path.join(SCHEMAS_DIR, f"{schema_name}.json")) as schema_file:
+            schema = json.load(schema_file)
+        validator_class = validator_for(schema)
+        validator_class.check_schema(schema)
+        validator = validator_class(schema)
+        _VALIDATORS[schema_name] = validator
+        logger.debug(f"Compiled validator for schema: {schema_name}")
+    return validator
+
+
+def validate_event(schema_name: str, event: Dict[str, Any]) -> None:
+    """
+    Raises jsonschema.ValidationError if event does not match the schema. Lambda
+    handlers call this before creating any session so malformed events are
+    rejected without making AWS calls
+    """
+    get_validator(schema_name).validate(event)
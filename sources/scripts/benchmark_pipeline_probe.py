@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""
+Benchmarks counting running customization pipelines with the latest-execution
+probe against the previous full-history scan. No AWS calls are made: a local
+CodePipeline stand-in serves synthetic execution histories with a fixed latency
+per call.
+
+    python sources/scripts/benchmark_pipeline_probe.py --sizes 500 2000 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aft-lambda-layer"))
+
+from aft_common.codepipeline import get_running_pipeline_executions  # noqa: E402
+
+PAGE_SIZE = 100
+
+
+class LocalCodePipeline:
+    def __init__(self, histories, latency_sec):
+        self.histories = histories
+        self.latency_sec = latency_sec
+        self.calls = 0
+        self.summaries_returned = 0
+        self._lock = threading.Lock()
+
+    def list_pipeline_executions(
+        self, pipelineName, maxResults=PAGE_SIZE, nextToken=None
+    ):
+        time.sleep(self.latency_sec)
+        start = int(nextToken or 0)
+        summaries = self.histories[pipelineName][start : start + maxResults]
+        with self._lock:
+            self.calls += 1
+            self.summaries_returned += len(summaries)
+        response = {"pipelineExecutionSummaries": summaries}
+        if start + maxResults < len(self.histories[pipelineName]):
+            response["nextToken"] = str(start + maxResults)
+        return response
+
+
+class LocalSession:
+    def __init__(self, client):
+        self._client = client
+
+    def client(self, service_name, config=None):
+        return self._client
+
+
+def build_histories(size):
+    now = datetime.now()
+    histories = {}
+    for i in range(size):
+        # Up to a year of history, newest first, with about 5% of pipelines running
+        count = random.randint(0, 250)
+        summaries = [
+            {
+                "pipelineExecutionId": f"{i}-{n}",
+                "status": "Succeeded",
+                "startTime": now - timedelta(hours=n * 30),
+            }
+            for n in range(count)
+        ]
+        if summaries and random.random() < 0.05:
+            summaries[0]["status"] = "InProgress"
+        histories[f"{100000000000 + i}-customizations-pipeline"] = summaries
+    return histories
+
+
+def legacy_running_pipeline_count(client, pipeline_names):
+    # Previous implementation: page the whole history of every pipeline in turn
+    pipeline_counter = 0
+    for name in pipeline_names:
+        summaries = []
+        kwargs = {"pipelineName": name}
+        while True:
+            response = client.list_pipeline_executions(**kwargs)
+            summaries.extend(response["pipelineExecutionSummaries"])
+            if "nextToken" not in response:
+                break
+            kwargs["nextToken"] = response["nextToken"]
+        if not summaries:
+            continue
+        latest_execution = sorted(
+            summaries, key=lambda i: i["startTime"], reverse=True
+        )[0]
+        if latest_execution["status"] == "InProgress":
+            pipeline_counter += 1
+    return pipeline_counter
+
+
+def run(sizes, latency_sec, max_workers):
+    print(
+        f"{'pipelines':>10} {'probe (s)':>10} {'probe calls':>12} {'probe items':>12}"
+        f" {'legacy (s)':>11} {'legacy calls':>13} {'legacy items':>13}"
+    )
+    for size in sizes:
+        histories = build_histories(size)
+        names = list(histories)
+
+        client = LocalCodePipeline(histories, latency_sec)
+        start = time.perf_counter()
+        running = get_running_pipeline_executions(
+            LocalSession(client), names, max_workers=max_workers
+        )
+        probe_sec = time.perf_counter() - start
+        probe_calls, probe_items = client.calls, client.summaries_returned
+
+        client = LocalCodePipeline(histories, latency_sec)
+        start = time.perf_counter()
+        legacy_count = legacy_running_pipeline_count(client, names)
+        legacy_sec = time.perf_counter() - start
+        assert legacy_count == len(running)
+
+        print(
+            f"{size:>10} {probe_sec:>10.2f} {probe_calls:>12} {probe_items:>12}"
+            f" {legacy_sec:>11.2f} {client.calls:>13} {client.summaries_returned:>13}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the running customization pipeline probe"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=2.0,
+        help="Simulated latency of each ListPipelineExecutions call",
+    )
+    parser.add_argument("--max-workers", type=int, default=10)
+    args = parser.parse_args()
+    run(args.sizes, args.latency_ms / 1000, args.max_workers)
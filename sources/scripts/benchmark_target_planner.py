@@ -0,0 +1,108 @@
+#!/usr/bin/python
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""
+Benchmarks the include/exclude evaluation of identify_targets against the
+previous list-based implementation. No AWS calls are made: the planner is
+seeded with synthetic AFT and core account IDs.
+
+    python sources/scripts/benchmark_target_planner.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aft-lambda-layer"))
+
+from aft_common.customizations import TargetAccountPlanner  # noqa: E402
+
+
+def legacy_plan(included, excluded, aft_accounts, core_accounts):
+    # Previous implementation: list membership tests and list.remove in loops
+    included = list(set(included))
+    filtered_accounts = []
+    for a in included:
+        if a not in aft_accounts and a not in core_accounts:
+            filtered_accounts.append(a)
+    for a in filtered_accounts:
+        if a in included:
+            included.remove(a)
+    for i in excluded:
+        if i in included:
+            included.remove(i)
+    return included
+
+
+def build_inputs(size):
+    aft_accounts = [f"{100000000000 + i}" for i in range(size)]
+    core_accounts = [f"{900000000000 + i}" for i in range(3)]
+    # Include a tenth of the accounts explicitly plus some unknown accounts,
+    # exclude a fifth of the organization
+    explicit = random.sample(aft_accounts, size // 10) + [
+        f"{800000000000 + i}" for i in range(size // 100)
+    ]
+    excluded = random.sample(aft_accounts, size // 5)
+    return aft_accounts, core_accounts, explicit, excluded
+
+
+def time_call(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run(sizes, legacy_max_size):
+    print(f"{'accounts':>10} {'planner (s)':>12} {'us/account':>11} {'legacy (s)':>11}")
+    for size in sizes:
+        aft_accounts, core_accounts, explicit, excluded = build_inputs(size)
+        planner = TargetAccountPlanner(None, None, None)
+        planner._aft_account_ids = aft_accounts
+        planner._core_account_ids = core_accounts
+        included_selectors = [
+            {"type": "all"},
+            {"type": "core"},
+            {"type": "accounts", "target_value": explicit},
+        ]
+        excluded_selectors = [{"type": "accounts", "target_value": excluded}]
+
+        planner_sec, targets = time_call(
+            lambda: planner.plan(
+                included=included_selectors, excluded=excluded_selectors
+            )
+        )
+
+        legacy = "skipped"
+        if size <= legacy_max_size:
+            legacy_sec, legacy_targets = time_call(
+                lambda: legacy_plan(
+                    aft_accounts + core_accounts + explicit,
+                    excluded,
+                    aft_accounts,
+                    core_accounts,
+                )
+            )
+            assert set(legacy_targets) == set(targets)
+            legacy = f"{legacy_sec:.3f}"
+
+        print(
+            f"{size:>10} {planner_sec:>12.3f} {planner_sec / size * 1e6:>11.2f} {legacy:>11}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark identify_targets include/exclude planning"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument(
+        "--legacy-max-size",
+        type=int,
+        default=10000,
+        help="Largest size to run the quadratic legacy implementation for",
+    )
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_max_size)
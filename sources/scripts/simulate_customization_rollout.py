@@ -0,0 +1,1604 @@
+#!/usr/bin/python
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""
+Simulates a full customization rollout of N accounts in process, so that
+scheduling and caching changes can be benchmarked without touching real
+accounts. No AWS calls are made: the identify targets, get pipeline executions,
+execute pipeline and pipeline event handler Lambdas run unmodified against local
+stand-ins for every AWS API they call, served through botocore's before-call
+hook. CodePipeline, Organizations and the Step Functions map over account
+provisioning executions have configurable latencies, throttling and failure
+rates.
+
+Pipeline and provisioning executions advance a virtual clock, and each Lambda
+invocation advances it by its measured wall time, so a rollout of many hours is
+simulated in minutes. The report gives the total rollout time, the API calls and
+throttles of each service and the peak pipeline concurrency.
+
+    python sources/scripts/simulate_customization_rollout.py --accounts 500
+    python sources/scripts/simulate_customization_rollout.py --accounts 500 \\
+        --rollouts 2 --scheduling-policy longest_first --pipeline-spread 0.8
+"""
+
+import argparse
+import heapq
+import importlib.util
+import json
+import logging
+import operator
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CUSTOMIZATIONS_LAMBDA_DIR = os.path.join(
+    SCRIPTS_DIR, "..", "..", "src", "aft_lambda", "aft_customizations"
+)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, "..", "aft-lambda-layer"))
+
+REGION = "us-east-1"
+AFT_MANAGEMENT_ACCOUNT_ID = "000000000001"
+CT_MANAGEMENT_ACCOUNT_ID = "000000000002"
+LOG_ARCHIVE_ACCOUNT_ID = "000000000003"
+AUDIT_ACCOUNT_ID = "000000000004"
+# Access keys of local sessions carry their account ID, as the stand-ins never
+# see credentials otherwise
+ACCESS_KEY_PREFIX = "SIM"
+
+# Keep boto3 away from real credentials and configuration
+os.environ.update(
+    {
+        "AWS_ACCESS_KEY_ID": f"{ACCESS_KEY_PREFIX}{AFT_MANAGEMENT_ACCOUNT_ID}",
+        "AWS_SECRET_ACCESS_KEY": "simulator",
+        "AWS_DEFAULT_REGION": REGION,
+        "AWS_REGION": REGION,
+        "AWS_CONFIG_FILE": os.devnull,
+        "AWS_SHARED_CREDENTIALS_FILE": os.devnull,
+        "AWS_EC2_METADATA_DISABLED": "true",
+    }
+)
+for variable in ("AWS_SESSION_TOKEN", "AWS_PROFILE"):
+    os.environ.pop(variable, None)
+os.environ.setdefault("log_level", "warning")
+
+import boto3.session  # noqa: E402
+from aft_common import constants  # noqa: E402
+from aft_common.auth import AuthClient  # noqa: E402
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer  # noqa: E402
+from botocore import xform_name  # noqa: E402
+
+PIPELINE_EXECUTION_STATE_CHANGE = "CodePipeline Pipeline Execution State Change"
+EVENT_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+MAX_ATTEMPTS = 16  # matches get_high_retry_botoconfig
+THROTTLING_ERROR_CODES = {"organizations": "TooManyRequestsException"}
+_PARAMS_CONTEXT_KEY = "simulator_api_params"
+
+
+class ServiceError(Exception):
+    def __init__(self, code, message="", status_code=400, **extra):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+        self.extra = extra
+
+    def as_response(self):
+        parsed = {
+            "Error": {"Code": self.code, "Message": self.message},
+            "ResponseMetadata": {"HTTPStatusCode": self.status_code},
+            **self.extra,
+        }
+        return LocalHttpResponse(self.status_code), parsed
+
+
+class LocalHttpResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = b""
+
+
+class SimClock:
+    """
+    Virtual seconds since the start of the simulation. While a Lambda runs, time
+    advances with the wall clock from the instant it was invoked at
+    """
+
+    def __init__(self):
+        self.epoch = datetime.now(timezone.utc).replace(microsecond=0)
+        self._base = 0.0
+        self._started = None
+
+    def now(self):
+        if self._started is None:
+            return self._base
+        return self._base + time.perf_counter() - self._started
+
+    @contextmanager
+    def running(self, at):
+        self._base = at
+        self._started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._base = self.now()
+            self._started = None
+
+    def datetime(self, at=None):
+        return self.epoch + timedelta(seconds=self.now() if at is None else at)
+
+    def event_time(self, at):
+        return self.datetime(at).strftime(EVENT_TIME_FORMAT)
+
+
+class ServiceProfile:
+    """Latency, rate limit and fault rates of a simulated service"""
+
+    def __init__(
+        self,
+        latency_sec=0.0,
+        requests_per_second=None,
+        throttle_rate=0.0,
+        error_rate=0.0,
+    ):
+        self.latency_sec = latency_sec
+        self.requests_per_second = requests_per_second
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self._tokens = float(requests_per_second or 0)
+        self._last_refill = None
+        self._lock = threading.Lock()
+
+    def draw_fault(self, rng, now):
+        if self._rate_limited(now) or rng.random() < self.throttle_rate:
+            return "throttle"
+        if rng.random() < self.error_rate:
+            return "error"
+        return None
+
+    def _rate_limited(self, now):
+        if not self.requests_per_second:
+            return False
+        with self._lock:
+            if self._last_refill is not None:
+                self._tokens = min(
+                    float(self.requests_per_second),
+                    self._tokens + (now - self._last_refill) * self.requests_per_second,
+                )
+            self._last_refill = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+
+class ApiStats:
+    def __init__(self):
+        self.calls = Counter()
+        self.throttles = Counter()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+
+    def record_call(self, service, operation):
+        with self._lock:
+            self.calls[(service, operation)] += 1
+
+    def record_fault(self, service, fault):
+        with self._lock:
+            (self.throttles if fault == "throttle" else self.errors)[service] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.calls), Counter(self.throttles), Counter(self.errors)
+
+
+###############################################################################
+# DynamoDB
+###############################################################################
+
+_MISSING = object()
+_TOKEN_PATTERN = re.compile(
+    r"\s*(?:(?P<name>#\w+)|(?P<value>:\w+)|(?P<op><>|<=|>=|[=<>(),+-])"
+    r"|(?P<word>[A-Za-z_][\w.]*))"
+)
+_COMPARATORS = {
+    "=": operator.eq,
+    "<>": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_UPDATE_CLAUSES = {"SET", "REMOVE", "ADD", "DELETE"}
+
+
+def _compare(function, left, right):
+    if left is _MISSING or right is _MISSING:
+        return False
+    try:
+        return bool(function(left, right))
+    except TypeError:
+        return False
+
+
+class Expression:
+    """
+    Recursive descent parser for the DynamoDB condition, key condition, filter and
+    update expressions used by AFT, evaluated against deserialized items
+    """
+
+    def __init__(self, text, names=None, values=None):
+        self.names = names or {}
+        self.values = values or {}
+        # Attributes compared for equality with a value, to locate key partitions
+        self.equalities = {}
+        self.tokens = []
+        text = text.strip()
+        position = 0
+        while position < len(text):
+            match = _TOKEN_PATTERN.match(text, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"Cannot parse expression: {text}")
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        self.position = 0
+
+    def condition(self):
+        condition = self._or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected token {self._peek()[1]}")
+        return condition
+
+    def update(self):
+        actions = []
+        while self.position < len(self.tokens):
+            clause = self._next()[1].upper()
+            if clause not in _UPDATE_CLAUSES:
+                raise ValueError(f"Unknown update clause {clause}")
+            while True:
+                name = self._path()
+                if clause == "SET":
+                    self._expect("=")
+                    actions.append((clause, name, self._value()))
+                elif clause == "REMOVE":
+                    actions.append((clause, name, None))
+                else:
+                    actions.append((clause, name, self._operand()[0]))
+                if not self._accept(","):
+                    break
+        return actions
+
+    def _peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _accept(self, text):
+        token = self._peek()[1]
+        if token is not None and token.upper() == text:
+            self.position += 1
+            return True
+        return False
+
+    def _expect(self, text):
+        if not self._accept(text):
+            raise ValueError(f"Expected {text} but found {self._peek()[1]}")
+
+    def _path(self):
+        kind, token = self._next()
+        if kind == "name":
+            return self.names[token]
+        if kind == "word":
+            return token
+        raise ValueError(f"Expected an attribute but found {token}")
+
+    def _operand(self):
+        kind, token = self._peek()
+        if kind == "value":
+            self.position += 1
+            value = self.values[token]
+            return (lambda item: value), None
+        name = self._path()
+        return (lambda item: item.get(name, _MISSING)), name
+
+    def _value(self):
+        left = self._function_or_operand()
+        for sign, function in (("+", operator.add), ("-", operator.sub)):
+            if self._accept(sign):
+                right = self._function_or_operand()
+                return lambda item, f=function: f(left(item), right(item))
+        return left
+
+    def _function_or_operand(self):
+        kind, token = self._peek()
+        if kind == "word" and token.lower() == "if_not_exists":
+            self.position += 1
+            self._expect("(")
+            name = self._path()
+            self._expect(",")
+            default = self._value()
+            self._expect(")")
+            return lambda item: item[name] if name in item else default(item)
+        if kind == "word" and token.lower() == "list_append":
+            self.position += 1
+            self._expect("(")
+            first = self._value()
+            self._expect(",")
+            second = self._value()
+            self._expect(")")
+            return lambda item: list(first(item)) + list(second(item))
+        return self._operand()[0]
+
+    def _or(self):
+        condition = self._and()
+        while self._accept("OR"):
+            left, right = condition, self._and()
+            condition = lambda item, l=left, r=right: l(item) or r(item)  # noqa: E731
+        return condition
+
+    def _and(self):
+        condition = self._not()
+        while self._accept("AND"):
+            left, right = condition, self._not()
+            condition = lambda item, l=left, r=right: l(item) and r(item)  # noqa: E731
+        return condition
+
+    def _not(self):
+        if self._accept("NOT"):
+            inner = self._not()
+            return lambda item: not inner(item)
+        return self._primary()
+
+    def _primary(self):
+        kind, token = self._peek()
+        if token == "(":
+            self.position += 1
+            condition = self._or()
+            self._expect(")")
+            return condition
+        if (
+            kind == "word"
+            and self.position + 1 < len(self.tokens)
+            and self.tokens[self.position + 1][1] == "("
+        ):
+            return self._function()
+
+        left, name = self._operand()
+        if self._accept("BETWEEN"):
+            low = self._operand()[0]
+            self._expect("AND")
+            high = self._operand()[0]
+            return lambda item: _compare(
+                operator.le, low(item), left(item)
+            ) and _compare(operator.le, left(item), high(item))
+        if self._accept("IN"):
+            self._expect("(")
+            options = [self._operand()[0]]
+            while self._accept(","):
+                options.append(self._operand()[0])
+            self._expect(")")
+            return lambda item: any(
+                _compare(operator.eq, left(item), option(item)) for option in options
+            )
+        comparator = self._next()[1]
+        if comparator not in _COMPARATORS:
+            raise ValueError(f"Unknown comparator {comparator}")
+        right = self._operand()[0]
+        if comparator == "=" and name is not None:
+            self.equalities[name] = right({})
+        function = _COMPARATORS[comparator]
+        return lambda item: _compare(function, left(item), right(item))
+
+    def _function(self):
+        function = self._next()[1].lower()
+        self._expect("(")
+        name = self._path()
+        if function == "attribute_exists":
+            self._expect(")")
+            return lambda item: name in item
+        if function == "attribute_not_exists":
+            self._expect(")")
+            return lambda item: name not in item
+        self._expect(",")
+        operand = self._operand()[0]
+        self._expect(")")
+        if function == "begins_with":
+            return lambda item: isinstance(item.get(name), str) and item[
+                name
+            ].startswith(operand(item))
+        if function == "contains":
+            return lambda item: name in item and _compare(
+                operator.contains, item[name], operand(item)
+            )
+        raise ValueError(f"Unsupported function {function}")
+
+
+def _apply_update(item, actions):
+    # Operands are evaluated against the item before the update, as in DynamoDB
+    resolved = [
+        (clause, name, getter(item) if getter else None)
+        for clause, name, getter in actions
+    ]
+    updated = dict(item)
+    for clause, name, value in resolved:
+        if clause == "SET":
+            updated[name] = value
+        elif clause == "REMOVE":
+            updated.pop(name, None)
+        elif clause == "ADD":
+            current = updated.get(name)
+            if current is None:
+                updated[name] = value
+            elif isinstance(current, set):
+                updated[name] = current | value
+            else:
+                updated[name] = current + value
+        else:
+            remaining = updated.get(name, set()) - value
+            if remaining:
+                updated[name] = remaining
+            else:
+                updated.pop(name, None)
+    return updated
+
+
+class LocalTable:
+    def __init__(self, name, hash_key, range_key=None):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.partitions = {}
+
+    def key_of(self, item):
+        return item[self.hash_key], item.get(self.range_key) if self.range_key else None
+
+    def get(self, key):
+        hash_value, range_value = self.key_of(key)
+        return self.partitions.get(hash_value, {}).get(range_value)
+
+    def put(self, item):
+        hash_value, range_value = self.key_of(item)
+        self.partitions.setdefault(hash_value, {})[range_value] = item
+
+    def delete(self, key):
+        hash_value, range_value = self.key_of(key)
+        return self.partitions.get(hash_value, {}).pop(range_value, None)
+
+    def __len__(self):
+        return sum(len(partition) for partition in self.partitions.values())
+
+
+class LocalDynamoDB:
+    # Stands in for the 1 MB limit of Query and Scan pages
+    PAGE_ITEMS = 1000
+
+    def __init__(self):
+        self.tables = {}
+        self._lock = threading.RLock()
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+
+    def create_table(self, name, hash_key, range_key=None):
+        self.tables[name] = LocalTable(name, hash_key, range_key)
+
+    def _load(self, attribute_values):
+        return {
+            name: self._deserializer.deserialize(value)
+            for name, value in (attribute_values or {}).items()
+        }
+
+    def _dump(self, item):
+        return {name: self._serializer.serialize(value) for name, value in item.items()}
+
+    def _check(self, params, item):
+        if "ConditionExpression" not in params:
+            return True
+        condition = Expression(
+            params["ConditionExpression"],
+            params.get("ExpressionAttributeNames"),
+            self._load(params.get("ExpressionAttributeValues")),
+        ).condition()
+        return condition(item or {})
+
+    def _project(self, params, item):
+        if "ProjectionExpression" not in params:
+            return item
+        names = params.get("ExpressionAttributeNames") or {}
+        attributes = [
+            names.get(path.strip(), path.strip()).split(".")[0]
+            for path in params["ProjectionExpression"].split(",")
+        ]
+        return {name: item[name] for name in attributes if name in item}
+
+    @staticmethod
+    def _condition_failed():
+        return ServiceError(
+            "ConditionalCheckFailedException", "The conditional request failed"
+        )
+
+    def get_item(self, params, caller):
+        with self._lock:
+            item = self.tables[params["TableName"]].get(self._load(params["Key"]))
+            if item is None:
+                return {}
+            return {"Item": self._dump(self._project(params, item))}
+
+    def put_item(self, params, caller):
+        with self._lock:
+            table = self.tables[params["TableName"]]
+            item = self._load(params["Item"])
+            existing = table.get(item)
+            if not self._check(params, existing):
+                raise self._condition_failed()
+            table.put(item)
+            if params.get("ReturnValues") == "ALL_OLD" and existing:
+                return {"Attributes": self._dump(existing)}
+            return {}
+
+    def update_item(self, params, caller):
+        with self._lock:
+            table = self.tables[params["TableName"]]
+            key = self._load(params["Key"])
+            existing = table.get(key)
+            if not self._check(params, existing):
+                raise self._condition_failed()
+            updated = self._update(params, existing or key)
+            table.put(updated)
+            return_values = params.get("ReturnValues", "NONE")
+            if return_values in ("ALL_NEW", "UPDATED_NEW"):
+                return {"Attributes": self._dump(updated)}
+            if return_values == "ALL_OLD" and existing:
+                return {"Attributes": self._dump(existing)}
+            return {}
+
+    def _update(self, params, item):
+        actions = Expression(
+            params["UpdateExpression"],
+            params.get("ExpressionAttributeNames"),
+            self._load(params.get("ExpressionAttributeValues")),
+        ).update()
+        return _apply_update(item, actions)
+
+    def delete_item(self, params, caller):
+        with self._lock:
+            table = self.tables[params["TableName"]]
+            key = self._load(params["Key"])
+            existing = table.get(key)
+            if not self._check(params, existing):
+                raise self._condition_failed()
+            table.delete(key)
+            if params.get("ReturnValues") == "ALL_OLD" and existing:
+                return {"Attributes": self._dump(existing)}
+            return {}
+
+    def query(self, params, caller):
+        with self._lock:
+            table = self.tables[params["TableName"]]
+            values = self._load(params.get("ExpressionAttributeValues"))
+            names = params.get("ExpressionAttributeNames")
+            key_expression = Expression(params["KeyConditionExpression"], names, values)
+            key_condition = key_expression.condition()
+            partition = table.partitions.get(
+                key_expression.equalities[table.hash_key], {}
+            )
+            items = [partition[r] for r in sorted(partition, key=_sort_key)]
+            if not params.get("ScanIndexForward", True):
+                items.reverse()
+            return self._page(params, table, items, key_condition, names, values)
+
+    def scan(self, params, caller):
+        with self._lock:
+            table = self.tables[params["TableName"]]
+            items = [
+                item
+                for hash_value in sorted(table.partitions, key=_sort_key)
+                for _, item in sorted(
+                    table.partitions[hash_value].items(), key=lambda i: _sort_key(i[0])
+                )
+            ]
+            if "TotalSegments" in params:
+                items = [
+                    item
+                    for item in items
+                    if zlib.crc32(str(item[table.hash_key]).encode())
+                    % params["TotalSegments"]
+                    == params["Segment"]
+                ]
+            return self._page(
+                params,
+                table,
+                items,
+                lambda item: True,
+                params.get("ExpressionAttributeNames"),
+                self._load(params.get("ExpressionAttributeValues")),
+            )
+
+    def _page(self, params, table, items, key_condition, names, values):
+        if "ExclusiveStartKey" in params:
+            start_key = table.key_of(self._load(params["ExclusiveStartKey"]))
+            keys = [table.key_of(item) for item in items]
+            items = items[keys.index(start_key) + 1 :]
+        items = [item for item in items if key_condition(item)]
+        limit = min(params.get("Limit", self.PAGE_ITEMS), self.PAGE_ITEMS)
+        page, remaining = items[:limit], items[limit:]
+        scanned = len(page)
+        if "FilterExpression" in params:
+            condition = Expression(
+                params["FilterExpression"], names, values
+            ).condition()
+            page = [item for item in page if condition(item)]
+        response = {"Count": len(page), "ScannedCount": scanned}
+        if params.get("Select") != "COUNT":
+            response["Items"] = [self._dump(self._project(params, i)) for i in page]
+        if remaining and page is not None and scanned:
+            last = items[limit - 1]
+            key_names = [table.hash_key] + (
+                [table.range_key] if table.range_key else []
+            )
+            response["LastEvaluatedKey"] = self._dump(
+                {name: last[name] for name in key_names}
+            )
+        return response
+
+    def batch_write_item(self, params, caller):
+        with self._lock:
+            for table_name, requests in params["RequestItems"].items():
+                table = self.tables[table_name]
+                for request in requests:
+                    if "PutRequest" in request:
+                        table.put(self._load(request["PutRequest"]["Item"]))
+                    else:
+                        table.delete(self._load(request["DeleteRequest"]["Key"]))
+            return {"UnprocessedItems": {}}
+
+    def batch_get_item(self, params, caller):
+        with self._lock:
+            responses = {}
+            for table_name, request in params["RequestItems"].items():
+                table = self.tables[table_name]
+                items = [table.get(self._load(key)) for key in request["Keys"]]
+                responses[table_name] = [
+                    self._dump(self._project(request, item))
+                    for item in items
+                    if item is not None
+                ]
+            return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def transact_write_items(self, params, caller):
+        with self._lock:
+            operations = []
+            reasons = []
+            for transact_item in params["TransactItems"]:
+                kind, request = next(iter(transact_item.items()))
+                table = self.tables[request["TableName"]]
+                key = self._load(request.get("Key") or request.get("Item"))
+                passed = self._check(request, table.get(key))
+                reasons.append({"Code": "None" if passed else "ConditionalCheckFailed"})
+                operations.append((kind, request, table, key))
+            if any(reason["Code"] != "None" for reason in reasons):
+                raise ServiceError(
+                    "TransactionCanceledException",
+                    "Transaction cancelled",
+                    CancellationReasons=reasons,
+                )
+            for kind, request, table, key in operations:
+                if kind == "Put":
+                    table.put(self._load(request["Item"]))
+                elif kind == "Update":
+                    table.put(self._update(request, table.get(key) or key))
+                elif kind == "Delete":
+                    table.delete(key)
+            return {}
+
+
+def _sort_key(value):
+    # Orders mixed key types deterministically, numbers before strings
+    return (isinstance(value, str), value if value is not None else "")
+
+
+###############################################################################
+# Other services
+###############################################################################
+
+
+def _page(items, params, token_name, size, max_name):
+    start = int(params.get(token_name) or 0)
+    size = min(params.get(max_name) or size, size)
+    page = items[start : start + size]
+    next_token = str(start + size) if start + size < len(items) else None
+    return page, next_token
+
+
+class LocalSsm:
+    def __init__(self, parameters):
+        self.parameters = dict(parameters)
+
+    def get_parameter(self, params, caller):
+        name = params["Name"]
+        if name not in self.parameters:
+            raise ServiceError("ParameterNotFound", name)
+        return {
+            "Parameter": {
+                "Name": name,
+                "Type": "String",
+                "Value": self.parameters[name],
+                "Version": 1,
+            }
+        }
+
+    def get_parameters_by_path(self, params, caller):
+        path = params["Path"].rstrip("/") + "/"
+        names = sorted(n for n in self.parameters if n.startswith(path))
+        page, next_token = _page(names, params, "NextToken", 10, "MaxResults")
+        response = {
+            "Parameters": [
+                {"Name": n, "Type": "String", "Value": self.parameters[n]} for n in page
+            ]
+        }
+        if next_token:
+            response["NextToken"] = next_token
+        return response
+
+
+class LocalSts:
+    def get_caller_identity(self, params, caller):
+        return {
+            "UserId": f"{ACCESS_KEY_PREFIX}:{caller}",
+            "Account": caller,
+            "Arn": f"arn:aws:sts::{caller}:assumed-role/simulator/simulator",
+        }
+
+    def assume_role(self, params, caller):
+        account_id = params["RoleArn"].split(":")[4]
+        return {
+            "Credentials": {
+                "AccessKeyId": f"{ACCESS_KEY_PREFIX}{account_id}",
+                "SecretAccessKey": "simulator",
+                "SessionToken": "simulator",
+                "Expiration": datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            "AssumedRoleUser": {
+                "AssumedRoleId": f"{ACCESS_KEY_PREFIX}:{params['RoleSessionName']}",
+                "Arn": params["RoleArn"],
+            },
+        }
+
+
+class LocalSns:
+    def publish(self, params, caller):
+        return {"MessageId": str(uuid.uuid4())}
+
+
+class LocalStepFunctions:
+    """State of the invoke-customizations executions, for the scheduler's queue"""
+
+    def __init__(self):
+        self.running = set()
+
+    def describe_execution(self, params, caller):
+        execution_arn = params["executionArn"]
+        status = "RUNNING" if execution_arn in self.running else "SUCCEEDED"
+        return {"executionArn": execution_arn, "status": status}
+
+
+class LocalS3:
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read_body(body):
+        if hasattr(body, "read"):
+            body = body.read()
+        return body.encode() if isinstance(body, str) else bytes(body or b"")
+
+    def put_object(self, params, caller):
+        with self._lock:
+            self.objects[(params["Bucket"], params["Key"])] = self._read_body(
+                params.get("Body")
+            )
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    def create_multipart_upload(self, params, caller):
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads[upload_id] = {
+                "bucket": params["Bucket"],
+                "key": params["Key"],
+                "parts": {},
+            }
+        return {"Bucket": params["Bucket"], "Key": params["Key"], "UploadId": upload_id}
+
+    def upload_part(self, params, caller):
+        with self._lock:
+            self.uploads[params["UploadId"]]["parts"][params["PartNumber"]] = (
+                self._read_body(params.get("Body"))
+            )
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    def complete_multipart_upload(self, params, caller):
+        with self._lock:
+            upload = self.uploads.pop(params["UploadId"])
+            part_numbers = [
+                part["PartNumber"] for part in params["MultipartUpload"]["Parts"]
+            ]
+            self.objects[(upload["bucket"], upload["key"])] = b"".join(
+                upload["parts"][number] for number in part_numbers
+            )
+        return {"Bucket": params["Bucket"], "Key": params["Key"], "ETag": '"done"'}
+
+    def abort_multipart_upload(self, params, caller):
+        with self._lock:
+            self.uploads.pop(params["UploadId"], None)
+        return {}
+
+
+class LocalOrganizations:
+    PAGE_SIZE = 20
+
+    def __init__(self, root_id, ous, accounts, parents):
+        self.root_id = root_id
+        self.ous = ous
+        self.accounts = accounts
+        self.parents = parents
+
+    def _respond(self, items, params, key):
+        page, next_token = _page(
+            items, params, "NextToken", self.PAGE_SIZE, "MaxResults"
+        )
+        response = {key: page}
+        if next_token:
+            response["NextToken"] = next_token
+        return response
+
+    def list_roots(self, params, caller):
+        return {
+            "Roots": [
+                {
+                    "Id": self.root_id,
+                    "Arn": f"arn:aws:organizations::{CT_MANAGEMENT_ACCOUNT_ID}:root/o-sim/{self.root_id}",
+                    "Name": "Root",
+                    "PolicyTypes": [],
+                }
+            ]
+        }
+
+    def list_organizational_units_for_parent(self, params, caller):
+        ous = [
+            ou
+            for ou in self.ous.values()
+            if self.parents[ou["Id"]] == params["ParentId"]
+        ]
+        return self._respond(ous, params, "OrganizationalUnits")
+
+    def list_accounts_for_parent(self, params, caller):
+        accounts = [
+            account
+            for account in self.accounts.values()
+            if self.parents[account["Id"]] == params["ParentId"]
+        ]
+        return self._respond(accounts, params, "Accounts")
+
+    def list_accounts(self, params, caller):
+        return self._respond(list(self.accounts.values()), params, "Accounts")
+
+    def list_parents(self, params, caller):
+        parent_id = self.parents[params["ChildId"]]
+        parent_type = "ROOT" if parent_id == self.root_id else "ORGANIZATIONAL_UNIT"
+        return {"Parents": [{"Id": parent_id, "Type": parent_type}]}
+
+    def describe_account(self, params, caller):
+        if params["AccountId"] not in self.accounts:
+            raise ServiceError("AccountNotFoundException", params["AccountId"])
+        return {"Account": self.accounts[params["AccountId"]]}
+
+    def describe_organizational_unit(self, params, caller):
+        return {"OrganizationalUnit": self.ous[params["OrganizationalUnitId"]]}
+
+    def list_tags_for_resource(self, params, caller):
+        return {"Tags": []}
+
+
+class LocalCodePipeline:
+    """
+    Customization pipelines whose executions stay in progress until the
+    simulator finishes them, reporting each start through on_start
+    """
+
+    PAGE_SIZE = 100
+
+    def __init__(self, clock, pipeline_names, revisions, on_start):
+        self.clock = clock
+        self.executions = {name: [] for name in pipeline_names}
+        self.revisions = revisions
+        self.on_start = on_start
+        self.running = 0
+        self.peak_running = 0
+        self._lock = threading.Lock()
+
+    def _executions(self, name):
+        if name not in self.executions:
+            raise ServiceError("PipelineNotFoundException", name)
+        return self.executions[name]
+
+    def list_pipelines(self, params, caller):
+        names = sorted(self.executions)
+        page, next_token = _page(
+            names, params, "nextToken", self.PAGE_SIZE, "maxResults"
+        )
+        created = self.clock.epoch
+        response = {
+            "pipelines": [
+                {"name": n, "version": 1, "created": created, "updated": created}
+                for n in page
+            ]
+        }
+        if next_token:
+            response["nextToken"] = next_token
+        return response
+
+    def list_tags_for_resource(self, params, caller):
+        self._executions(params["resourceArn"].split(":")[-1])
+        return {"tags": [{"key": "managed_by", "value": "AFT"}]}
+
+    def list_pipeline_executions(self, params, caller):
+        with self._lock:
+            executions = list(self._executions(params["pipelineName"]))
+        page, next_token = _page(
+            executions, params, "nextToken", self.PAGE_SIZE, "maxResults"
+        )
+        response = {"pipelineExecutionSummaries": [dict(e) for e in page]}
+        if next_token:
+            response["nextToken"] = next_token
+        return response
+
+    def start_pipeline_execution(self, params, caller):
+        name = params["name"]
+        execution_id = str(uuid.uuid4())
+        started = self.clock.now()
+        with self._lock:
+            self._executions(name).insert(
+                0,
+                {
+                    "pipelineExecutionId": execution_id,
+                    "status": "InProgress",
+                    "startTime": self.clock.datetime(started),
+                    "lastUpdateTime": self.clock.datetime(started),
+                },
+            )
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+        self.on_start(name, execution_id, started)
+        return {"pipelineExecutionId": execution_id}
+
+    def get_pipeline_execution(self, params, caller):
+        with self._lock:
+            execution = next(
+                e
+                for e in self._executions(params["pipelineName"])
+                if e["pipelineExecutionId"] == params["pipelineExecutionId"]
+            )
+        return {
+            "pipelineExecution": {
+                "pipelineName": params["pipelineName"],
+                "pipelineVersion": 1,
+                "pipelineExecutionId": execution["pipelineExecutionId"],
+                "status": execution["status"],
+                "artifactRevisions": [
+                    {"name": f"source-aft-{source}", "revisionId": revision}
+                    for source, revision in self.revisions.items()
+                ],
+            }
+        }
+
+    def finish(self, name, execution_id, status, at):
+        with self._lock:
+            for execution in self.executions[name]:
+                if execution["pipelineExecutionId"] == execution_id:
+                    execution["status"] = status
+                    execution["lastUpdateTime"] = self.clock.datetime(at)
+            self.running -= 1
+
+
+class LocalAws:
+    """
+    Serves the API calls of every boto3 session created after install() from the
+    local stand-ins, applying the latency, rate limit and faults of each service.
+    Throttled and failed calls are retried with exponential backoff, as botocore
+    would, and counted.
+    """
+
+    def __init__(self, backends, profiles, stats, rng, retry_base_sec):
+        self.backends = backends
+        self.profiles = profiles
+        self.stats = stats
+        self.rng = rng
+        self.retry_base_sec = retry_base_sec
+        self._rng_lock = threading.Lock()
+
+    def install(self):
+        original_init = boto3.session.Session.__init__
+        local_aws = self
+
+        def init(session, *args, **kwargs):
+            original_init(session, *args, **kwargs)
+            # Run last so that the DynamoDB resource has built its expressions
+            session.events.register_last("before-parameter-build", _capture_params)
+            session.events.register("before-call", local_aws.before_call)
+
+        boto3.session.Session.__init__ = init
+
+    def before_call(self, model, params, request_signer, context, **kwargs):
+        service = model.service_model.service_name
+        operation = model.name
+        api_params = context.get(_PARAMS_CONTEXT_KEY, {})
+        credentials = request_signer._credentials
+        access_key = credentials.access_key if credentials else ""
+        caller = (
+            access_key[len(ACCESS_KEY_PREFIX) :]
+            if access_key.startswith(ACCESS_KEY_PREFIX)
+            else AFT_MANAGEMENT_ACCOUNT_ID
+        )
+        handler = getattr(self.backends[service], xform_name(operation))
+        profile = self.profiles.get(service) or ServiceProfile()
+
+        for attempt in range(MAX_ATTEMPTS):
+            self.stats.record_call(service, operation)
+            if profile.latency_sec:
+                time.sleep(profile.latency_sec)
+            with self._rng_lock:
+                fault = profile.draw_fault(self.rng, time.perf_counter())
+                backoff = self.rng.uniform(0, self.retry_base_sec * 2**attempt)
+            if fault is None:
+                try:
+                    response = handler(api_params, caller=caller)
+                except ServiceError as error:
+                    return error.as_response()
+                response["ResponseMetadata"] = {"HTTPStatusCode": 200}
+                return LocalHttpResponse(200), response
+            self.stats.record_fault(service, fault)
+            time.sleep(min(backoff, 20 * self.retry_base_sec))
+
+        if fault == "throttle":
+            code = THROTTLING_ERROR_CODES.get(service, "ThrottlingException")
+            return ServiceError(code, "Rate exceeded").as_response()
+        return ServiceError("InternalFailure", "Simulated failure", 500).as_response()
+
+
+def _capture_params(params, context, **kwargs):
+    context[_PARAMS_CONTEXT_KEY] = params
+
+
+class LocalStepFunctionsMap:
+    """
+    Runs a Map state over account provisioning executions in virtual time, with at
+    most max_concurrency running. StartExecution calls are rate limited, and
+    throttled starts are retried after a backoff
+    """
+
+    def __init__(self, stats, profile, rng, provisioning_sec, failure_rate):
+        self.stats = stats
+        self.profile = profile
+        self.rng = rng
+        self.provisioning_sec = provisioning_sec
+        self.failure_rate = failure_rate
+        self._tokens = float(profile.requests_per_second or 0)
+        self._last_refill = 0.0
+
+    def _throttled(self, at):
+        if self.rng.random() < self.profile.throttle_rate:
+            return True
+        if not self.profile.requests_per_second:
+            return False
+        rate = self.profile.requests_per_second
+        self._tokens = min(float(rate), self._tokens + (at - self._last_refill) * rate)
+        self._last_refill = max(self._last_refill, at)
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    def run(self, items, start, max_concurrency):
+        """Returns the time the map completed at, or raises if an item failed"""
+        free_at = [start] * max_concurrency
+        for _ in items:
+            at = heapq.heappop(free_at)
+            attempt = 0
+            while True:
+                self.stats.record_call("stepfunctions", "StartExecution")
+                at += self.profile.latency_sec
+                if not self._throttled(at):
+                    break
+                self.stats.record_fault("stepfunctions", "throttle")
+                at += self.rng.uniform(0, 0.05 * 2**attempt)
+                attempt += 1
+            duration = self.rng.uniform(0.5, 1.5) * self.provisioning_sec
+            if self.rng.random() < self.failure_rate:
+                raise RuntimeError(
+                    f"Account provisioning execution failed at {at + duration:.0f}s"
+                )
+            heapq.heappush(free_at, at + duration)
+        return max(free_at)
+
+
+class LocalLambdaContext:
+    def __init__(self, function_name):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self.log_group_name = f"/aws/lambda/{function_name}"
+        self.invoked_function_arn = f"arn:aws:lambda:{REGION}:{AFT_MANAGEMENT_ACCOUNT_ID}:function:{function_name}"
+
+
+def load_lambda(name):
+    path = os.path.join(CUSTOMIZATIONS_LAMBDA_DIR, f"{name}.py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+###############################################################################
+# Rollout
+###############################################################################
+
+
+class RolloutSimulator:
+    POLL_INTERVAL_SEC = 30  # Wait on Pipeline Executions
+    RECONCILE_INTERVAL_SEC = 900  # aft_pipeline_execution_reconciliation rule
+    EVENT_DELIVERY_SEC = 1
+    CUSTOMIZATIONS_BUCKET = f"aft-customizations-pipeline-{AFT_MANAGEMENT_ACCOUNT_ID}"
+    LAMBDAS = {
+        "identify_targets": "aft_customizations_identify_targets",
+        "get_pipeline_executions": "aft_customizations_get_pipeline_executions",
+        "execute_pipeline": "aft_customizations_execute_pipeline",
+        "pipeline_event_handler": "aft_customizations_pipeline_event_handler",
+    }
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.clock = SimClock()
+        self.stats = ApiStats()
+        self.lambda_calls = Counter()
+        self.lambda_seconds = Counter()
+        self.lambda_errors = Counter()
+        self._events = []
+        self._event_sequence = 0
+        self._events_lock = threading.Lock()
+        self.pipeline_seconds = 0.0
+        self.pipeline_outcomes = Counter()
+
+        self.account_ids = [f"{100000000000 + i}" for i in range(args.accounts)]
+        # Each account has its own typical pipeline duration, runs vary around it
+        self.mean_durations = {
+            account_id: args.pipeline_minutes
+            * 60
+            * self.rng.lognormvariate(0, args.pipeline_spread)
+            for account_id in self.account_ids
+        }
+
+        self.dynamodb = LocalDynamoDB()
+        self.s3 = LocalS3()
+        self.step_functions = LocalStepFunctions()
+        self.codepipeline = LocalCodePipeline(
+            self.clock,
+            [f"{a}-customizations-pipeline" for a in self.account_ids],
+            {"global-customizations": "g1", "account-customizations": "a1"},
+            self._on_pipeline_start,
+        )
+        backends = {
+            "dynamodb": self.dynamodb,
+            "s3": self.s3,
+            "codepipeline": self.codepipeline,
+            "organizations": self._build_organization(),
+            "ssm": LocalSsm(self._build_parameters()),
+            "sts": LocalSts(),
+            "sns": LocalSns(),
+            "stepfunctions": self.step_functions,
+        }
+        self._seed_tables()
+        profiles = {
+            "codepipeline": ServiceProfile(
+                args.codepipeline_latency_ms / 1000,
+                args.codepipeline_rps,
+                args.codepipeline_throttle_rate,
+                args.codepipeline_error_rate,
+            ),
+            "organizations": ServiceProfile(
+                args.organizations_latency_ms / 1000,
+                args.organizations_rps,
+                args.organizations_throttle_rate,
+                args.organizations_error_rate,
+            ),
+            "dynamodb": ServiceProfile(args.dynamodb_latency_ms / 1000),
+            "s3": ServiceProfile(args.dynamodb_latency_ms / 1000),
+            "ssm": ServiceProfile(args.dynamodb_latency_ms / 1000),
+            "sts": ServiceProfile(args.dynamodb_latency_ms / 1000),
+        }
+        LocalAws(
+            backends, profiles, self.stats, self.rng, args.retry_base_ms / 1000
+        ).install()
+        self.step_functions_map = LocalStepFunctionsMap(
+            self.stats,
+            ServiceProfile(
+                args.stepfunctions_latency_ms / 1000,
+                args.stepfunctions_rps,
+                args.stepfunctions_throttle_rate,
+            ),
+            self.rng,
+            args.provisioning_seconds,
+            args.provisioning_failure_rate,
+        )
+        self.lambdas = {key: load_lambda(name) for key, name in self.LAMBDAS.items()}
+        logging.getLogger("aft").setLevel(args.log_level.upper())
+
+    def _build_parameters(self):
+        return {
+            constants.SSM_PARAM_ACCOUNT_AFT_MANAGEMENT_ACCOUNT_ID: AFT_MANAGEMENT_ACCOUNT_ID,
+            constants.SSM_PARAM_ACCOUNT_CT_MANAGEMENT_ACCOUNT_ID: CT_MANAGEMENT_ACCOUNT_ID,
+            constants.SSM_PARAM_ACCOUNT_LOG_ARCHIVE_ACCOUNT_ID: LOG_ARCHIVE_ACCOUNT_ID,
+            constants.SSM_PARAM_ACCOUNT_AUDIT_ACCOUNT_ID: AUDIT_ACCOUNT_ID,
+            AuthClient.SSM_PARAM_AFT_SESSION_NAME: "AWSAFT-Session",
+            AuthClient.SSM_PARAM_AFT_ADMIN_ROLE_NAME: "AWSAFTAdmin",
+            AuthClient.SSM_PARAM_AFT_EXEC_ROLE_NAME: "AWSAFTExecution",
+            constants.SSM_PARAM_AFT_DDB_META_TABLE: "aft-request-metadata",
+            constants.SSM_PARAM_AFT_DDB_REQ_TABLE: "aft-request",
+            constants.SSM_PARAM_AFT_DDB_CACHE_TABLE: "aft-cache",
+            constants.SSM_PARAM_AFT_CODEPIPELINE_CUSTOMIZATIONS_BUCKET_ID: self.CUSTOMIZATIONS_BUCKET,
+            constants.SSM_PARAM_AFT_MAXIMUM_CONCURRENT_CUSTOMIZATIONS: str(
+                self.args.max_concurrency
+            ),
+            constants.SSM_PARAM_AFT_CUSTOMIZATION_SCHEDULING_POLICY: self.args.scheduling_policy,
+            constants.SSM_PARAM_AFT_VCS_PROVIDER: "github",
+            constants.SSM_PARAM_SNS_TOPIC_ARN: f"arn:aws:sns:{REGION}:{AFT_MANAGEMENT_ACCOUNT_ID}:aft-notifications",
+            constants.SSM_PARAM_SNS_FAILURE_TOPIC_ARN: f"arn:aws:sns:{REGION}:{AFT_MANAGEMENT_ACCOUNT_ID}:aft-failure-notifications",
+        }
+
+    def _build_organization(self):
+        root_id = "r-sim0"
+        ous = {}
+        parents = {}
+        for index in range(self.args.ous):
+            ou_id = f"ou-sim0-{index:08d}"
+            ous[ou_id] = {
+                "Id": ou_id,
+                "Arn": f"arn:aws:organizations::{CT_MANAGEMENT_ACCOUNT_ID}:ou/o-sim/{ou_id}",
+                "Name": f"Workloads{index}",
+            }
+            parents[ou_id] = root_id
+        accounts = {}
+        joined = self.clock.epoch - timedelta(days=365)
+        core_accounts = [
+            CT_MANAGEMENT_ACCOUNT_ID,
+            LOG_ARCHIVE_ACCOUNT_ID,
+            AUDIT_ACCOUNT_ID,
+        ]
+        for index, account_id in enumerate(core_accounts + self.account_ids):
+            accounts[account_id] = {
+                "Id": account_id,
+                "Arn": f"arn:aws:organizations::{CT_MANAGEMENT_ACCOUNT_ID}:account/o-sim/{account_id}",
+                "Email": f"{account_id}@example.com",
+                "Name": f"account-{account_id}",
+                "Status": "ACTIVE",
+                "State": "ACTIVE",
+                "JoinedMethod": "CREATED",
+                "JoinedTimestamp": joined,
+            }
+            parents[account_id] = (
+                root_id
+                if account_id in core_accounts
+                else f"ou-sim0-{index % self.args.ous:08d}"
+            )
+        return LocalOrganizations(root_id, ous, accounts, parents)
+
+    def _seed_tables(self):
+        self.dynamodb.create_table("aft-request-metadata", "id")
+        self.dynamodb.create_table("aft-request", "id")
+        self.dynamodb.create_table("aft-cache", "pk", "sk")
+        metadata = self.dynamodb.tables["aft-request-metadata"]
+        requests = self.dynamodb.tables["aft-request"]
+        for index, account_id in enumerate(self.account_ids):
+            email = f"{account_id}@example.com"
+            metadata.put(
+                {
+                    "id": account_id,
+                    "email": email,
+                    "account_name": f"account-{account_id}",
+                    "account_customizations_name": "sandbox",
+                    "parent_ou": f"ou-sim0-{index % self.args.ous:08d}",
+                }
+            )
+            requests.put(
+                {
+                    "id": email,
+                    "control_tower_parameters": {
+                        "AccountEmail": email,
+                        "AccountName": f"account-{account_id}",
+                        "ManagedOrganizationalUnit": f"Workloads{index % self.args.ous}",
+                        "SSOUserEmail": email,
+                        "SSOUserFirstName": "Simulated",
+                        "SSOUserLastName": "User",
+                    },
+                    "account_tags": "{}",
+                    "account_customizations_name": "sandbox",
+                    "custom_fields": "{}",
+                    "change_management_parameters": {
+                        "change_requested_by": "simulator",
+                        "change_reason": "simulated rollout",
+                    },
+                }
+            )
+
+    def _schedule(self, at, kind, payload=None):
+        with self._events_lock:
+            self._event_sequence += 1
+            heapq.heappush(self._events, (at, self._event_sequence, kind, payload))
+
+    def _on_pipeline_start(self, name, execution_id, started):
+        account_id = name.split("-", 1)[0]
+        duration = self.mean_durations[account_id] * self.rng.uniform(0.9, 1.1)
+        failed = self.rng.random() < self.args.pipeline_failure_rate
+        self._schedule(
+            started + self.EVENT_DELIVERY_SEC,
+            "pipeline_event",
+            (name, execution_id, "STARTED"),
+        )
+        self._schedule(
+            started + duration,
+            "pipeline_end",
+            (name, execution_id, "Failed" if failed else "Succeeded"),
+        )
+        self.pipeline_seconds += duration
+
+    def invoke(self, key, event, at):
+        start = time.perf_counter()
+        with self.clock.running(at):
+            try:
+                return self.lambdas[key].lambda_handler(
+                    event, LocalLambdaContext(self.LAMBDAS[key])
+                )
+            except Exception:
+                self.lambda_errors[key] += 1
+                raise
+            finally:
+                self.lambda_calls[key] += 1
+                self.lambda_seconds[key] += time.perf_counter() - start
+
+    def _state_change_event(self, name, execution_id, state, at):
+        return {
+            "version": "0",
+            "id": str(uuid.uuid4()),
+            "detail-type": PIPELINE_EXECUTION_STATE_CHANGE,
+            "source": "aws.codepipeline",
+            "account": AFT_MANAGEMENT_ACCOUNT_ID,
+            "time": self.clock.event_time(at),
+            "region": REGION,
+            "detail": {"pipeline": name, "execution-id": execution_id, "state": state},
+        }
+
+    def run_rollout(self, number, start):
+        """Runs the invoke-customizations state machine, returning its phase times"""
+        execution_id = f"simulated-rollout-{number}-{uuid.uuid4().hex[:8]}"
+        execution = {
+            "execution_id": execution_id,
+            "execution_arn": (
+                f"arn:aws:states:{REGION}:{AFT_MANAGEMENT_ACCOUNT_ID}:execution:"
+                f"aft-invoke-customizations:{execution_id}"
+            ),
+        }
+        self.step_functions.running.add(execution["execution_arn"])
+        self._events = []
+        self.pipeline_seconds = 0.0
+        self.pipeline_outcomes = Counter()
+        self.codepipeline.peak_running = self.codepipeline.running
+
+        targets = self.invoke(
+            "identify_targets",
+            {
+                "get_execution_id": execution,
+                "include": [{"type": "all"}],
+            },
+            start,
+        )
+        identified = self.clock.now()
+
+        # Invoke Provisioning Framework, a map over each chunk of targets in turn
+        at = identified
+        info = targets["target_accounts_info"]
+        for key in info["chunk_keys"]:
+            self.stats.record_call("s3", "GetObject")
+            lines = self.s3.objects[(info["bucket"], key)].decode().splitlines()
+            items = [json.loads(line) for line in lines if line]
+            at = self.step_functions_map.run(items, at, self.args.max_concurrency)
+        provisioned = at
+
+        self.invoke("get_pipeline_executions", {}, provisioned)
+        self._schedule(self.clock.now(), "execute")
+        next_reconcile = (
+            provisioned // self.RECONCILE_INTERVAL_SEC + 1
+        ) * self.RECONCILE_INTERVAL_SEC
+        self._schedule(next_reconcile, "reconcile")
+
+        while self._events:
+            with self._events_lock:
+                at, _, kind, payload = heapq.heappop(self._events)
+            if kind == "execute":
+                targets = self.invoke(
+                    "execute_pipeline",
+                    {
+                        "get_execution_id": execution,
+                        "targets": targets,
+                    },
+                    at,
+                )
+                if targets["number_pending_accounts"] == 0:
+                    self.step_functions.running.discard(execution["execution_arn"])
+                    return (
+                        identified - start,
+                        provisioned - identified,
+                        self.clock.now() - provisioned,
+                    )
+                self._schedule(self.clock.now() + self.POLL_INTERVAL_SEC, "execute")
+            elif kind == "pipeline_end":
+                name, pipeline_execution_id, status = payload
+                self.codepipeline.finish(name, pipeline_execution_id, status, at)
+                self.pipeline_outcomes[status] += 1
+                state = "SUCCEEDED" if status == "Succeeded" else "FAILED"
+                self._schedule(
+                    at + self.EVENT_DELIVERY_SEC,
+                    "pipeline_event",
+                    (name, pipeline_execution_id, state),
+                )
+            elif kind == "pipeline_event":
+                name, pipeline_execution_id, state = payload
+                self._invoke_event_handler(
+                    self._state_change_event(name, pipeline_execution_id, state, at), at
+                )
+            elif kind == "reconcile":
+                self._invoke_event_handler(
+                    {
+                        "detail-type": "Scheduled Event",
+                        "time": self.clock.event_time(at),
+                    },
+                    at,
+                )
+                self._schedule(at + self.RECONCILE_INTERVAL_SEC, "reconcile")
+        raise RuntimeError("Rollout stalled with accounts still pending")
+
+    def _invoke_event_handler(self, event, at):
+        # Failed invocations are retried by Lambda, the rollout carries on
+        try:
+            self.invoke("pipeline_event_handler", event, at)
+        except Exception as error:
+            logging.getLogger("aft").warning(f"Pipeline event handler failed: {error}")
+
+    def run(self):
+        at = 0.0
+        for number in range(1, self.args.rollouts + 1):
+            before = self.stats.snapshot()
+            lambda_before = (Counter(self.lambda_calls), Counter(self.lambda_seconds))
+            try:
+                phases = self.run_rollout(number, at)
+            except Exception as error:
+                print(
+                    f"rollout {number} failed at {_duration(self.clock.now())}: {error}"
+                )
+                return 1
+            self.report(number, phases, before, lambda_before)
+            at = self.clock.now() + 60
+        return 0
+
+    def report(self, number, phases, before, lambda_before):
+        identify, provisioning, pipelines = phases
+        calls, throttles, errors = (
+            after - prior for after, prior in zip(self.stats.snapshot(), before)
+        )
+        total = identify + provisioning + pipelines
+        print(
+            f"rollout {number}: {_duration(total)} for {self.args.accounts} accounts"
+            f" (identify {identify:.1f}s, provisioning {_duration(provisioning)},"
+            f" pipelines {_duration(pipelines)})"
+        )
+        utilization = self.pipeline_seconds / max(
+            pipelines * self.args.max_concurrency, 1e-9
+        )
+        print(
+            f"  pipelines: {sum(self.pipeline_outcomes.values())} run,"
+            f" {self.pipeline_outcomes['Failed']} failed,"
+            f" peak concurrency {self.codepipeline.peak_running}/{self.args.max_concurrency},"
+            f" slot utilization {utilization:.1%}"
+        )
+        services = sorted(
+            {service for service, _ in calls} | set(throttles) | set(errors)
+        )
+        print(f"  {'service':<15} {'calls':>9} {'throttles':>10} {'errors':>8}")
+        for service in services:
+            service_calls = sum(n for (s, _), n in calls.items() if s == service)
+            print(
+                f"  {service:<15} {service_calls:>9} {throttles[service]:>10}"
+                f" {errors[service]:>8}"
+            )
+        print(f"  {'lambda':<44} {'invocations':>11} {'seconds':>9}")
+        for key, name in self.LAMBDAS.items():
+            invocations = self.lambda_calls[key] - lambda_before[0][key]
+            seconds = self.lambda_seconds[key] - lambda_before[1][key]
+            print(f"  {name:<44} {invocations:>11} {seconds:>9.2f}")
+        if self.args.verbose:
+            for (service, operation), count in sorted(calls.items()):
+                print(f"    {service}.{operation}: {count}")
+
+
+def _duration(seconds):
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulate an AFT customization rollout against local stand-ins"
+    )
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--ous", type=int, default=10)
+    parser.add_argument("--rollouts", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=int, default=5)
+    parser.add_argument(
+        "--scheduling-policy",
+        default="longest_first",
+        choices=["list_order", "longest_first", "shortest_first"],
+    )
+    parser.add_argument("--pipeline-minutes", type=float, default=10.0)
+    parser.add_argument(
+        "--pipeline-spread",
+        type=float,
+        default=0.5,
+        help="Lognormal sigma of the typical pipeline duration of each account",
+    )
+    parser.add_argument("--pipeline-failure-rate", type=float, default=0.0)
+    parser.add_argument("--provisioning-seconds", type=float, default=60.0)
+    parser.add_argument("--provisioning-failure-rate", type=float, default=0.0)
+    parser.add_argument("--codepipeline-latency-ms", type=float, default=5.0)
+    parser.add_argument("--codepipeline-rps", type=float, default=None)
+    parser.add_argument("--codepipeline-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--codepipeline-error-rate", type=float, default=0.0)
+    parser.add_argument("--organizations-latency-ms", type=float, default=10.0)
+    parser.add_argument("--organizations-rps", type=float, default=None)
+    parser.add_argument("--organizations-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--organizations-error-rate", type=float, default=0.0)
+    parser.add_argument("--stepfunctions-latency-ms", type=float, default=20.0)
+    parser.add_argument("--stepfunctions-rps", type=float, default=None)
+    parser.add_argument("--stepfunctions-throttle-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--dynamodb-latency-ms",
+        type=float,
+        default=1.0,
+        help="Latency of DynamoDB, S3, SSM and STS calls",
+    )
+    parser.add_argument(
+        "--retry-base-ms",
+        type=float,
+        default=50.0,
+        help="Base of the exponential backoff after a throttled or failed call",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument(
+        "--verbose", action="store_true", help="Also report calls per operation"
+    )
+    sys.exit(RolloutSimulator(parser.parse_args()).run())
@@ -16,6 +16,10 @@ from aft_common.ssm import (
     get_ssm_parameters_names_by_path,
     put_ssm_parameters,
 )
+from aft_common.validation import (
+    ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA,
+    validate_event,
+)
 
 if TYPE_CHECKING:
     from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -24,6 +28,7 @@ else:
 
 
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    validate_event(ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA, event)
     event_payload = event["payload"]
     request_id = event_payload["customization_request_id"]
     target_account_id = event_payload["account_info"]["account"]["id"]
@@ -8,6 +8,10 @@ from aft_common import notifications
 from aft_common.account_provisioning_framework import ProvisionRoles
 from aft_common.auth import AuthClient
 from aft_common.logger import customization_request_logger
+from aft_common.validation import (
+    ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA,
+    validate_event,
+)
 
 if TYPE_CHECKING:
     from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -16,6 +20,7 @@ else:
 
 
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    validate_event(ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA, event)
     action = event["action"]
     event_payload = event["payload"]
     request_id = event_payload["customization_request_id"]
@@ -7,6 +7,10 @@ from typing import TYPE_CHECKING, Any, Dict
 from aft_common import notifications
 from aft_common.account_provisioning_framework import persist_metadata
 from aft_common.logger import customization_request_logger
+from aft_common.validation import (
+    ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA,
+    validate_event,
+)
 from boto3.session import Session
 
 if TYPE_CHECKING:
@@ -20,6 +24,7 @@ else:
 def lambda_handler(
     event: Dict[str, Any], context: LambdaContext
 ) -> PutItemOutputTableTypeDef:
+    validate_event(ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA, event)
     action = event["action"]
     event_payload = event["payload"]
     request_id = event_payload["customization_request_id"]
@@ -8,6 +8,10 @@ from aft_common import notifications
 from aft_common.account_provisioning_framework import ProvisionRoles, tag_account
 from aft_common.auth import AuthClient
 from aft_common.logger import customization_request_logger
+from aft_common.validation import (
+    ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA,
+    validate_event,
+)
 from boto3.session import Session
 
 if TYPE_CHECKING:
@@ -17,6 +21,7 @@ else:
 
 
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    validate_event(ACCOUNT_PROVISIONING_FRAMEWORK_EVENT_SCHEMA, event)
     action = event["action"]
     event_payload = event["payload"]
     request_id = event_payload["customization_request_id"]
@@ -5,11 +5,17 @@ import inspect
 import logging
 from typing import TYPE_CHECKING, Any, Dict
 
-from aft_common import notifications
+from aft_common import ddb, notifications
+from aft_common.account_provisioning_framework import ProvisionRoles
 from aft_common.account_request_record_handler import AccountRequestRecordHandler
+from aft_common.aft_types import StreamBatchResponse
 from aft_common.aft_utils import sanitize_input_for_logging
 from aft_common.auth import AuthClient
 from aft_common.logger import configure_aft_logger
+from aft_common.organizations import OrganizationsAgent
+from aft_common.organizations_cache import OrganizationSnapshotStore
+from aft_common.service_catalog import ProvisionedProductMirror
+from boto3.session import Session
 
 if TYPE_CHECKING:
     from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -21,13 +27,56 @@ configure_aft_logger()
 logger = logging.getLogger("aft")
 
 
-def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+def process_record(
+    record: Dict[str, Any],
+    auth: AuthClient,
+    ct_management_session: Session,
+    orgs_agent: OrganizationsAgent,
+    product_mirror: ProvisionedProductMirror,
+) -> None:
+    # Validated per record, so that a malformed record fails alone
+    AccountRequestRecordHandler.validate_record(record)
+    record_handler = AccountRequestRecordHandler(
+        auth=auth,
+        record=record,
+        ct_management_session=ct_management_session,
+        orgs_agent=orgs_agent,
+        product_mirror=product_mirror,
+    )
+    logger.info(sanitize_input_for_logging(record_handler.record))
+    record_handler.process_request()
+
+
+def lambda_handler(
+    event: Dict[str, Any], context: LambdaContext
+) -> StreamBatchResponse:
     auth = AuthClient()
     try:
-        record_handler = AccountRequestRecordHandler(auth=auth, event=event)
-        logger.info(sanitize_input_for_logging(record_handler.record))
-        record_handler.process_request()
-
+        # Built once and shared by the records, which are processed concurrently.
+        # The organization snapshot and provisioned product mirror are loaded by
+        # the first record that needs them
+        aft_management_session = auth.get_aft_management_session()
+        ct_management_session = auth.get_ct_management_session()
+        orgs_agent = OrganizationsAgent(
+            ct_management_session=ct_management_session,
+            snapshot_store=OrganizationSnapshotStore(aft_management_session),
+        )
+        product_mirror = ProvisionedProductMirror(
+            aft_management_session=aft_management_session,
+            ct_management_session=auth.get_ct_management_session(
+                role_name=ProvisionRoles.SERVICE_ROLE_NAME
+            ),
+        )
+        checkpoint = ddb.StreamRecordCheckpoint(
+            aft_management_session, consumer="account-request-action-trigger"
+        )
+        failures = ddb.process_stream_records(
+            event["Records"],
+            lambda record: process_record(
+                record, auth, ct_management_session, orgs_agent, product_mirror
+            ),
+            checkpoint=checkpoint,
+        )
     except Exception as error:
         notifications.send_lambda_failure_sns_message(
             session=auth.aft_management_session,
@@ -42,3 +91,23 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
         }
         logger.exception(message)
         raise
+
+    if failures:
+        error_message = (
+            f"{len(failures)} of {len(event['Records'])} account request records failed: "
+            + "; ".join(sorted(set(failures.values())))
+        )
+        notifications.send_lambda_failure_sns_message(
+            session=auth.aft_management_session,
+            message=error_message,
+            context=context,
+            subject="AFT account request failed",
+        )
+        message = {
+            "FILE": __file__.split("/")[-1],
+            "METHOD": inspect.stack()[0][3],
+            "EXCEPTION": error_message,
+        }
+        logger.error(message)
+    # Lambda retries the batch from the earliest failed record
+    return ddb.build_stream_batch_response(failures)
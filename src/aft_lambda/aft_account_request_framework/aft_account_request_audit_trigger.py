@@ -3,75 +3,94 @@
 #
 import inspect
 import logging
-import sys
 from typing import TYPE_CHECKING, Any, Dict
 
 from aft_common import constants as utils
-from aft_common import notifications, ssm
+from aft_common import ddb, notifications, ssm
 from aft_common.account_request_framework import put_audit_record
+from aft_common.aft_types import StreamBatchResponse
 from aft_common.aft_utils import sanitize_input_for_logging
 from aft_common.logger import configure_aft_logger
 from boto3.session import Session
 
 if TYPE_CHECKING:
     from aws_lambda_powertools.utilities.typing import LambdaContext
+    from mypy_boto3_dynamodb import DynamoDBClient
 else:
     LambdaContext = object
+    DynamoDBClient = object
 
 configure_aft_logger()
 logger = logging.getLogger("aft")
 
+SUPPORTED_EVENTS = {"INSERT", "MODIFY", "REMOVE"}
 
-def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
-    aft_management_session = Session()
-    try:
-        # validate event
-        if "Records" in event:
-            response = None
-            event_record = event["Records"][0]
-            if "eventSource" in event_record:
-                if event_record["eventSource"] == "aws:dynamodb":
-                    logger.info("DynamoDB Event Record Received")
-                    table_name = ssm.get_ssm_parameter_value(
-                        aft_management_session, utils.SSM_PARAM_AFT_DDB_AUDIT_TABLE
-                    )
-                    event_name = event_record["eventName"]
 
-                    supported_events = {"INSERT", "MODIFY", "REMOVE"}
+def audit_record(
+    session: Session,
+    dynamodb: DynamoDBClient,
+    table_name: str,
+    event_record: Dict[str, Any],
+) -> None:
+    if event_record.get("eventSource") != "aws:dynamodb":
+        raise Exception("Non DynamoDB Event Received")
+    event_name = event_record["eventName"]
+    if event_name not in SUPPORTED_EVENTS:
+        logger.info(
+            f"Event Name: {sanitize_input_for_logging(event_name)} is unsupported."
+        )
+        return
+    logger.info("Event Name: " + event_name)
+    image_key_name = "OldImage" if event_name == "REMOVE" else "NewImage"
+    put_audit_record(
+        session,
+        table_name,
+        event_record["dynamodb"][image_key_name],
+        event_name,
+        dynamodb=dynamodb,
+    )
 
-                    image_key_name = (
-                        "OldImage" if event_name == "REMOVE" else "NewImage"
-                    )
-                    image_to_record = event_record["dynamodb"][image_key_name]
 
-                    if event_name in supported_events:
-                        logger.info("Event Name: " + event_name)
-                        response = put_audit_record(
-                            aft_management_session,
-                            table_name,
-                            image_to_record,
-                            event_name,
-                        )
-                    else:
-                        logger.info(
-                            f"Event Name: {sanitize_input_for_logging(event_name)} is unsupported."
-                        )
-                else:
-                    raise Exception("Non DynamoDB Event Received")
-        else:
-            logger.info("Unexpected Event Received")
+def lambda_handler(
+    event: Dict[str, Any], context: LambdaContext
+) -> StreamBatchResponse:
+    aft_management_session = Session()
+    if "Records" not in event:
+        logger.info("Unexpected Event Received")
+        return ddb.build_stream_batch_response({})
 
-    except Exception as error:
+    logger.info(f"{len(event['Records'])} DynamoDB Event Records Received")
+    table_name = ssm.get_ssm_parameter_value(
+        aft_management_session, utils.SSM_PARAM_AFT_DDB_AUDIT_TABLE
+    )
+    # Clients are thread safe, unlike sessions
+    dynamodb = aft_management_session.client("dynamodb")
+    checkpoint = ddb.StreamRecordCheckpoint(
+        aft_management_session, consumer="account-request-audit-trigger"
+    )
+    failures = ddb.process_stream_records(
+        event["Records"],
+        lambda event_record: audit_record(
+            aft_management_session, dynamodb, table_name, event_record
+        ),
+        checkpoint=checkpoint,
+    )
+    if failures:
+        error_message = (
+            f"{len(failures)} of {len(event['Records'])} audit records failed: "
+            + "; ".join(sorted(set(failures.values())))
+        )
         notifications.send_lambda_failure_sns_message(
             session=aft_management_session,
-            message=str(error),
+            message=error_message,
             context=context,
             subject="AFT account request failed",
         )
         message = {
             "FILE": __file__.split("/")[-1],
             "METHOD": inspect.stack()[0][3],
-            "EXCEPTION": str(error),
+            "EXCEPTION": error_message,
         }
-        logger.exception(message)
-        raise
+        logger.error(message)
+    # Lambda retries the batch from the earliest failed record
+    return ddb.build_stream_batch_response(failures)
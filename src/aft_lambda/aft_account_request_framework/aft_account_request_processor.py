@@ -5,16 +5,18 @@ import inspect
 import json
 import logging
 import os
-import time
-from typing import TYPE_CHECKING, Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 import aft_common.ssm
 from aft_common import constants as utils
 from aft_common import notifications, sqs
 from aft_common.account_provisioning_framework import ProvisionRoles
 from aft_common.account_request_framework import (
+    AccountNameEmailIndex,
     AccountRequest,
     create_new_account,
+    get_account_factory_client,
     modify_ct_request_is_valid,
     new_ct_request_is_valid,
     update_existing_account,
@@ -23,12 +25,16 @@ from aft_common.auth import AuthClient
 from aft_common.exceptions import NoAccountFactoryPortfolioFound
 from aft_common.logger import configure_aft_logger
 from aft_common.metrics import AFTMetrics
+from aft_common.organizations_cache import OrganizationSnapshotStore
+from aft_common.service_catalog import ProvisionedProductMirror
 from boto3.session import Session
 
 if TYPE_CHECKING:
     from aws_lambda_powertools.utilities.typing import LambdaContext
+    from mypy_boto3_sqs.type_defs import MessageTypeDef
 else:
     LambdaContext = object
+    MessageTypeDef = object
 
 configure_aft_logger()
 logger = logging.getLogger("aft")
@@ -52,70 +58,139 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
             role_name=ProvisionRoles.SERVICE_ROLE_NAME
         )
 
-        if account_request.provisioning_threshold_reached(threshold=threshold):
+        capacity = account_request.get_provisioning_capacity(threshold=threshold)
+        if capacity == 0:
             logger.info("Concurrent account provisioning threshold reached, exiting")
             return None
-        else:
-            sqs_message = sqs.receive_sqs_message(
-                aft_management_session,
-                aft_common.ssm.get_ssm_parameter_value(
-                    aft_management_session, utils.SSM_PARAM_ACCOUNT_REQUEST_QUEUE
-                ),
+
+        sqs_messages = sqs.receive_sqs_messages(
+            aft_management_session,
+            aft_common.ssm.get_ssm_parameter_value(
+                aft_management_session, utils.SSM_PARAM_ACCOUNT_REQUEST_QUEUE
+            ),
+            max_messages=capacity,
+        )
+        if len(sqs_messages) == 0:
+            return None
+
+        # Requests are validated in turn against one index, so requests of the same
+        # batch collide with each other, then submitted concurrently
+        account_index = AccountNameEmailIndex(
+            ct_management_session=ct_management_session,
+            snapshot_store=OrganizationSnapshotStore(aft_management_session),
+        )
+        new_accounts: List[Tuple[MessageTypeDef, Dict[str, Any]]] = []
+        account_updates: List[Tuple[MessageTypeDef, Dict[str, Any]]] = []
+        invalid_messages: List[MessageTypeDef] = []
+        errors: List[str] = []
+        for sqs_message in sqs_messages:
+            sqs_body = json.loads(sqs_message["Body"])
+            if sqs_body["operation"] == "ADD":
+                if new_ct_request_is_valid(
+                    ct_management_session, sqs_body, account_index=account_index
+                ):
+                    ct_parameters = sqs_body["control_tower_parameters"]
+                    account_index.add(
+                        account_name=ct_parameters["AccountName"],
+                        account_email=ct_parameters["AccountEmail"],
+                    )
+                    new_accounts.append((sqs_message, sqs_body))
+                else:
+                    invalid_messages.append(sqs_message)
+            elif sqs_body["operation"] == "UPDATE":
+                if modify_ct_request_is_valid(sqs_body):
+                    account_updates.append((sqs_message, sqs_body))
+                else:
+                    invalid_messages.append(sqs_message)
+            else:
+                logger.info("Unknown operation received in message")
+                errors.append("Unknown operation received in message")
+
+        succeeded_messages: List[MessageTypeDef] = []
+        actions: List[str] = []
+        if len(new_accounts) > 0:
+            client = get_account_factory_client(
+                aft_management_session, ct_management_session
             )
-            if sqs_message is not None:
-                aft_metrics = AFTMetrics()
-
-                sqs_body = json.loads(sqs_message["Body"])
-                ct_request_is_valid = True
-                if sqs_body["operation"] == "ADD":
-                    ct_request_is_valid = new_ct_request_is_valid(
-                        ct_management_session, sqs_body
+            # Resolved before the workers start, as they share the resolver
+            account_request.product_resolver.get_product()
+
+            def submit(request: Dict[str, Any]) -> Optional[str]:
+                try:
+                    create_new_account(
+                        session=aft_management_session,
+                        ct_management_session=ct_management_session,
+                        request=request,
+                        client=client,
+                        product_resolver=account_request.product_resolver,
                     )
-                    if ct_request_is_valid:
-                        response = create_new_account(
-                            session=aft_management_session,
-                            ct_management_session=ct_management_session,
-                            request=sqs_body,
-                        )
-
-                        action = "new-account-creation-invoked"
-                        try:
-                            aft_metrics.post_event(action=action, status="SUCCEEDED")
-                            logger.info(
-                                f"Successfully logged metrics. Action: {action}"
-                            )
-                        except Exception as e:
-                            logger.info(
-                                f"Unable to report metrics. Action: {action}; Error: {e}"
-                            )
-
-                elif sqs_body["operation"] == "UPDATE":
-                    ct_request_is_valid = modify_ct_request_is_valid(sqs_body)
-                    if ct_request_is_valid:
-                        update_existing_account(
-                            session=aft_management_session,
-                            ct_management_session=ct_management_session,
-                            request=sqs_body,
-                        )
-
-                        action = "existing-account-update-invoked"
-                        try:
-                            aft_metrics.post_event(action=action, status="SUCCEEDED")
-                            logger.info(
-                                f"Successfully logged metrics. Action: {action}"
-                            )
-                        except Exception as e:
-                            logger.info(
-                                f"Unable to report metrics. Action: {action}; Error: {e}"
-                            )
+                    return None
+                except Exception as error:
+                    logger.exception(f"Failed to create account: {error}")
+                    return str(error)
+
+            with ThreadPoolExecutor(max_workers=len(new_accounts)) as executor:
+                submit_errors = list(
+                    executor.map(submit, [sqs_body for _, sqs_body in new_accounts])
+                )
+            for (sqs_message, _), submit_error in zip(new_accounts, submit_errors):
+                if submit_error is None:
+                    succeeded_messages.append(sqs_message)
+                    actions.append("new-account-creation-invoked")
                 else:
-                    logger.info("Unknown operation received in message")
-                    raise RuntimeError("Unknown operation received in message")
+                    errors.append(submit_error)
+
+        # Updates resolve the provisioned product of each account through their own
+        # clients, so are submitted in turn
+        product_mirror = ProvisionedProductMirror(
+            aft_management_session=aft_management_session,
+            ct_management_session=ct_management_session,
+        )
+        for sqs_message, sqs_body in account_updates:
+            try:
+                update_existing_account(
+                    session=aft_management_session,
+                    ct_management_session=ct_management_session,
+                    request=sqs_body,
+                    product_resolver=account_request.product_resolver,
+                    product_mirror=product_mirror,
+                )
+                succeeded_messages.append(sqs_message)
+                actions.append("existing-account-update-invoked")
+            except Exception as error:
+                logger.exception(f"Failed to update account: {error}")
+                errors.append(str(error))
+
+        # Failed requests are left on the queue to be retried, invalid requests never
+        # succeed so are deleted
+        sqs.delete_sqs_messages(
+            aft_management_session, succeeded_messages + invalid_messages
+        )
 
-                sqs.delete_sqs_message(aft_management_session, sqs_message)
-                if not ct_request_is_valid:
-                    logger.exception("CT Request is not valid")
-                    raise RuntimeError("CT Request is not valid")
+        if len(actions) > 0:
+            aft_metrics = AFTMetrics()
+            for action in actions:
+                try:
+                    aft_metrics.post_event(action=action, status="SUCCEEDED")
+                    logger.info(f"Successfully logged metrics. Action: {action}")
+                except Exception as e:
+                    logger.info(
+                        f"Unable to report metrics. Action: {action}; Error: {e}"
+                    )
+
+        if len(errors) > 0:
+            # The resolved provisioning artifact may have been deactivated since it
+            # was cached, so retried requests resolve it afresh
+            account_request.product_resolver.invalidate()
+            raise RuntimeError(
+                f"{len(errors)} of {len(sqs_messages)} account requests failed: "
+                + "; ".join(errors)
+            )
+        if len(invalid_messages) > 0:
+            logger.exception("CT Request is not valid")
+            raise RuntimeError(
+                f"{len(invalid_messages)} of {len(sqs_messages)} CT Requests are not valid"
+            )
 
     except Exception as error:
         notifications.send_lambda_failure_sns_message(
@@ -6,6 +6,7 @@ import logging
 from typing import TYPE_CHECKING, Any, Dict
 
 from aft_common import codepipeline, ddb
+from aft_common.account_id_manifest import AftAccountIdManifest
 from aft_common.aft_utils import sanitize_input_for_logging
 from aft_common.auth import AuthClient
 from aft_common.constants import SSM_PARAM_AFT_DDB_META_TABLE
@@ -48,7 +49,9 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
 
         logger.info(f"Deleting account customization pipeline for {account_id}")
         codepipeline.delete_customization_pipeline(
-            aft_management_session=aft_management_session, account_id=account_id
+            aft_management_session=aft_management_session,
+            account_id=account_id,
+            pipeline_index=codepipeline.AccountPipelineIndex(aft_management_session),
         )
         logger.info(f"Customization pipeline deleted")
 
@@ -64,6 +67,7 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
             primary_key={"id": account_id},
         )
         logger.info(f"Account metadata record deleted")
+        AftAccountIdManifest(aft_management_session).remove(account_id=account_id)
 
         logger.info(f"Cleanup for {account_id} complete ")
 
@@ -20,6 +20,7 @@ from aft_common.constants import SSM_PARAM_AFT_SFN_NAME
 from aft_common.logger import configure_aft_logger
 from aft_common.notifications import send_lambda_failure_sns_message
 from aft_common.organizations import OrganizationsAgent
+from aft_common.service_catalog import ProvisionedProductMirror
 from aft_common.ssm import get_ssm_parameter_value
 from boto3.session import Session
 
@@ -50,6 +51,16 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
 
             logger.info("Control Tower Event Detected")
 
+            # The mirror refreshes itself on lookup misses, so failing to apply the
+            # event must not hold up the account's customizations
+            try:
+                ProvisionedProductMirror(
+                    aft_management_session=aft_management_session,
+                    ct_management_session=ct_management_session,
+                ).apply_event(event)
+            except Exception as error:
+                logger.warning(f"Unable to refresh provisioned product mirror: {error}")
+
             # Get account ID from CT event
             # Different CT events have different data structures - map them for easier access
             event_name_to_event_detail_key_map = {
@@ -0,0 +1,53 @@
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import inspect
+import logging
+from typing import TYPE_CHECKING, Any, Dict
+
+from aft_common import notifications
+from aft_common.auth import AuthClient
+from aft_common.logger import configure_aft_logger
+from aft_common.organizations import OrganizationsAgent
+from aft_common.organizations_cache import (
+    AccountTagIndexStore,
+    OrganizationSnapshotStore,
+)
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+else:
+    LambdaContext = object
+
+configure_aft_logger()
+logger = logging.getLogger("aft")
+
+
+def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    auth = AuthClient()
+    try:
+        aft_management_session = auth.get_aft_management_session()
+        ct_management_session = auth.get_ct_management_session()
+
+        orgs_agent = OrganizationsAgent(ct_management_session)
+        OrganizationSnapshotStore(aft_management_session).apply_event(
+            event=event, orgs_agent=orgs_agent
+        )
+        AccountTagIndexStore(aft_management_session).apply_event(
+            event=event, orgs_agent=orgs_agent
+        )
+
+    except Exception as error:
+        notifications.send_lambda_failure_sns_message(
+            session=auth.aft_management_session,
+            message=str(error),
+            context=context,
+            subject="AFT organization snapshot update failed",
+        )
+        message = {
+            "FILE": __file__.split("/")[-1],
+            "METHOD": inspect.stack()[0][3],
+            "EXCEPTION": str(error),
+        }
+        logger.exception(message)
+        raise
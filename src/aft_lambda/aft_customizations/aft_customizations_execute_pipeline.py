@@ -5,12 +5,16 @@ import inspect
 import logging
 from typing import TYPE_CHECKING, Any, Dict
 
-import aft_common.ssm
-from aft_common import constants as utils
 from aft_common import notifications
-from aft_common.aft_utils import sanitize_input_for_logging
-from aft_common.codepipeline import execute_pipeline
-from aft_common.logger import configure_aft_logger, customization_request_logger
+from aft_common.constants import SSM_PARAM_AFT_CUSTOMIZATION_SCHEDULING_POLICY
+from aft_common.customization_scheduler import (
+    CustomizationScheduler,
+    PipelineDurationHistory,
+    order_accounts,
+)
+from aft_common.customizations import commit_baselines
+from aft_common.logger import configure_aft_logger
+from aft_common.ssm import get_ssm_parameter_value
 from boto3.session import Session
 
 if TYPE_CHECKING:
@@ -25,23 +29,58 @@ logger = logging.getLogger("aft")
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     session = Session()
     try:
-        maximum_concurrent_pipelines = int(
-            aft_common.ssm.get_ssm_parameter_value(
-                session, utils.SSM_PARAM_AFT_MAXIMUM_CONCURRENT_CUSTOMIZATIONS
+        execution_id = event["get_execution_id"]["execution_id"]
+        scheduler = CustomizationScheduler(session)
+        # The first invocation queues the targets, later ones only dispatch to
+        # reclaim expired leases. Queued accounts are otherwise launched by the
+        # pipeline event handler as soon as a running pipeline releases its lease
+        if not event["targets"].get("scheduled"):
+            accounts = [
+                str(account_id) for account_id in event["targets"]["pending_accounts"]
+            ]
+            logger.info("Accounts submitted for execution: " + str(len(accounts)))
+            policy = get_ssm_parameter_value(
+                session, SSM_PARAM_AFT_CUSTOMIZATION_SCHEDULING_POLICY
+            )
+            accounts = order_accounts(
+                accounts, PipelineDurationHistory(session).get_estimates(), policy
+            )
+            scheduler.enqueue(
+                accounts,
+                execution_id,
+                execution_arn=event["get_execution_id"].get("execution_arn"),
             )
-        )
 
-        running_pipelines = int(event["running_executions"]["running_pipelines"])
-        pipelines_to_run = maximum_concurrent_pipelines - running_pipelines
-        accounts = event["targets"]["pending_accounts"]
-        logger.info("Accounts submitted for execution: " + str(len(accounts)))
-        for account_id in accounts[:pipelines_to_run]:
-            execute_pipeline(session, str(account_id))
-            accounts.remove(account_id)
-        logger.info("Accounts remaining to be executed - ")
-        sanitized_accounts = sanitize_input_for_logging(accounts)
-        logger.info(sanitized_accounts)
-        return {"number_pending_accounts": len(accounts), "pending_accounts": accounts}
+        launch_results = scheduler.dispatch()
+        failed_accounts = [
+            account_id
+            for account_id, result in launch_results.items()
+            if result["status"] not in CustomizationScheduler.LAUNCHED_STATUSES
+        ]
+        if failed_accounts:
+            raise Exception(
+                f"Failed to execute customization pipelines for accounts: {failed_accounts}"
+            )
+
+        outstanding = scheduler.get_outstanding_count(execution_id)
+        logger.info(f"Accounts queued or running: {outstanding}")
+        baselines = event["targets"].get("baselines", [])
+        if outstanding == 0:
+            # Every customization of the run has ended, advance the baselines of
+            # its "changed" selectors
+            commit_baselines(
+                session,
+                baselines,
+                execution_id,
+                failed_account_ids=scheduler.get_failed_accounts(execution_id),
+            )
+            scheduler.clear_failed_accounts(execution_id)
+        return {
+            "scheduled": True,
+            "number_pending_accounts": outstanding,
+            "launch_results": launch_results,
+            "baselines": baselines,
+        }
 
     except Exception as error:
         notifications.send_lambda_failure_sns_message(
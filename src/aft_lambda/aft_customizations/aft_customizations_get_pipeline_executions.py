@@ -5,9 +5,8 @@ import inspect
 import logging
 from typing import TYPE_CHECKING, Any, Dict
 
-from aft_common import aft_utils as utils
 from aft_common import notifications
-from aft_common.codepipeline import get_running_pipeline_count, list_pipelines
+from aft_common.codepipeline import RunningPipelineCounter
 from aft_common.logger import configure_aft_logger
 from boto3.session import Session
 
@@ -23,8 +22,12 @@ logger = logging.getLogger("aft")
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, int]:
     session = Session()
     try:
-        pipelines = list_pipelines(session)
-        running_pipelines = get_running_pipeline_count(session, pipelines)
+        # Counter is kept current from pipeline execution events, it is only
+        # reconciled here if that has never happened yet
+        counter = RunningPipelineCounter(session)
+        running_pipelines = counter.get_running_count()
+        if running_pipelines is None:
+            running_pipelines = counter.reconcile()
 
         return {"running_pipelines": running_pipelines}
 
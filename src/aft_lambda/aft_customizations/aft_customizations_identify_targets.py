@@ -8,21 +8,24 @@ from typing import TYPE_CHECKING, Any, Dict
 
 from aft_common import notifications
 from aft_common.account_request_framework import (
-    build_account_customization_payload,
-    get_account_request_record,
+    build_account_customization_payloads,
+    get_account_request_records,
 )
 from aft_common.aft_utils import sanitize_input_for_logging
 from aft_common.auth import AuthClient
+from aft_common.customization_fingerprint import CustomizationFingerprinter
 from aft_common.customizations import (
-    get_excluded_accounts,
-    get_included_accounts,
-    get_target_accounts,
+    TargetAccountPlanner,
+    stage_baselines,
     upload_target_account_info,
     validate_identify_targets_request,
 )
 from aft_common.logger import configure_aft_logger
 from aft_common.organizations import OrganizationsAgent
-from botocore.exceptions import ClientError
+from aft_common.organizations_cache import (
+    AccountTagIndexStore,
+    OrganizationSnapshotStore,
+)
 
 if TYPE_CHECKING:
     from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -35,77 +38,112 @@ logger = logging.getLogger("aft")
 
 
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    payload = event
+    if not validate_identify_targets_request(payload):
+        raise ValueError("Invalid 'identify_targets_request' payload")
+
     auth = AuthClient()
     try:
         aft_management_session = auth.get_aft_management_session()
         ct_mgmt_session = auth.get_ct_management_session()
 
         # Reuse orgs agent to benefit from memoization, avoid throttling
-        orgs_agent = OrganizationsAgent(ct_mgmt_session)
-
-        payload = event
-        if not validate_identify_targets_request(payload):
-            raise ValueError("Invalid 'identify_targets_request' payload")
-        else:
-            execution_id = payload["get_execution_id"]["execution_id"]
-            sanitized_execution_id = sanitize_input_for_logging(execution_id)
-            logger.info(f"Identify Targets for execution_id: {sanitized_execution_id}")
-
-            included_accounts = get_included_accounts(
-                aft_management_session, ct_mgmt_session, orgs_agent, payload["include"]
-            )
-            if "exclude" in payload.keys():
-                excluded_accounts = get_excluded_accounts(
-                    aft_management_session,
-                    ct_mgmt_session,
-                    orgs_agent,
-                    payload["exclude"],
-                )
-                target_accounts = get_target_accounts(
-                    included_accounts, excluded_accounts
-                )
-            else:
-                target_accounts = included_accounts
+        # Snapshot mode resolves every target's email, OU and parent from a single org crawl,
+        # persisted so that it is shared with other invocations until it expires.
+        # Tag filters are resolved from an account tag index persisted the same way
+        orgs_agent = OrganizationsAgent(
+            ct_mgmt_session,
+            snapshot_store=OrganizationSnapshotStore(aft_management_session),
+            tag_index_store=AccountTagIndexStore(aft_management_session),
+        )
 
-            target_account_info = []
-            for account_id in target_accounts:
+        execution_id = payload["get_execution_id"]["execution_id"]
+        sanitized_execution_id = sanitize_input_for_logging(execution_id)
+        logger.info(f"Identify Targets for execution_id: {sanitized_execution_id}")
+
+        # AFT account IDs are read from the manifest rather than scanning the
+        # metadata table
+        planner = TargetAccountPlanner(
+            aft_management_session, ct_mgmt_session, orgs_agent, use_manifest=True
+        )
+        target_accounts = planner.plan(
+            included=payload["include"], excluded=payload.get("exclude")
+        )
+
+        # Resolve every target's details up front from per-OU account listings
+        account_infos = orgs_agent.get_aft_account_infos(account_ids=target_accounts)
+
+        for account_id in list(target_accounts):
+            if account_id not in account_infos:
                 sanitized_account_id = sanitize_input_for_logging(account_id)
                 logger.info(
-                    f"Building customization payload for {sanitized_account_id}"
+                    f"Account with ID {sanitized_account_id} does not exist or is suspended - ignoring"
                 )
-                try:
-                    account_email = orgs_agent.get_account_email_from_id(account_id)
-                except ClientError as error:
-                    if error.response["Error"]["Code"] == "AccountNotFoundException":
-                        logger.info(
-                            f"Account with ID {sanitized_account_id} does not exist or is suspended - ignoring"
-                        )
-                        target_accounts.remove(account_id)
-                        continue
-                    else:
-                        raise error
-
-                account_request = get_account_request_record(
-                    aft_management_session=aft_management_session,
-                    request_table_id=account_email,
+                target_accounts.remove(account_id)
+
+        # Baselines of "changed" selectors are staged, and only advanced once every
+        # target has been customized
+        pending_baselines = planner.get_pending_baselines(target_accounts)
+
+        # Account request records are fetched with batched gets keyed by email
+        account_requests = get_account_request_records(
+            aft_management_session=aft_management_session,
+            request_table_ids=[
+                account_infos[account_id]["email"] for account_id in target_accounts
+            ],
+        )
+
+        skipped_accounts = []
+        if payload.get("skip_unchanged"):
+            fingerprinter = CustomizationFingerprinter(aft_management_session)
+            revisions = fingerprinter.get_head_revisions(
+                payload.get("source_revisions")
+            )
+            if revisions is None:
+                logger.info(
+                    "Source revisions are required to skip unchanged accounts with "
+                    f"{fingerprinter.vcs_provider} - customizing all targets"
+                )
+            else:
+                unchanged_accounts = fingerprinter.get_unchanged_accounts(
+                    account_requests={
+                        account_id: account_requests[account_infos[account_id]["email"]]
+                        for account_id in target_accounts
+                        if account_infos[account_id]["email"] in account_requests
+                    },
+                    revisions=revisions,
                 )
-                account_payload = build_account_customization_payload(
-                    ct_management_session=ct_mgmt_session,
-                    account_id=account_id,
-                    account_request=account_request,
-                    control_tower_event={},
+                skipped_accounts = [
+                    a for a in target_accounts if a in unchanged_accounts
+                ]
+                target_accounts = [
+                    a for a in target_accounts if a not in unchanged_accounts
+                ]
+                logger.info(
+                    f"Skipping {len(skipped_accounts)} accounts with unchanged inputs"
                 )
-                sanitized_payload = sanitize_input_for_logging(account_payload)
-                logger.info(f"Successfully generated payload: {sanitized_payload}")
-                target_account_info.append(account_payload)
-
-            return {
-                "number_pending_accounts": len(target_accounts),
-                "pending_accounts": target_accounts,
-                "target_accounts_info": upload_target_account_info(
-                    aft_management_session, target_account_info, execution_id
-                ),
-            }
+
+        # Payloads are streamed to S3 in chunks as they are built
+        target_account_info = build_account_customization_payloads(
+            aft_management_session=aft_management_session,
+            ct_management_session=ct_mgmt_session,
+            account_infos={
+                account_id: account_infos[account_id] for account_id in target_accounts
+            },
+            account_requests=account_requests,
+        )
+
+        return {
+            "number_pending_accounts": len(target_accounts),
+            "pending_accounts": target_accounts,
+            "skipped_accounts": skipped_accounts,
+            "baselines": stage_baselines(
+                aft_management_session, pending_baselines, execution_id
+            ),
+            "target_accounts_info": upload_target_account_info(
+                aft_management_session, target_account_info, execution_id
+            ),
+        }
 
     except Exception as error:
         notifications.send_lambda_failure_sns_message(
@@ -0,0 +1,69 @@
+# Copyright Amazon.com, Inc. or its affiliates. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import inspect
+import logging
+from typing import TYPE_CHECKING, Any, Dict
+
+from aft_common import notifications
+from aft_common.aft_utils import sanitize_input_for_logging
+from aft_common.codepipeline import RunningPipelineCounter
+from aft_common.customization_fingerprint import CustomizationFingerprinter
+from aft_common.customization_scheduler import (
+    CustomizationScheduler,
+    PipelineDurationHistory,
+)
+from aft_common.logger import configure_aft_logger
+from boto3.session import Session
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+else:
+    LambdaContext = object
+
+configure_aft_logger()
+logger = logging.getLogger("aft")
+
+PIPELINE_EXECUTION_STATE_CHANGE = "CodePipeline Pipeline Execution State Change"
+
+
+def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    session = Session()
+    try:
+        counter = RunningPipelineCounter(session)
+        scheduler = CustomizationScheduler(session)
+        if event.get("detail-type") == PIPELINE_EXECUTION_STATE_CHANGE:
+            logger.info(sanitize_input_for_logging(event["detail"]))
+            counter.apply_event(event)
+            PipelineDurationHistory(session).apply_event(event)
+            CustomizationFingerprinter(session).apply_event(event)
+            launch_results = scheduler.apply_event(event)
+        else:
+            # Scheduled reconciliation, also reclaiming expired leases
+            counter.reconcile()
+            launch_results = scheduler.dispatch()
+
+        failed_accounts = [
+            account_id
+            for account_id, result in launch_results.items()
+            if result["status"] not in CustomizationScheduler.LAUNCHED_STATUSES
+        ]
+        if failed_accounts:
+            raise Exception(
+                f"Failed to execute customization pipelines for accounts: {failed_accounts}"
+            )
+
+    except Exception as error:
+        notifications.send_lambda_failure_sns_message(
+            session=session,
+            message=str(error),
+            context=context,
+            subject="Failed to schedule AFT customization pipelines",
+        )
+        message = {
+            "FILE": __file__.split("/")[-1],
+            "METHOD": inspect.stack()[0][3],
+            "EXCEPTION": str(error),
+        }
+        logger.exception(message)
+        raise
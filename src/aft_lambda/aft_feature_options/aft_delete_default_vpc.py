@@ -27,6 +27,7 @@ from aft_common.feature_options import (
     get_vpc_subnets,
 )
 from aft_common.logger import customization_request_logger
+from aft_common.validation import FEATURE_OPTIONS_EVENT_SCHEMA, validate_event
 from botocore.exceptions import (
     ConnectTimeoutError,
     EndpointConnectionError,
@@ -49,6 +50,7 @@ else:
 
 
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    validate_event(FEATURE_OPTIONS_EVENT_SCHEMA, event)
     request_id = event["customization_request_id"]
     target_account_id = event["account_info"]["account"]["id"]
 
@@ -20,6 +20,7 @@ from aft_common.feature_options import (
     trail_is_logging,
 )
 from aft_common.logger import customization_request_logger
+from aft_common.validation import FEATURE_OPTIONS_EVENT_SCHEMA, validate_event
 from boto3.session import Session
 
 if TYPE_CHECKING:
@@ -31,6 +32,7 @@ CLOUDTRAIL_TRAIL_NAME = "aws-aft-CustomizationsCloudTrail"
 
 
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    validate_event(FEATURE_OPTIONS_EVENT_SCHEMA, event)
     request_id = event["customization_request_id"]
     target_account_id = event["account_info"]["account"]["id"]
 
@@ -11,6 +11,7 @@ from aft_common.account_provisioning_framework import ProvisionRoles
 from aft_common.auth import AuthClient
 from aft_common.logger import customization_request_logger
 from aft_common.premium_support import account_enrollment_requested, generate_case
+from aft_common.validation import FEATURE_OPTIONS_EVENT_SCHEMA, validate_event
 from boto3.session import Session
 
 if TYPE_CHECKING:
@@ -20,6 +21,7 @@ else:
 
 
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
+    validate_event(FEATURE_OPTIONS_EVENT_SCHEMA, event)
     request_id = event["customization_request_id"]
     target_account_id = event["account_info"]["account"]["id"]
 
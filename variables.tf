@@ -138,6 +138,16 @@ variable "maximum_concurrent_customizations" {
   }
 }
 
+variable "customization_scheduling_policy" {
+  description = "Order in which accounts are customized: list_order, longest_first or shortest_first, based on the recent pipeline durations of each account"
+  type        = string
+  default     = "longest_first"
+  validation {
+    condition     = contains(["list_order", "longest_first", "shortest_first"], var.customization_scheduling_policy)
+    error_message = "Valid values for var: customization_scheduling_policy are (list_order, longest_first, shortest_first)."
+  }
+}
+
 variable "aft_vpc_endpoints" {
   type        = bool
   description = "Flag turning VPC endpoints on/off for AFT VPC"